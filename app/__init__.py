@@ -4,6 +4,7 @@ from app.seeds import seed_db
 from config.db import db
 from config import config
 from app.erros import register_error_handlers
+from app.commands import register_commands
 from routes.routes_front import produtos
 
 def create_app():
@@ -25,6 +26,7 @@ def create_app():
         g.user_id = session.get("user_id")  # None se não logado
 
     register_error_handlers(app)
+    register_commands(app)
 
     from routes.routes_front import front_bp
     from routes.auth import auth_bp
@@ -38,6 +40,7 @@ def create_app():
     from routes.produtos import produtos_bp
     from routes.pedido import bp_orders
     from routes.prontuario import pront_api
+    from routes.companie import companie_api
     
     app.register_blueprint(user_api)
     app.register_blueprint(auth_bp)
@@ -51,10 +54,17 @@ def create_app():
     app.register_blueprint(produtos_bp)
     app.register_blueprint(bp_orders)
     app.register_blueprint(pront_api)
+    app.register_blueprint(companie_api)
 
     with app.app_context():
         import models
+        from app.migrations import upgrade_schema
+        from service.buscaService import ensure_index
+        from sqlalchemy import inspect
+        existentes = set(inspect(db.engine).get_table_names())
         db.create_all()
+        upgrade_schema(frozenset(db.metadata.tables) - existentes)
+        ensure_index()
 
         if config.SEED_ON_STARTUP == True:
             seed_db(config)
@@ -0,0 +1,52 @@
+# app/commands.py
+import click
+
+
+def register_commands(app):
+    """Comandos de manutenção: `flask --app main <comando>`."""
+
+    @app.cli.command("backfill-imagens")
+    def backfill_imagens():
+        """Calcula hash/dimensões das imagens de produtos antigos."""
+        from service.produtoService import backfill_image_meta
+        from app.migrations import backfill_photo_hashes
+        n = backfill_image_meta()
+        click.echo(f"{n} produto(s) atualizado(s).")
+        n = backfill_photo_hashes()
+        click.echo(f"{n} foto(s) de pets/logo atualizada(s).")
+
+    @app.cli.command("reindex-produtos")
+    def reindex_produtos():
+        """Recria o índice de busca (FTS5) do catálogo a partir da tabela produtos."""
+        from service.buscaService import ensure_index, rebuild_index
+        if not ensure_index():
+            click.echo("Banco sem suporte a FTS5; busca continua via ILIKE.")
+            return
+        n = rebuild_index()
+        click.echo(f"{n} produto(s) indexado(s).")
+
+    @app.cli.command("purge-idempotencia")
+    def purge_idempotencia():
+        """Apaga as Idempotency-Keys expiradas."""
+        from service.idempotenciaService import purge_expired
+        n = purge_expired()
+        click.echo(f"{n} chave(s) removida(s).")
+
+    @app.cli.command("backfill-vendas")
+    def backfill_vendas():
+        """Recalcula os rollups de vendas (sales_daily) a partir do histórico de pedidos."""
+        from service.vendasService import rebuild_rollups
+        n = rebuild_rollups()
+        click.echo(f"{n} pedido(s) consolidado(s).")
+
+    @app.cli.command("sweep-carrinhos")
+    @click.option("--dias-abandono", type=int, default=None, help="Padrão: CART_ABANDON_DAYS.")
+    @click.option("--dias-retencao", type=int, default=None, help="Padrão: CART_RETENTION_DAYS.")
+    @click.option("--lote", type=int, default=1000, show_default=True)
+    def sweep_carrinhos(dias_abandono, dias_retencao, lote):
+        """Marca carrinhos abandonados e apaga linhas/carrinhos que não servem mais."""
+        from service.cartService import sweep_carts
+        res = sweep_carts(abandon_days=dias_abandono, retention_days=dias_retencao, lote=lote)
+        click.echo(f"{res['carrinhos_abandonados']} carrinho(s) marcado(s) como abandonado(s).")
+        click.echo(f"{res['linhas_removidas']} linha(s) de carrinho removida(s).")
+        click.echo(f"{res['carrinhos_removidos']} carrinho(s) removido(s).")
@@ -0,0 +1,17 @@
+from enum import Enum
+from typing import Optional, Type
+
+
+def enum_label(enum_cls: Type[Enum], key: Optional[str]) -> Optional[str]:
+    """
+    Rótulo de exibição para a chave gravada no banco (ex.: 'RACAO' -> 'Ração').
+    Alguns membros dos enums têm vírgula sobrando e o value vira tupla.
+    Chave desconhecida retorna a própria chave.
+    """
+    if not key:
+        return key
+    try:
+        label = enum_cls[key].value
+    except KeyError:
+        return key
+    return label[0] if isinstance(label, tuple) else label
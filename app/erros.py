@@ -6,9 +6,14 @@ import traceback
 
 
 class ValidationError(ValueError):
-    def __init__(self, message, field=None):
+    def __init__(self, message, field=None, details=None):
         super().__init__(message)
         self.field = field
+        self.details = details  # dados extras para o cliente (ex.: ids afetados)
+
+    def __reduce__(self):
+        # preserva field/details ao voltar de um ProcessPoolExecutor
+        return type(self), (str(self), self.field, self.details)
 
 def _json_error(error: str, message: str, status: int, **extra):
     payload = {"error": error, "message": message, "status": status}
@@ -19,7 +24,8 @@ def register_error_handlers(app):
     # Validation do domínio
     @app.errorhandler(ValidationError)
     def _handle_validation(err: ValidationError):
-        return _json_error("validation_error", str(err), 400, field=getattr(err, "field", None))
+        return _json_error("validation_error", str(err), 400, field=getattr(err, "field", None),
+                           details=getattr(err, "details", None))
 
     # HTTPException (404, 405, 413, etc) -> JSON
     @app.errorhandler(HTTPException)
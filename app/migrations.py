@@ -0,0 +1,194 @@
+# app/migrations.py
+from datetime import date, datetime
+
+from flask import current_app
+from sqlalchemy import MetaData, inspect, select, text
+from sqlalchemy.schema import CreateTable
+from sqlalchemy.types import Date
+
+from config.db import db
+
+# db.create_all() só cria tabelas novas; colunas adicionadas depois precisam de ALTER TABLE.
+# {tabela: {coluna: DDL}}
+COLUNAS_NOVAS = {
+    "produtos": {
+        "imagem_hash": "VARCHAR(64)",
+        "imagem_width": "INTEGER",
+        "imagem_height": "INTEGER",
+    },
+    "pets": {
+        "foto_hash": "VARCHAR(64)",
+    },
+    "companie": {
+        "imagem_hash": "VARCHAR(64)",
+    },
+}
+
+# colunas que eram texto ISO (VARCHAR(20)) e passaram a ser DATE; {tabela: (colunas)}
+COLUNAS_DATA = {
+    "vaccines": ("date", "next"),
+    "consultations": ("date",),
+}
+# formatos aceitos nos valores antigos (a API nunca validou o texto)
+FORMATOS_DATA = ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%Y/%m/%d")
+
+
+def upgrade_schema(tabelas_novas: frozenset = frozenset()):
+    """
+    Adiciona (de forma idempotente) as colunas e os índices declarados nos
+    models que faltam em bancos já existentes.
+    tabelas_novas: tabelas que o db.create_all() acabou de criar (disparam os
+    backfills delas, uma vez só, como as colunas novas).
+    """
+    insp = inspect(db.engine)
+    adicionadas = set()
+    with db.engine.begin() as conn:
+        for tabela, colunas in COLUNAS_NOVAS.items():
+            if not insp.has_table(tabela):
+                continue
+            existentes = {c["name"] for c in insp.get_columns(tabela)}
+            for nome, ddl in colunas.items():
+                if nome not in existentes:
+                    conn.execute(text(f"ALTER TABLE {tabela} ADD COLUMN {nome} {ddl}"))
+                    adicionadas.add(f"{tabela}.{nome}")
+
+        # antes dos índices: no SQLite a conversão recria a tabela (e os índices somem junto)
+        for tabela, colunas in COLUNAS_DATA.items():
+            if insp.has_table(tabela):
+                converte_datas(conn, insp, tabela, colunas)
+
+        for table in db.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+
+    # dados derivados das colunas recém-criadas
+    if "produtos.imagem_hash" in adicionadas:
+        from service.produtoService import backfill_image_meta
+        backfill_image_meta()
+    if adicionadas & {"pets.foto_hash", "companie.imagem_hash"}:
+        backfill_photo_hashes()
+    if "sales_daily" in tabelas_novas:
+        backfill_rollups_vendas()
+
+
+def backfill_rollups_vendas() -> int:
+    """
+    sales_daily recém-criada num banco com pedidos (daí em diante todo pedido novo
+    já entra no rollup): recalcula o histórico para os relatórios não saírem zerados.
+    """
+    from models.pedidoModel import Order
+    from service.vendasService import rebuild_rollups
+
+    if db.session.execute(select(Order.id_pedido).limit(1)).first() is None:
+        return 0
+    n = rebuild_rollups()
+    current_app.logger.info("sales_daily: %d pedido(s) consolidado(s) a partir do histórico", n)
+    return n
+
+
+def backfill_photo_hashes() -> int:
+    """Calcula o hash das fotos de pets e do logo da empresa gravados sem ele."""
+    from models.petsModel import Pet
+    from models.companieModel import companie
+    from service.imagemService import backfill_hashes
+    from utils.imagem import image_meta
+
+    n = backfill_hashes(Pet, Pet.foto_bloob, Pet.foto_hash,
+                        lambda p, raw: setattr(p, "foto_hash", image_meta(raw)[0] if raw else None))
+    n += backfill_hashes(companie, companie.imagem_bloob, companie.imagem_hash,
+                         lambda c, raw: setattr(c, "imagem_hash", image_meta(raw)[0] if raw else None))
+    return n
+
+
+def _parse_data_legada(valor):
+    """Data de um valor antigo (texto em algum dos FORMATOS_DATA, com ou sem hora); None se não der."""
+    if valor is None or isinstance(valor, date):
+        return valor.date() if isinstance(valor, datetime) else valor
+    s = str(valor).strip()[:10]
+    for fmt in FORMATOS_DATA:
+        try:
+            return datetime.strptime(s, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def converte_datas(conn, insp, tabela: str, colunas: tuple) -> bool:
+    """
+    Converte colunas texto (ISO) para DATE, de forma idempotente (coluna já DATE => nada).
+    1. normaliza os valores para AAAA-MM-DD. Nada é inventado: se uma coluna NOT NULL
+       tem valor ilegível, a migração para (RuntimeError com os ids, nada é gravado) e
+       as linhas precisam ser corrigidas à mão; numa coluna opcional o valor vira NULL
+       e o texto original vai para notes, marcado com [migração]
+    2. troca o tipo: ALTER COLUMN no PostgreSQL/MySQL; no SQLite (sem ALTER COLUMN)
+       recria a tabela pelo model e copia as linhas
+    """
+    tipos = {c["name"]: c["type"] for c in insp.get_columns(tabela)}
+    pendentes = [c for c in colunas if c in tipos and not isinstance(tipos[c], Date)]
+    if not pendentes:
+        return False
+
+    table = db.metadata.tables[tabela]
+    pk = table.primary_key.columns.values()[0].name
+    q = conn.dialect.identifier_preparer.quote
+    com_notes = "notes" in tipos
+    sel = ", ".join(q(c) for c in (pk, *pendentes, *(("notes",) if com_notes else ())))
+    updates, invalidas = [], []
+    for row in conn.execute(text(f"SELECT {sel} FROM {q(tabela)}")).mappings():
+        novos, marcas = {}, []
+        for col in pendentes:
+            if row[col] is None:
+                continue
+            d = _parse_data_legada(row[col])
+            if d is None:
+                if not table.c[col].nullable or not com_notes:
+                    invalidas.append(f"{row[pk]}.{col}={row[col]!r}")
+                    continue
+                marcas.append(f"[migração] {col} ilegível: {row[col]!r}")
+            novo = d.isoformat() if d else None
+            if novo != row[col]:
+                novos[col] = novo
+        if marcas:
+            novos["notes"] = "\n".join(([row["notes"]] if row["notes"] else []) + marcas)
+        if novos:
+            updates.append((row[pk], novos))
+    if invalidas:
+        raise RuntimeError(
+            f"{tabela}: datas ilegíveis em colunas obrigatórias (id.coluna=valor): "
+            + ", ".join(invalidas[:50]) + (" ..." if len(invalidas) > 50 else "")
+            + ". Corrija para AAAA-MM-DD e reinicie; nada foi alterado."
+        )
+    for id_, novos in updates:
+        sets = ", ".join(f"{q(c)} = :{c}" for c in novos)
+        conn.execute(text(f"UPDATE {q(tabela)} SET {sets} WHERE {q(pk)} = :_pk"), {**novos, "_pk": id_})
+    marcadas = sum(1 for _, n in updates if "notes" in n)
+    if marcadas:
+        current_app.logger.warning("%s: %d linha(s) com data opcional ilegível (NULL; texto original em notes)",
+                                   tabela, marcadas)
+
+    dialect = conn.dialect.name
+    if dialect == "sqlite":
+        _recria_sqlite(conn, table, set(tipos))
+    elif dialect == "postgresql":
+        for col in pendentes:
+            conn.execute(text(f"ALTER TABLE {q(tabela)} ALTER COLUMN {q(col)} TYPE DATE USING {q(col)}::date"))
+    else:
+        for col in pendentes:
+            nulo = "" if table.c[col].nullable else " NOT NULL"
+            conn.execute(text(f"ALTER TABLE {q(tabela)} MODIFY {q(col)} DATE{nulo}"))
+    return True
+
+
+def _recria_sqlite(conn, table, existentes: set):
+    """Roteiro do SQLite para mudar tipo: cria <tabela>__novo pelo model, copia, apaga e renomeia."""
+    tmp = MetaData()
+    for fk in table.foreign_keys:  # o CREATE TABLE precisa resolver as FKs
+        if fk.column.table.name not in tmp.tables:
+            fk.column.table.to_metadata(tmp)
+    nova = table.to_metadata(tmp, name=f"{table.name}__novo")
+    conn.execute(CreateTable(nova))
+    q = conn.dialect.identifier_preparer.quote
+    cols = ", ".join(q(c.name) for c in table.columns if c.name in existentes)
+    conn.execute(text(f"INSERT INTO {q(nova.name)} ({cols}) SELECT {cols} FROM {q(table.name)}"))
+    conn.execute(text(f"DROP TABLE {q(table.name)}"))
+    conn.execute(text(f"ALTER TABLE {q(nova.name)} RENAME TO {q(table.name)}"))
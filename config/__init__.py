@@ -18,6 +18,21 @@ class Config:
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SECRET_KEY = os.getenv("SECRET_KEY")
+    # cache em disco das imagens (originais descompactados + variantes), chaveado por hash
+    IMAGE_CACHE_DIR = _abs(os.getenv("IMAGE_CACHE_DIR", "cache/imagens"), "cache/imagens")
+    # recibos em PDF já renderizados (service.reciboService), chaveados por pedido + hash das entradas
+    RECEIPT_CACHE_DIR = _abs(os.getenv("RECEIPT_CACHE_DIR", "cache/recibos"), "cache/recibos")
+    # processos do pool que re-encoda as imagens enviadas (utils.imagem.ingest_image)
+    IMAGE_INGEST_WORKERS = int(os.getenv("IMAGE_INGEST_WORKERS", "2"))
+    # cache das respostas do catálogo: vazio = LRU em memória; redis://... = compartilhado entre workers
+    CATALOG_CACHE_URL = os.getenv("CATALOG_CACHE_URL", "")
+    CATALOG_CACHE_TTL = int(os.getenv("CATALOG_CACHE_TTL", "60"))
+    CATALOG_CACHE_SIZE = int(os.getenv("CATALOG_CACHE_SIZE", "512"))
+    # por quanto tempo uma Idempotency-Key (POST /api/checkout) é lembrada
+    IDEMPOTENCY_TTL_HOURS = int(os.getenv("IDEMPOTENCY_TTL_HOURS", "24"))
+    # carrinhos: aberto sem mexer há N dias vira ABANDONADO; fechado há N dias é apagado (flask sweep-carrinhos)
+    CART_ABANDON_DAYS = int(os.getenv("CART_ABANDON_DAYS", "30"))
+    CART_RETENTION_DAYS = int(os.getenv("CART_RETENTION_DAYS", "90"))
     SEED_ON_STARTUP = os.getenv("SEED_ON_STARTUP", "false").lower() == "true"
     ADMIN_EMAIL = os.getenv("ADMIN_EMAIL", "admin@petgo.com")
     ADMIN_USER  = os.getenv("ADMIN_USER",  "admin")
@@ -11,10 +11,60 @@ def admin_required(f):
     return decorated_function
 
 
+def staff_required(f):
+    """Equipe da clínica: admin ou veterinário logado."""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not session.get("user_id"):
+            return jsonify({"error":"Você não esta logado para acessar essa pagina"}),400
+        if session.get("is_admin") is not True and not session.get("is_vet"):
+            return jsonify({"error":"Você não tem permissão para acessar essa página!"}), 403
+        return f(*args, **kwargs)
+    return decorated_function
+
+
 def login_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
         if not session.get("user_id") :
             return jsonify({"error":"Você não esta logado para acessar essa pagina"}),400 
         return f(*args, **kwargs)
-    return decorated_function
\ No newline at end of file
+    return decorated_function
+
+def idempotent(endpoint):
+    """
+    Honra o header Idempotency-Key (usar depois do login_required).
+    Sem o header a rota roda normalmente; com ele, a primeira resposta fica
+    gravada e as repetições recebem a mesma resposta sem executar de novo.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            from flask import current_app, make_response, request
+            from service import idempotenciaService as IS
+
+            chave = (request.headers.get("Idempotency-Key") or "").strip()
+            if not chave:
+                return f(*args, **kwargs)
+            if len(chave) > IS.MAX_KEY_LEN:
+                return jsonify({"error": f"Idempotency-Key com mais de {IS.MAX_KEY_LEN} caracteres."}), 400
+
+            uid = session["user_id"]
+            fp = IS.fingerprint(endpoint, request.get_data(cache=True))
+            pronto = IS.begin(uid, endpoint, chave, fp)
+            if pronto is not None:
+                status, body, replay = pronto
+                resp = current_app.response_class(body, status=status, mimetype="application/json")
+                if replay:
+                    resp.headers["Idempotent-Replayed"] = "true"
+                return resp
+
+            try:
+                resp = make_response(f(*args, **kwargs))
+            except Exception:
+                IS.finish(uid, endpoint, chave, None, None)
+                raise
+            IS.finish(uid, endpoint, chave, resp.status_code, resp.get_data(as_text=True))
+            return resp
+        return decorated_function
+    return decorator
@@ -2,7 +2,8 @@
 from flask import jsonify, request, session
 from werkzeug.exceptions import BadRequest, Unauthorized
 from app.enums.modos import modos
-from service.cartService import deleted_produto, add_or_set_item, get_cart
+from app.erros import ValidationError
+from service.cartService import apply_cart_ops, deleted_produto, add_or_set_item, get_cart, reprice_cart
 
 class cartController:
 
@@ -42,6 +43,27 @@ class cartController:
         # após adicionar, devolve o carrinho inteiro para atualizar badge
         return get_cart(uid)
     
+    @staticmethod
+    def cart_ops():
+        """
+        POST /carrinho/ops
+        body: { "ops": [ { "id_produto": 123, "modo": "INCLUIR"|"SETAR"|"REMOVER", "quantidade": 1 }, ... ] }
+        aplica tudo numa transação e devolve o carrinho atualizado
+        """
+        uid = cartController._get_uid()
+        data = request.get_json(silent=True)
+        ops = data.get("ops") if isinstance(data, dict) else data
+        try:
+            return jsonify(apply_cart_ops(uid, ops)), 200
+        except ValidationError as ve:
+            return jsonify({"error": str(ve), "field": ve.field}), 400
+
+    @staticmethod
+    def reprice():
+        """POST /carrinho/reprice: grava o preço atual nas linhas com preco_mudou e devolve o carrinho."""
+        uid = cartController._get_uid()
+        return jsonify(reprice_cart(uid)), 200
+
     def deleted_product_cart(id_cart_item: int):
         
         deleted_produto(id_cart_item)
@@ -1,9 +1,10 @@
-from flask import  request, jsonify, send_file, session, current_app
+from flask import  Response, request, jsonify, send_file, session, current_app, stream_with_context
 from sqlalchemy.exc import SQLAlchemyError
 
 from service.companieService import companieSerive
 from service.pedidoService import (
     admin_get_order_receipt,
+    bulk_update_order_status,
     create_order_from_cart,
     get_order_by_id,
     list_orders_admin,
@@ -11,6 +12,8 @@ from service.pedidoService import (
     get_order_for_user,
     update_order_status
 )
+from service import pedidoExportService, reciboBatchService
+from service.vendasService import sales_summary
 from app.erros import ValidationError
 
 def _require_user():
@@ -43,6 +46,9 @@ class pedidoController:
             }), 201
 
         except ValidationError as ve:
+            if ve.field == "precos_alterados":
+                # conflito com o carrinho: o cliente reprecifica e confirma antes de tentar de novo
+                return jsonify({"error": str(ve), "field": ve.field, "precos_alterados": ve.details}), 409
             return jsonify({"error": str(ve)}), 400
         except SQLAlchemyError:
             current_app.logger.exception("Erro de banco no checkout")
@@ -88,8 +94,8 @@ class pedidoController:
             order = update_order_status(order_id, new_status, uid, is_admin=_is_admin())
             return jsonify(order.to_dict()), 200
         except ValidationError as ve:
-            # regras de negócio / autorização
-            return jsonify({"error": str(ve)}), 400
+            # regras de negócio / autorização; transição recusada = conflito com o status atual
+            return jsonify({"error": str(ve), "field": ve.field}), 409 if ve.field == "transicao" else 400
         except SQLAlchemyError:
             current_app.logger.exception("Erro de banco ao atualizar status do pedido")
             return jsonify({"error": "Erro de banco de dados."}), 500
@@ -97,6 +103,25 @@ class pedidoController:
             current_app.logger.exception("Erro inesperado ao atualizar status do pedido")
             return jsonify({"error": "Erro inesperado."}), 500
         
+    def admin_bulk_order_status():
+        """PATCH /admin/orders/status {status, ids: [...]} ou {status, filter: {status, date_from, date_to, q}}."""
+        uid, err = _require_user()
+        if err: return err
+
+        data = request.get_json(silent=True) or {}
+        try:
+            res = bulk_update_order_status(
+                data.get("status"), uid,
+                ids=data.get("ids"),
+                filters=data.get("filter") if isinstance(data.get("filter"), dict) else None,
+            )
+            return jsonify(res), 200
+        except ValidationError as ve:
+            return jsonify({"error": str(ve), "field": ve.field}), 400
+        except SQLAlchemyError:
+            current_app.logger.exception("Erro de banco ao atualizar status em lote")
+            return jsonify({"error": "Erro de banco de dados."}), 500
+
     def admin_list_orders():
         status = request.args.get("status", "", type=str)
         date_from = request.args.get("date_from", "", type=str)
@@ -104,6 +129,8 @@ class pedidoController:
         q         = request.args.get("q", "", type=str)
         page      = request.args.get("page", 1, type=int)
         per_page  = request.args.get("per_page", 50, type=int)
+        cursor    = request.args.get("cursor", "", type=str)
+        with_total = request.args.get("with_total", "1", type=str) != "0"
 
         data = list_orders_admin(
             status=status,
@@ -111,7 +138,9 @@ class pedidoController:
             date_to=date_to,
             q=q,
             page=page,
-            per_page=per_page
+            per_page=per_page,
+            cursor=cursor,
+            with_total=with_total,
         )
 
         return jsonify(data), 200
@@ -124,10 +153,52 @@ class pedidoController:
         return jsonify(data), 200
     
     def admin_generate_recibo(order_id: int):
-        venda = get_order_by_id(order_id)
-        if not venda:
-            return jsonify({"error": "Pedido não encontrado"}), 404
-        result = admin_get_order_receipt(order_id)
-        return result
+        return admin_get_order_receipt(order_id)
+
+    def admin_sales_analytics():
+        try:
+            data = sales_summary(
+                date_from=request.args.get("date_from", "", type=str),
+                date_to=request.args.get("date_to", "", type=str),
+                group=request.args.get("group", "day", type=str),
+                status=request.args.get("status", "", type=str),
+                top=request.args.get("top", 10, type=int),
+            )
+            return jsonify(data), 200
+        except ValidationError as ve:
+            return jsonify({"error": str(ve), "field": ve.field}), 400
+
+    def admin_export_orders():
+        """GET /admin/orders/export?from=&to=&status=&format=csv|ndjson: pedidos + itens em streaming."""
+        args = request.args
+        try:
+            fmt = pedidoExportService.detect_format(args.get("format"))
+            stmt = pedidoExportService.build_export_query(
+                args.get("from") or args.get("date_from", ""),
+                args.get("to") or args.get("date_to", ""),
+                args.get("status", ""),
+            )
+        except ValidationError as ve:
+            return jsonify({"error": str(ve), "field": ve.field}), 400
+
+        nome = "_".join(p for p in ("pedidos", args.get("from"), args.get("to")) if p)
+        return Response(
+            stream_with_context(pedidoExportService.export_orders(fmt, stmt)),
+            mimetype=pedidoExportService.FORMATS[fmt],
+            headers={"Content-Disposition": f'attachment; filename="{nome}.{fmt}"'},
+        )
+
+    def admin_receipts_batch():
+        """POST /admin/orders/receipts:batch: ZIP com os recibos dos pedidos filtrados (filtros do histórico)."""
+        filtros = request.get_json(silent=True) or request.args.to_dict()
+        try:
+            batch = reciboBatchService.prepare_batch(filtros)
+        except ValidationError as ve:
+            return jsonify({"error": str(ve)}), 400
 
-        
\ No newline at end of file
+        nome = "_".join(p for p in ("recibos", filtros.get("date_from"), filtros.get("date_to")) if p)
+        return Response(
+            stream_with_context(reciboBatchService.stream_zip(batch)),
+            mimetype="application/zip",
+            headers={"Content-Disposition": f'attachment; filename="{nome}.zip"'},
+        )
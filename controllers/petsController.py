@@ -1,13 +1,18 @@
 from flask import jsonify, request, session
-from service.petsService import create_pet, update_pet, delete_pet, list_pets
+from service.petsService import ValidationError, create_pet, update_pet, delete_pet, list_pets, parse_include
 
 class PetsController:
 
     @staticmethod
     def get_pets():
+        """GET /pets[?include=vaccines,consultations]: resumo por padrão (photo_url, sem filhos)."""
         owner_id = session.get("user_id")
-        pets = list_pets(owner_id)
-        return jsonify([p.to_dict() for p in pets]), 200
+        try:
+            include = parse_include(request.args.get("include"))
+        except ValidationError as e:
+            return jsonify({"error": str(e), "field": e.field}), 400
+        pets = list_pets(owner_id, include)
+        return jsonify([p.to_dict(include=include) for p in pets]), 200
 
     @staticmethod
     def create():
@@ -1,34 +1,64 @@
-from flask import request, jsonify, send_file
-from werkzeug.exceptions import NotFound, BadRequest
-from io import BytesIO
+from flask import Response, current_app, request, jsonify, stream_with_context
+from werkzeug.exceptions import BadRequest
 from app.enums.categoriasEnum import Categorias
 from app.enums.especies import Especies
 
 # importa do teu service (o código que você mandou)
 from service.produtoService import (
     list_produtos,
+    list_facets,
     get_produto,
+    get_produto_imagem_ref,
+    set_produto_imagem,
     create_produto,
     update_produto,
     set_estoque,
+    ajustar_estoque,
     deleted_produto,
     ValidationError,
+    catalog_cache,
 )
+from service.imagemService import read_upload, serve_image
+from service import produtoBulkService
+
+
+def _parse_preco(args, nome: str):
+    valor = args.get(nome)
+    try:
+        return float(valor) if valor is not None else None
+    except ValueError:
+        raise BadRequest(f"{nome} inválido")
+
+def _cached_json(key, build):
+    """Resposta JSON servida do catalog_cache; build() monta o payload só em miss."""
+    body, hit = catalog_cache.get_or_set(key, lambda: jsonify(build()).get_data())
+    resp = current_app.response_class(body, mimetype="application/json")
+    resp.headers["X-Cache"] = "HIT" if hit else "MISS"
+    return resp
 
 class produtoController:
 
     def get_all():
         """
         GET /produtos?q=...&categoria=...&especie=...&preco_min=..&preco_max=..
-                 &sort=nome-asc|nome-desc|preco-asc|preco-desc
+                 &sort=nome-asc|nome-desc|preco-asc|preco-desc|relevance
                  &page=1&per_page=24
+                 &cursor=...  (opcional: paginação por cursor; usar next_cursor da resposta)
+                 &with_total=0 (opcional: não conta o total)
+                 &view=full   (opcional: 'imagem' como data URL, p/ tela de admin)
+
+        Por padrão 'imagem' vem como URL (+ imagem_width/imagem_height/imagem_hash),
+        sem ler o blob do banco. A resposta (exceto view=full) sai do catalog_cache.
         """
         args = request.args
+        with_image = args.get("view") == "full"
 
         categoria = args.get("categoria") or None
         especie   = args.get("especie") or None
         q         = args.get("q") or None
         sort      = args.get("sort") or None
+        cursor    = args.get("cursor") or None
+        with_total = args.get("with_total", "1") != "0"
 
         # paginação
         try:
@@ -42,45 +72,73 @@ class produtoController:
         per_page = max(1, min(per_page, 100))
 
         # faixa de preço
-        preco_min = args.get("preco_min")
-        preco_max = args.get("preco_max")
-        try:
-            preco_min = float(preco_min) if preco_min is not None else None
-        except ValueError:
-            raise BadRequest("preco_min inválido")
-        try:
-            preco_max = float(preco_max) if preco_max is not None else None
-        except ValueError:
-            raise BadRequest("preco_max inválido")
-
-        items, total = list_produtos(
-            categoria=categoria,
-            especie=especie,
-            q=q,
-            preco_min=preco_min,
-            preco_max=preco_max,
-            sort=sort,
-            page=page,
-            per_page=per_page,
-        )
+        preco_min = _parse_preco(args, "preco_min")
+        preco_max = _parse_preco(args, "preco_max")
+
+        def build():
+            items, total, next_cursor = list_produtos(
+                categoria=categoria,
+                especie=especie,
+                q=q,
+                preco_min=preco_min,
+                preco_max=preco_max,
+                sort=sort,
+                page=page,
+                per_page=per_page,
+                with_image=with_image,
+                cursor=cursor,
+                with_total=with_total,
+            )
 
-        return jsonify({
-            "items": [p.to_dict() for p in items],
-            "pagination": {
-                "page": page,
+            pagination = {
                 "per_page": per_page,
                 "total": total,
-                "has_next": page * per_page < total,
-                "has_prev": page > 1,
+                "has_next": next_cursor is not None,
+                "next_cursor": next_cursor,
             }
-        }), 200
+            if not cursor:
+                pagination.update({"page": page, "has_prev": page > 1})
+
+            return {
+                "items": [p.to_dict(with_image=with_image) for p in items],
+                "pagination": pagination,
+            }
+
+        if with_image:
+            # visão de admin com data URL: grande demais para valer a pena guardar
+            return jsonify(build()), 200
+
+        q_norm = q.strip().lower() if q else None
+        key = ("lista", categoria, especie, q_norm, preco_min, preco_max, sort,
+               None if cursor else page, per_page, cursor, with_total)
+        return _cached_json(key, build)
+
+    def get_facets():
+        """
+        GET /produtos/facets?q=...&categoria=...&especie=...&preco_min=..&preco_max=..
+        Contagens por categoria, espécie e faixa de preço para os mesmos filtros
+        da listagem (cada faceta ignora o próprio filtro).
+        """
+        args = request.args
+        facets = list_facets(
+            categoria=args.get("categoria") or None,
+            especie=args.get("especie") or None,
+            q=args.get("q") or None,
+            preco_min=_parse_preco(args, "preco_min"),
+            preco_max=_parse_preco(args, "preco_max"),
+        )
+        return jsonify(facets), 200
 
     def get_one(produto_id : int):
         """
-        GET /produtos/:id
+        GET /produtos/:id[?view=full]
+
+        Como na listagem, 'imagem' vem como URL e a resposta sai do catalog_cache;
+        view=full devolve a data URL e não é guardada.
         """
-        p = get_produto(produto_id)
-        return jsonify(p.to_dict()),200
+        if request.args.get("view") == "full":
+            return jsonify(get_produto(produto_id, with_image=True).to_dict(with_image=True)), 200
+        return _cached_json(("item", produto_id), lambda: get_produto(produto_id).to_dict(with_image=False))
     
     def create_one():
         """
@@ -127,26 +185,77 @@ class produtoController:
         p = set_estoque(produto_id, novo_estoque)
         return jsonify(p.to_dict())
     
-    def get_imagem(produto_id: int):
+    def update_stock_bulk():
         """
-        GET /produtos/:id/imagem
-        Retorna o blob como arquivo. Se você salvar o MIME no banco,
-        troque 'image/jpeg' pelo mimetype real.
+        PATCH /produtos/estoque (admin)
+        Body JSON: { "itens": [ {"id": 1, "estoque": 10},
+                                {"id": 2, "delta": -3, "esperado": 7} ] }
+        Tudo ou nada: 200 com os produtos atualizados, ou 409 com os conflitos
+        (não encontrado, ficaria negativo, estoque diferente do esperado).
         """
-        p = get_produto(produto_id)
-        blob = getattr(p, "imagem_bloob", None)
-        if not blob:
-            raise NotFound("Produto sem imagem.")
+        data = request.get_json(silent=True)
+        itens = data.get("itens") if isinstance(data, dict) else data
+        if itens is None:
+            raise BadRequest("JSON inválido ou ausente.")
 
-        # Ajuste o mimetype se você persistir o tipo real no model (ex.: p.imagem_mime)
-        return send_file(BytesIO(blob), mimetype="image/jpeg", download_name=f"produto_{produto_id}.jpg")
+        atualizados, conflitos = ajustar_estoque(itens)
+        if conflitos:
+            return jsonify({"error": "Conflito de estoque; nada foi alterado.", "conflitos": conflitos}), 409
+        return jsonify({"itens": atualizados}), 200
+
+    def get_imagem(produto_id: int):
+        """
+        GET /produtos/:id/imagem?size=thumb|card|full&v=<hash>
+        Serve a imagem (descompactada) a partir do cache em disco por hash;
+        sem 'size' devolve o original com o mimetype gravado.
+        """
+        p = get_produto_imagem_ref(produto_id)
+        return serve_image(p.imagem_hash, p.get_photo_bytes, p.imagem_mime)
     
+    def put_imagem(produto_id: int):
+        """
+        PUT /produtos/:id/imagem (admin)
+        multipart/form-data com o campo 'arquivo' (ou corpo cru image/*), até 10MB.
+        """
+        p = set_produto_imagem(produto_id, read_upload())
+        return jsonify(p.to_dict(with_image=False)), 200
+
     def deleted_product(produto_id: int):
         
         deleted_produto(produto_id)
 
         return jsonify({"sucesso": f"produto '{produto_id}' com sucesso"}),201
     
+    def import_bulk():
+        """
+        POST /produtos/import?format=csv|jsonl (admin)
+        Corpo: o arquivo cru ou multipart com o campo 'arquivo'. Colunas como no
+        POST /produtos (nome, descricao, preco, estoque, categoria, especie,
+        is_active, imagem em data URL). Responde com o relatório por linha.
+        """
+        arquivo = request.files.get("arquivo")
+        stream = arquivo.stream if arquivo else request.stream
+        fmt = produtoBulkService.detect_format(
+            request.args.get("format"),
+            arquivo.filename if arquivo else None,
+            arquivo.mimetype if arquivo else request.mimetype,
+        )
+        report = produtoBulkService.import_produtos(stream, fmt)
+        return jsonify(report), 200
+
+    def export_bulk():
+        """GET /produtos/export?format=csv|jsonl (admin): catálogo inteiro em streaming."""
+        fmt = produtoBulkService.detect_format(request.args.get("format") or "csv", None, None)
+        return Response(
+            stream_with_context(produtoBulkService.export_produtos(fmt)),
+            mimetype=produtoBulkService.FORMATS[fmt],
+            headers={"Content-Disposition": f'attachment; filename="produtos.{fmt}"'},
+        )
+
+    def get_cache_stats():
+        """GET /produtos/cache/stats (admin): contadores de hit/miss do catalog_cache."""
+        return jsonify(catalog_cache.stats()), 200
+
     def get_categorias():
         return [{"key":c.name , "value":c.value } for c in Categorias]
     
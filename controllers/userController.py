@@ -9,6 +9,7 @@ from service.Helpers import api_error
 from sqlalchemy import or_
 from flask_bcrypt import Bcrypt
 from service.userService import delete_user
+from service.petsService import ValidationError as PetValidationError, parse_include, pet_loader_options
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 
 bcrypt = Bcrypt()
@@ -118,13 +119,18 @@ class UsersController:
     def my_pets():
         uid, err = _require_login()
         if err: return err
-        pets = Pet.query.filter_by(dono=uid, adotado=True, deleted=0).order_by(Pet.id_pet.desc()).all()
+        try:
+            include = parse_include(request.args.get("include"))
+        except PetValidationError as e:
+            return jsonify({"error": str(e), "field": e.field}), 400
+        pets = (Pet.query.options(*pet_loader_options(include))
+                .filter_by(dono=uid, adotado=True, deleted=0).order_by(Pet.id_pet.desc()).all())
 
         def ser(p: Pet):
             # se houver to_dict e ele retornar algo válido, usamos
             if hasattr(p, "to_dict"):
                 try:
-                    d = p.to_dict(with_children=False)
+                    d = p.to_dict(with_children=False, include=include)
                 except Exception as e:
                     print('ERROR em to_dict para pet', p, e)
                     d = None
@@ -140,7 +146,7 @@ class UsersController:
                     "dob": getattr(p, "dob", None).isoformat() if getattr(p, "dob", None) else None,
                     "weight": getattr(p, "weight", None) or getattr(p, "peso", None),
                     "species": getattr(p, "species", None) or getattr(p, "especies", None) or '',
-                    "photo": getattr(p, "photo", None)
+                    "photo_url": getattr(p, "photo_url", None)
                 }
             except Exception as e:
                 print('ERROR serializando fallback para pet', p, e)
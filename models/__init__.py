@@ -5,13 +5,15 @@ from .vacinaModel import Vaccine
 from .consultasModel import Consultation
 from .produtoModel import produto
 from .cartModel import Cart,CartItem
-from .pedidoModel import Order,OrderItem
+from .pedidoModel import Order,OrderItem,OrderStatusHistory
 from .veterinarioModel import veterinarianModel
 from .enderecoModel import Address
 from .agendamentoModel import Scheduling
 from .adocaoformularioModel import AdoptionApplication
 from .prontuarioModel import ProntuarioModel
+from .idempotenciaModel import IdempotencyKey
+from .vendasModel import SalesDaily, SalesDailyProduto
 
 __all__ = [
-    "User", "Pet", "Vaccine", "Consultation", "produto", "Cart","CartItem","Order","OrderItem","veterinarianModel","Address","Scheduling","AdoptionApplication, ProntuarioModel"
+    "User", "Pet", "Vaccine", "Consultation", "produto", "Cart","CartItem","Order","OrderItem","OrderStatusHistory","veterinarianModel","Address","Scheduling","AdoptionApplication, ProntuarioModel", "IdempotencyKey", "SalesDaily", "SalesDailyProduto"
 ]
@@ -20,6 +20,13 @@ class Cart(db.Model):
                             cascade='all, delete-orphan', lazy='selectin')
 
 
+# carrinho aberto do usuário: uma sonda num índice parcial que só tem carrinhos ABERTO/ativos
+# (fechados e abandonados acumulam sem pesar na busca; MySQL ignora o WHERE e cria o índice inteiro)
+_ABERTO = (Cart.status == CartStatus.ABERTO.name) & (Cart.is_active == True)
+db.Index("ix_carts_aberto_usuario", Cart.id_usuario, Cart.id_cart,
+         sqlite_where=_ABERTO, postgresql_where=_ABERTO)
+
+
 class CartItem(db.Model):
     __tablename__ = 'cart_items'
 
@@ -54,3 +61,9 @@ class CartItem(db.Model):
             "subtotal_item": round(self.quantidade * self.preco_unitario, 2),
             "is_active": self.is_active,
         }
+
+
+# linhas vivas do carrinho (deleted = 0); as apagadas saem com `flask sweep-carrinhos`
+_VIVA = CartItem.deleted == 0
+db.Index("ix_cart_items_vivos", CartItem.id_cart, CartItem.id_produto,
+         sqlite_where=_VIVA, postgresql_where=_VIVA)
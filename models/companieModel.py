@@ -4,8 +4,10 @@ from datetime import datetime
 import gzip
 
 from sqlalchemy import DateTime
+from sqlalchemy.orm import deferred
 from config.db import db
 from models.mixins import TZ_RECIFE, TimestampMixin
+from utils.imagem import ImagemProcessada, process_image
 
 class companie(db.Model,TimestampMixin):
 
@@ -16,8 +18,9 @@ class companie(db.Model,TimestampMixin):
     cnpj = db.Column(db.String(30), nullable = True)
     endereco = db.Column(db.String(100), nullable= True)
     numero = db.Column(db.String(30), nullable= True)
-    imagem_bloob = db.Column(db.Text, nullable= True)
+    imagem_bloob = deferred(db.Column(db.Text, nullable= True))  # deferida: undefer só onde o logo é usado
     imagem_mime = db.Column(db.String(50), nullable= True)
+    imagem_hash = db.Column(db.String(64), nullable= True)
     deleted = db.Column(db.Integer, nullable=False, default=False)
 
 
@@ -26,25 +29,28 @@ class companie(db.Model,TimestampMixin):
         # assinatura do gzip: 1f 8b
         return isinstance(data, (bytes, bytearray)) and len(data) >= 2 and data[:2] == b'\x1f\x8b'
 
-    def set_photo_bytes(self, raw_bytes: bytes, mime: str | None = None, compresslevel: int = 6):
+    def set_photo_bytes(self, raw_bytes: bytes | None):
         """
-        Salva foto compactada com gzip em foto_bloob.
-        - raw_bytes: bytes originais do arquivo (jpg/png)
-        - mime: 'image/jpeg' | 'image/png' 
+        Processa e grava a foto (utils.imagem.process_image: formato real,
+        sem EXIF, dimensão limitada). None/vazio remove a foto.
         """
         if not raw_bytes:
             self.imagem_bloob = None
             self.imagem_mime = None
+            self.imagem_hash = None
             return
-        # sempre compacta; (nota: jpeg/png já são comprimidos, mas gzip ajuda mais)
-        self.imagem_bloob = gzip.compress(raw_bytes, compresslevel=compresslevel)
-        # guarda mime para montar o data URL corretamente
-        self.imagem_mime = (mime or self.imagem_mime or 'image/jpeg')[:50]
+        self.set_imagem(process_image(raw_bytes))
+
+    def set_imagem(self, img: ImagemProcessada):
+        """Grava o resultado do pipeline de imagem (blob sem gzip + mime/hash)."""
+        self.imagem_bloob = img.blob
+        self.imagem_mime = img.mime
+        self.imagem_hash = img.hash
         
     def get_photo_bytes(self) -> bytes | None:
             """
             Retorna bytes descompactados da foto (ou None).
-            Aguenta dados antigos não-gzip (backward compatibility).
+            Blobs antigos foram gravados com gzip; os novos são gravados como estão.
             """
             if not self.imagem_bloob:
                 return None
@@ -55,9 +61,16 @@ class companie(db.Model,TimestampMixin):
                 except Exception:
                     # se estiver corrompido, retorna como está
                     return data
-            # dados legados sem gzip
+            # gravado sem gzip (pipeline de imagem atual)
             return data
     @property
+    def logo_url(self) -> str | None:
+        """URL do logo (GET /api/companie/<id>/logo) versionada pelo hash."""
+        if not self.imagem_hash:
+            return None
+        return f"/api/companie/{self.id_companie}/logo?v={self.imagem_hash[:16]}"
+
+    @property
     def photo(self) -> str | None:
         """
         Data URL para o front (<img src="...">). Descompacta na hora.
@@ -77,5 +90,6 @@ class companie(db.Model,TimestampMixin):
             "cnpj": self.cnpj,
             "endereco": self.endereco,
             "numero": self.numero,
-            "logo": self.photo
+            "logo": self.photo,
+            "logo_url": self.logo_url,
         }
\ No newline at end of file
@@ -6,7 +6,7 @@ class Consultation(db.Model,TimestampMixin):
 
     id: int - PK
     pet_id: int - FK para o pet
-    date: str - Data da consulta (ISO string)
+    date: date - Data da consulta
     reason: str - Motivo da consulta
     notes: str - Notas adicionais
     pet: Pet - Relacionamento com o modelo Pet
@@ -18,7 +18,7 @@ class Consultation(db.Model,TimestampMixin):
     vet_id= db.Column(db.Integer, db.ForeignKey("veterinarians.id_veterinarian"), nullable=True, index=True)
     reason = db.Column(db.Text, nullable=False)
     notes  = db.Column(db.Text, nullable=True)
-    date   = db.Column(db.String(20), nullable=False)  # ISO string
+    date   = db.Column(db.Date, nullable=False)
     status = db.Column(db.String(1), nullable=True, default='P')  # P= Pendente, C=Concluída, F=Finalizada
     hour   = db.Column(db.String(10), nullable=True)
 
@@ -30,4 +30,5 @@ class Consultation(db.Model,TimestampMixin):
     )
 
     def to_dict(self):
-        return {"id": self.id_consulta, "date": self.date, "reason": self.reason, "notes": self.notes}
+        return {"id": self.id_consulta, "date": self.date.isoformat() if self.date else None,
+                "reason": self.reason, "notes": self.notes}
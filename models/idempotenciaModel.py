@@ -0,0 +1,30 @@
+from datetime import datetime
+from config.db import db
+
+
+class IdempotencyKey(db.Model):
+    """ Respostas guardadas por Idempotency-Key (ex.: POST /api/checkout)
+
+    user_id + chave: PK lógica (a mesma chave de usuários diferentes não colide)
+    endpoint: nome da operação protegida
+    fingerprint: sha256 do corpo da requisição original (mesma chave com corpo diferente = erro)
+    status: PENDENTE enquanto a primeira requisição roda; CONCLUIDO com a resposta gravada
+    expires_at: depois disso a linha é descartada (purge_expired)
+    """
+    __tablename__ = "idempotency_keys"
+
+    id          = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    user_id     = db.Column(db.Integer, nullable=False)
+    chave       = db.Column(db.String(100), nullable=False)
+    endpoint    = db.Column(db.String(50), nullable=False)
+    fingerprint = db.Column(db.String(64), nullable=False)
+    status      = db.Column(db.String(20), nullable=False, default="PENDENTE")
+    resp_status = db.Column(db.Integer, nullable=True)
+    resp_body   = db.Column(db.Text, nullable=True)
+    created_at  = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at  = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint("user_id", "endpoint", "chave", name="uq_idempotency_user_endpoint_chave"),
+        db.Index("ix_idempotency_expires", "expires_at"),
+    )
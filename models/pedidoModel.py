@@ -12,6 +12,10 @@ class Order(db.Model):
 
     items = db.relationship("OrderItem", back_populates="order", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        db.Index("ix_orders_created_id", "created_at", "id_pedido"),  # cursor do histórico admin
+    )
+
     def to_dict(self):
         return {
             "id": self.id_pedido,
@@ -33,7 +37,7 @@ class OrderItem(db.Model):
     preco_unit    = db.Column(db.Float, nullable=False, default=0.0)
 
     order   = db.relationship("Order", back_populates="items")
-    produto = db.relationship("produto", lazy="joined")
+    produto = db.relationship("produto")  # carregado só onde é usado (joinedload em get_order_by_id)
 
     def to_dict(self):
         return {
@@ -43,3 +47,28 @@ class OrderItem(db.Model):
             "qtd": self.qtd,
             "preco_unit": self.preco_unit,
         }
+
+class OrderStatusHistory(db.Model):
+    """ Histórico de mudanças de status (uma linha por transição, individual ou em lote) """
+    __tablename__ = "order_status_history"
+
+    id_hist    = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    order_id   = db.Column(db.Integer, db.ForeignKey("orders.id_pedido"), nullable=False)
+    status_de  = db.Column(db.String(30), nullable=True)
+    status_para= db.Column(db.String(30), nullable=False)
+    user_id    = db.Column(db.Integer, db.ForeignKey("users.id_user"), nullable=True)  # quem alterou
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.Index("ix_order_status_history_order", "order_id", "id_hist"),
+    )
+
+    def to_dict(self):
+        return {
+            "id": self.id_hist,
+            "order_id": self.order_id,
+            "status_de": self.status_de,
+            "status_para": self.status_para,
+            "user_id": self.user_id,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+        }
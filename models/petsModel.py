@@ -1,7 +1,9 @@
 from datetime import date, datetime
 import gzip
+from sqlalchemy.orm import deferred
 from config.db import db
 import base64
+from utils.imagem import ImagemProcessada, process_image
 
 class Pet(db.Model): 
     __tablename__ = 'pets'
@@ -16,8 +18,9 @@ class Pet(db.Model):
     dob = db.Column(db.Date, nullable=False)
     descricao = db.Column(db.Text, nullable=True) 
     adotado = db.Column(db.Boolean, default=True)
-    foto_bloob = db.Column(db.LargeBinary, nullable=True)  # <-- FOTO REAL
+    foto_bloob = deferred(db.Column(db.LargeBinary, nullable=True))  # <-- FOTO REAL (deferida: undefer só onde serve a imagem)
     foto_mime = db.Column(db.String(50), nullable=True)  # ex: 'image/jpeg', 'image/png'
+    foto_hash = db.Column(db.String(64), nullable=True)  # sha256 dos bytes originais (ETag / ?v=)
     adocao = db.Column(db.Boolean, default=False)
     dono = db.Column(db.Integer, db.ForeignKey('users.id_user'), nullable=True)
     created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
@@ -44,25 +47,28 @@ class Pet(db.Model):
         # assinatura do gzip: 1f 8b
         return isinstance(data, (bytes, bytearray)) and len(data) >= 2 and data[:2] == b'\x1f\x8b'
 
-    def set_photo_bytes(self, raw_bytes: bytes, mime: str | None = None, compresslevel: int = 6):
+    def set_photo_bytes(self, raw_bytes: bytes | None):
         """
-        Salva foto compactada com gzip em foto_bloob.
-        - raw_bytes: bytes originais do arquivo (jpg/png)
-        - mime: 'image/jpeg' | 'image/png' 
+        Processa e grava a foto (utils.imagem.process_image: formato real,
+        sem EXIF, dimensão limitada). None/vazio remove a foto.
         """
         if not raw_bytes:
             self.foto_bloob = None
             self.foto_mime = None
+            self.foto_hash = None
             return
-        # sempre compacta; (nota: jpeg/png já são comprimidos, mas gzip ajuda mais)
-        self.foto_bloob = gzip.compress(raw_bytes, compresslevel=compresslevel)
-        # guarda mime para montar o data URL corretamente
-        self.foto_mime = (mime or self.foto_mime or 'image/jpeg')[:50]
+        self.set_imagem(process_image(raw_bytes))
+
+    def set_imagem(self, img: ImagemProcessada):
+        """Grava o resultado do pipeline de imagem (blob sem gzip + mime/hash)."""
+        self.foto_bloob = img.blob
+        self.foto_mime = img.mime
+        self.foto_hash = img.hash
 
     def get_photo_bytes(self) -> bytes | None:
         """
         Retorna bytes descompactados da foto (ou None).
-        Aguenta dados antigos não-gzip (backward compatibility).
+        Blobs antigos foram gravados com gzip; os novos são gravados como estão.
         """
         if not self.foto_bloob:
             return None
@@ -73,7 +79,7 @@ class Pet(db.Model):
             except Exception:
                 # se estiver corrompido, retorna como está
                 return data
-        # dados legados sem gzip
+        # gravado sem gzip (pipeline de imagem atual)
         return data
     
     # Aliases para o front
@@ -96,6 +102,12 @@ class Pet(db.Model):
         b64 = base64.b64encode(raw).decode('utf-8')
         return f"data:{mime};base64,{b64}"
     @property
+    def photo_url(self) -> str | None:
+        """URL da foto (GET /api/pets/<id>/photo) versionada pelo hash; não lê o blob."""
+        if not self.foto_hash:
+            return None
+        return f"/api/pets/{self.id_pet}/photo?v={self.foto_hash[:16]}"
+    @property
     def idade_str(self) -> str:
         if not self.dob:
             return "Idade desconhecida"
@@ -106,7 +118,11 @@ class Pet(db.Model):
             meses -= 1
         return f"{anos} ano(s) e {meses % 12} mes(es)" if anos > 0 else f"{meses} mes(es)"
     
-    def to_dict(self, with_children: bool = True):
+    def to_dict(self, with_children: bool = True, with_photo: bool = False, include=None):
+        """
+        with_photo=True traz 'photo' em data URL (lê o blob); senão 'photo' é a própria photo_url.
+        include: filhos a serializar ('vaccines', 'consultations'); None = todos se with_children.
+        """
         data = {
             "id": self.id_pet,
             "name": self.nome,
@@ -115,7 +131,8 @@ class Pet(db.Model):
             "dob": self.dob.isoformat() if self.dob else None,  # ✅ data crua pro front
             "weight": self.peso,
             "species": self.species,
-            "photo": self.photo,
+            "photo": self.photo if with_photo else self.photo_url,
+            "photo_url": self.photo_url,
             "descricao": self.descricao,
             "adotado": self.adotado,
             "adocao": self.adocao,
@@ -125,16 +142,18 @@ class Pet(db.Model):
             "deleted": self.deleted,
         }
 
-        if with_children:
-            # inclui apenas children com deleted == 0
+        if include is None:
+            include = ("vaccines", "consultations") if with_children else ()
+        # inclui apenas children com deleted == 0
+        if "vaccines" in include:
             vaccines = getattr(self, "vaccines", []) or []
             data["vaccines"] = [v.to_dict() for v in vaccines if getattr(v, "deleted", 0) == 0]
-
+        if "consultations" in include:
             consultations = getattr(self, "consultations", []) or []
             data["consultations"] = [c.to_dict() for c in consultations if getattr(c, "deleted", 0) == 0]
-
+        if with_children and include:
             data["uploads"] = []
-            return data
+        return data
 
     def __repr__(self):
         return f"<Pet id={self.id_pet} nome={self.nome!r}>"
@@ -1,7 +1,9 @@
 import base64
 from datetime import datetime
 import gzip
+from sqlalchemy.orm import deferred
 from config.db import db
+from utils.imagem import ImagemProcessada, image_meta, process_image
 class produto(db.Model):
     """ Modelo para tabela de produtos
     
@@ -11,7 +13,9 @@ class produto(db.Model):
     preco: float - Preço do produto
     estoque: int - Quantidade em estoque
     categoria: str - Categoria do produto
-    imagem_bloob: bytes - Imagem do produto em formato binário
+    imagem_bloob: bytes - Imagem do produto em formato binário (deferida: só é lida quando acessada ou com undefer)
+    imagem_hash: str - sha256 dos bytes originais da imagem (versão da URL)
+    imagem_width/imagem_height: int - Dimensões da imagem original
     is_active: bool - Indica se o produto está ativo
     created_at: datetime - Timestamp de criação do registro
     updated_at: datetime - Timestamp da última atualização do registro
@@ -26,37 +30,57 @@ class produto(db.Model):
     estoque = db.Column(db.Integer, nullable=False)
     categoria = db.Column(db.String(100), nullable=True)
     especie = db.Column(db.String(20), nullable=False)
-    imagem_bloob = db.Column(db.LargeBinary, nullable=True)
+    imagem_bloob = deferred(db.Column(db.LargeBinary, nullable=True))
     imagem_mime = db.Column(db.String(20), nullable = True)
+    imagem_hash = db.Column(db.String(64), nullable = True)
+    imagem_width = db.Column(db.Integer, nullable = True)
+    imagem_height = db.Column(db.Integer, nullable = True)
     is_active = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     deleted = db.Column(db.Integer, nullable = False, default = False)
 
+    # Índices para paginação por cursor (filtro fixo is_active/deleted + colunas do sort + id)
+    __table_args__ = (
+        db.Index("ix_produtos_vitrine_id", "is_active", "deleted", "id_produto"),
+        db.Index("ix_produtos_vitrine_nome", "is_active", "deleted", "nome", "id_produto"),
+        db.Index("ix_produtos_vitrine_preco", "is_active", "deleted", "preco", "id_produto"),
+    )
+
     @staticmethod
     def _is_gzip(data: bytes) -> bool:
         # assinatura do gzip: 1f 8b
         return isinstance(data, (bytes, bytearray)) and len(data) >= 2 and data[:2] == b'\x1f\x8b'
 
-    def set_photo_bytes(self, raw_bytes: bytes, mime: str | None = None, compresslevel: int = 6):
+    def set_photo_bytes(self, raw_bytes: bytes | None):
         """
-        Salva foto compactada com gzip em foto_bloob.
-        - raw_bytes: bytes originais do arquivo (jpg/png)
-        - mime: 'image/jpeg' | 'image/png' 
+        Processa e grava a imagem (utils.imagem.process_image: formato real,
+        sem EXIF, dimensão limitada). None/vazio remove a imagem.
         """
         if not raw_bytes:
             self.imagem_bloob = None
             self.imagem_mime = None
+            self.set_image_meta(None)
             return
-        # sempre compacta; (nota: jpeg/png já são comprimidos, mas gzip ajuda mais)
-        self.imagem_bloob = gzip.compress(raw_bytes, compresslevel=compresslevel)
-        # guarda mime para montar o data URL corretamente
-        self.imagem_mime = (mime or self.imagem_mime or 'image/jpeg')[:50]
+        self.set_imagem(process_image(raw_bytes))
+
+    def set_imagem(self, img: ImagemProcessada):
+        """Grava o resultado do pipeline de imagem (blob sem gzip + mime/hash/dimensões)."""
+        self.imagem_bloob = img.blob
+        self.imagem_mime = img.mime
+        self.imagem_hash, self.imagem_width, self.imagem_height = img.hash, img.width, img.height
+
+    def set_image_meta(self, raw_bytes: bytes | None):
+        """Atualiza hash/largura/altura a partir dos bytes originais (None limpa)."""
+        if not raw_bytes:
+            self.imagem_hash = self.imagem_width = self.imagem_height = None
+            return
+        self.imagem_hash, self.imagem_width, self.imagem_height = image_meta(raw_bytes)
 
     def get_photo_bytes(self) -> bytes | None:
         """
         Retorna bytes descompactados da foto (ou None).
-        Aguenta dados antigos não-gzip (backward compatibility).
+        Blobs antigos foram gravados com gzip; os novos são gravados como estão.
         """
         if not self.imagem_bloob:
             return None
@@ -67,7 +91,7 @@ class produto(db.Model):
             except Exception:
                 # se estiver corrompido, retorna como está
                 return data
-        # dados legados sem gzip
+        # gravado sem gzip (pipeline de imagem atual)
         return data
     @property
     def photo(self) -> str | None:
@@ -82,7 +106,26 @@ class produto(db.Model):
         b64 = base64.b64encode(raw).decode('utf-8')
         return f"data:{mime};base64,{b64}"
     
-    def to_dict(self):
+    @staticmethod
+    def build_imagem_url(id_produto: int, imagem_hash: str | None) -> str | None:
+        if not imagem_hash:
+            return None
+        return f"/api/produtos/{id_produto}/imagem?v={imagem_hash[:16]}"
+
+    @property
+    def imagem_url(self) -> str | None:
+        """
+        URL da imagem servida por GET /api/produtos/<id>/imagem.
+        Usa o hash como versão (?v=) para o navegador revalidar quando a imagem mudar.
+        Não toca em imagem_bloob: pode ser usada com a coluna deferida.
+        """
+        return self.build_imagem_url(self.id_produto, self.imagem_hash)
+
+    def to_dict(self, with_image: bool = True):
+        """
+        with_image=True  -> 'imagem' como data URL (descompacta o blob; tela de admin/detalhe)
+        with_image=False -> 'imagem' como URL + largura/altura/hash (listagens; não lê o blob)
+        """
         data = {
             "id": self.id_produto,
             "nome": self.nome,
@@ -91,6 +134,10 @@ class produto(db.Model):
             "categoria": self.categoria,
             "especie": self.especie,
             "estoque": self.estoque,
-            "imagem": self.photo
+            "imagem_url": self.imagem_url,
+            "imagem_width": self.imagem_width,
+            "imagem_height": self.imagem_height,
+            "imagem_hash": self.imagem_hash,
         }
+        data["imagem"] = self.photo if with_image else self.imagem_url
         return data
\ No newline at end of file
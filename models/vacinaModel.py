@@ -6,8 +6,8 @@ class Vaccine(db.Model,TimestampMixin):
     id: int - PK
     pet_id: int - FK para o pet
     name: str - Nome da vacina
-    date: str - Data da aplicação (ISO string)
-    next: str - Data da próxima aplicação (ISO string)
+    date: date - Data da aplicação
+    next: date - Data da próxima aplicação (índice ix_vaccines_next: vacinas a vencer)
     notes: str - Notas adicionais
     pet: Pet - Relacionamento com o modelo Pet
 
@@ -18,11 +18,19 @@ class Vaccine(db.Model,TimestampMixin):
     pet_id = db.Column(db.Integer, db.ForeignKey("pets.id_pet"), nullable=False)
 
     name   = db.Column(db.String(120), nullable=False)
-    date   = db.Column(db.String(20), nullable=False)  # ISO string
-    next   = db.Column(db.String(20))                  # ISO string
+    date   = db.Column(db.Date, nullable=False)
+    next   = db.Column(db.Date)
     notes  = db.Column(db.Text)
 
     pet = db.relationship("Pet", back_populates="vaccines")
 
+    __table_args__ = (
+        # (next, id) = ordem do keyset de /api/vaccines/due
+        db.Index("ix_vaccines_next", "next", "id_vacina"),
+    )
+
     def to_dict(self):
-        return {"id": self.id_vacina, "name": self.name, "date": self.date, "next": self.next, "notes": self.notes}
+        return {"id": self.id_vacina, "name": self.name,
+                "date": self.date.isoformat() if self.date else None,
+                "next": self.next.isoformat() if self.next else None,
+                "notes": self.notes}
@@ -0,0 +1,32 @@
+from config.db import db
+
+
+class SalesDaily(db.Model):
+    """ Rollup diário de vendas por status (mantido pelo pedidoService na mesma transação do pedido)
+
+    dia: data (UTC) de criação do pedido
+    status: status do pedido como gravado em orders.status
+    pedidos / receita: quantidade e soma de orders.total
+    """
+    __tablename__ = "sales_daily"
+
+    dia     = db.Column(db.Date, primary_key=True)
+    status  = db.Column(db.String(30), primary_key=True)
+    pedidos = db.Column(db.Integer, nullable=False, default=0)
+    receita = db.Column(db.Float, nullable=False, default=0.0)
+
+
+class SalesDailyProduto(db.Model):
+    """ Rollup diário por produto (base do top de produtos)
+
+    produto_id: 0 para itens sem produto (order_items.produto_id nulo)
+    produto_nome: último nome vendido (snapshot do order_item)
+    """
+    __tablename__ = "sales_daily_produtos"
+
+    dia          = db.Column(db.Date, primary_key=True)
+    status       = db.Column(db.String(30), primary_key=True)
+    produto_id   = db.Column(db.Integer, primary_key=True)
+    produto_nome = db.Column(db.String(120), nullable=False)
+    qtd          = db.Column(db.Integer, nullable=False, default=0)
+    receita      = db.Column(db.Float, nullable=False, default=0.0)
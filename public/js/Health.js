@@ -43,7 +43,8 @@ const API = {
     }
   },
   async listPets(){
-    const r = await fetch('/api/pets', { credentials: 'include' });
+    // a tela de saúde usa vacinas e consultas; a lista pura (/api/pets) vem sem filhos
+    const r = await fetch('/api/pets?include=vaccines,consultations', { credentials: 'include' });
     if(!r.ok) throw new Error('Falha ao listar pets');
     return r.json();
   },
@@ -72,6 +73,14 @@ const API = {
     if(!r.ok) throw new Error('Falha ao atualizar pet');
     return r.json();
   },
+  async uploadPetPhoto(id, file){
+    // multipart (campo 'arquivo'): o arquivo vai como está, sem virar base64
+    const fd = new FormData();
+    fd.append('arquivo', file);
+    const r = await fetch(`/api/pets/${id}/photo`, { method: 'PUT', credentials: 'include', body: fd });
+    if(!r.ok) throw new Error('Falha ao enviar foto do pet');
+    return r.json();
+  },
   async deletePet(id){
     const r = await fetch(`/api/pets/${id}`, { method: 'DELETE', credentials: 'include' });
     if(!r.ok) throw new Error('Falha ao excluir pet');
@@ -152,7 +161,7 @@ function renderPetsList(){
   const list = must$('#petsList'); if(!list) return;
   list.innerHTML = '';
   state.pets.forEach(p => {
-    const petPhoto = p.photo || 'https://placehold.co/200x200?text=pet';
+    const petPhoto = p.photo_url ? `${p.photo_url}&size=thumb` : (p.photo || 'https://placehold.co/200x200?text=pet');
     const el = document.createElement('div');
     const pid = normalizeId(p.id);
     el.className = 'pet-item' + (pid === state.selectedPetId ? ' active' : '');
@@ -194,7 +203,7 @@ function renderSelected(){
     return;
   }
 
-  const petPhoto = pet.photo || 'https://placehold.co/200x200?text=pet';
+  const petPhoto = pet.photo_url ? `${pet.photo_url}&size=card` : (pet.photo || 'https://placehold.co/200x200?text=pet');
 
   empty.style.display = 'none';
   detail.style.display = 'block';
@@ -509,20 +518,22 @@ function wireEvents(){
     }
     const file    = must$('#petPhoto')?.files?.[0];
 
-    let photo = null;
-    if(file) photo = await readFileAsDataURL(file);
-
-    const payload = { name, species, sexo, breed, dob, weight, photo };
+    const payload = { name, species, sexo, breed, dob, weight };
+    const withPhoto = async (pet) => {
+      if(!file) return pet;
+      const { photo_url } = await API.uploadPetPhoto(pet.id, file);
+      return { ...pet, photo_url, photo: photo_url };
+    };
     try{
       if(!editId){
-        const created = await API.createPet(payload);
+        const created = await withPhoto(await API.createPet(payload));
         created.vaccines ??= [];
         created.consultations ??= [];
         created.uploads ??= [];
         state.pets.push(created);
         state.selectedPetId = normalizeId(created.id);
       }else{
-        const updated = await API.updatePet(editId, payload);
+        const updated = await withPhoto(await API.updatePet(editId, payload));
         const idx = state.pets.findIndex(p=>normalizeId(p.id)===normalizeId(editId));
         if(idx>=0){
           updated.vaccines = updated.vaccines ?? state.pets[idx].vaccines ?? [];
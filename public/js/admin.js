@@ -289,6 +289,7 @@ function wireVetAccordion() {
 
 /* ========================== PRODUTOS ========================== */
 // Endpoints dos controllers que criamos:
+// GET    /api/produtos?view=full         -> lista com 'imagem' em data URL (padrão: URL da imagem)
 // POST   /api/produtos                   -> cria produto (aceita imagem data URL)
 // PATCH  /api/produtos/:id/estoque       -> { estoque }
 // PATCH  /api/produtos/:id/ativo         -> { is_active }
@@ -33,18 +33,20 @@ async function fetchJSON(url, opts={}) {
 /* API */
 async function getCart() { return fetchJSON(`${API_BASE}/carrinho`); }
 async function getProduto(id) { return fetchJSON(`${API_BASE}/produtos/${id}`); }
+// mutações via /carrinho/ops: uma ida e volta, já devolve o carrinho atualizado
+async function cartOps(ops) {
+  return fetchJSON(`${API_BASE}/carrinho/ops`, { method:'POST', body: JSON.stringify({ ops }) });
+}
 async function setQtdSetar(id_produto, quantidade) {
-  const body = JSON.stringify({ id_produto: Number(id_produto), quantidade: Number(quantidade), modo: 'SETAR' });
-  return fetchJSON(`${API_BASE}/carrinho/items`, { method:'POST', body });
+  return cartOps([{ id_produto: Number(id_produto), quantidade: Number(quantidade), modo: 'SETAR' }]);
 }
 async function incluirUm(id_produto) {
-  const body = JSON.stringify({ id_produto: Number(id_produto), quantidade: 1, modo: 'INCLUIR' });
-  return fetchJSON(`${API_BASE}/carrinho/items`, { method:'POST', body });
+  return cartOps([{ id_produto: Number(id_produto), quantidade: 1, modo: 'INCLUIR' }]);
 }
 async function removerUm(id_produto) {
-  const body = JSON.stringify({ id_produto: Number(id_produto), quantidade: 1, modo: 'REMOVER' });
-  return fetchJSON(`${API_BASE}/carrinho/items`, { method:'POST', body });
+  return cartOps([{ id_produto: Number(id_produto), quantidade: 1, modo: 'REMOVER' }]);
 }
+async function repriceCart() { return fetchJSON(`${API_BASE}/carrinho/reprice`, { method:'POST' }); }
 async function removeItem(id_cart_item) { return fetchJSON(`${API_BASE}/carrinho/items/${id_cart_item}`, { method: 'DELETE' }); }
 
 /* Verificação de estoque */
@@ -113,29 +115,27 @@ function renderSummary({ subtotal }) {
     btn.disabled = true;
 
     try {
-      // Pega o carrinho atual com quantidades
+      // o carrinho já vem validado contra o produto atual (preço, estoque, ativo)
       const cart = await getCart();
+      const v = cart.validacao || {};
       const items = cart.items || [];
-
-      // Busca todos os produtos em paralelo
-      const proms = items.map(it => getProduto(it.id_produto).catch(() => ({})));
-      const prods = await Promise.all(proms);
-
-      // verifica cada item
-      for (let i = 0; i < items.length; i++) {
-        const it = items[i];
-        const p = prods[i] || {};
-        const estoque = Number(p.estoque ?? 0);
-        const desejado = Number(it.quantidade ?? 0);
-        // se estoque insuficiente
-        if (desejado > estoque) {
-          const nome = p.nome || `Produto #${it.id_produto}`;
-          showToast(`Estoque insuficiente: ${nome}`, 'warning');
-          // opcional: rolar até o item no carrinho, se existir
-          const card = qs(`#cart-list [data-prod-id="${it.id_produto}"]`);
-          if (card) card.scrollIntoView({ behavior: 'smooth', block: 'center' });
-          return;
-        }
+      const nomeDe = (pid) => {
+        const it = items.find(i => i.id_produto === pid);
+        return (it && it.product && it.product.nome) || `Produto #${pid}`;
+      };
+      const problema = (v.indisponiveis || [])[0] ?? (v.sem_estoque || [])[0];
+      if (problema !== undefined) {
+        const msg = (v.indisponiveis || []).includes(problema) ? 'Produto indisponível' : 'Estoque insuficiente';
+        showToast(`${msg}: ${nomeDe(problema)}`, 'warning');
+        await renderCart(cart);
+        const card = qs(`#cart-list [data-prod-id="${problema}"]`);
+        if (card) card.scrollIntoView({ behavior: 'smooth', block: 'center' });
+        return;
+      }
+      if ((v.precos_alterados || []).length) {
+        await renderCart(await repriceCart());
+        showToast('Alguns preços mudaram. Confira o carrinho antes de continuar.', 'warning');
+        return;
       }
 
       // tudo ok -> vai pro checkout
@@ -158,6 +158,10 @@ function itemCardHTML(item) {
   const unit = item.preco_unitario ?? p.preco ?? 0;
   const qtd = item.quantidade ?? 1;
   const subtotal = unit * qtd;
+  const aviso = item.disponivel === false ? 'Produto indisponível'
+              : item.estoque_ok === false ? `Estoque insuficiente (${p.estoque ?? 0} disponível)`
+              : item.preco_mudou ? `Preço atual: ${fmtBRL(item.preco_atual)} / un.`
+              : '';
 
   return `
   <article class="cart-item-card" data-cart-item-id="${esc(item.id_cart_item)}" data-prod-id="${esc(item.id_produto)}">
@@ -165,6 +169,7 @@ function itemCardHTML(item) {
     <div class="item-details">
       <h4 title="${esc(nome)}">${esc(nome)}</h4>
       <p class="subtitle">${fmtBRL(unit)} / un.</p>
+      ${aviso ? `<p class="subtitle" data-aviso style="color:#b45309;">${esc(aviso)}</p>` : ''}
       <div class="item-actions">
         <div class="quantity-control">
           <button class="btn-qty" data-dec aria-label="Diminuir">-</button>
@@ -179,12 +184,12 @@ function itemCardHTML(item) {
   `;
 }
 
-async function renderCart() {
+async function renderCart(cart = null) {
   const container = ensureListContainer();
   if (!container) return;
 
   try {
-    const data = await getCart();
+    const data = cart || await getCart();
     const items = data.items || [];
 
     if (!items.length) {
@@ -199,8 +204,8 @@ async function renderCart() {
       return;
     }
 
-    const prods = await Promise.all(items.map(it => getProduto(it.id_produto).catch(()=>({}))));
-    const rich = items.map((it, i) => ({ ...it, product: prods[i] || {} }));
+    // o carrinho já vem com nome/preço/estoque/imagem de cada produto
+    const rich = items.map(it => ({ ...it, product: it.product || {} }));
     container.innerHTML = rich.map(itemCardHTML).join('');
     renderSummary({ subtotal: data.subtotal || 0 });
     const count = rich.reduce((acc, it) => acc + (it.quantidade||0), 0);
@@ -247,8 +252,7 @@ function bindCartEvents() {
           showToast('Estoque insuficiente', 'warning');
           return;
         }
-        await incluirUm(prodId);
-        await renderCart();
+        await renderCart(await incluirUm(prodId));
         window.dispatchEvent(new CustomEvent('cart:updated'));
       } catch (err) {
         showToast('Erro de banco de dados.', 'error');
@@ -265,13 +269,10 @@ function bindCartEvents() {
       try {
         const input = card.querySelector('.qty-input');
         const currentQty = parseInt(input.value, 10) || 1;
-        if (currentQty <= 1) {
-          await removeItem(cartItemId);
-          showToast('Item removido', 'success');
-        } else {
-          await removerUm(prodId);
-        }
-        await renderCart();
+        // REMOVER apaga a linha quando a quantidade chega a zero
+        const cart = await removerUm(prodId);
+        if (currentQty <= 1) showToast('Item removido', 'success');
+        await renderCart(cart);
         window.dispatchEvent(new CustomEvent('cart:updated'));
       } catch (err) {
         showToast('Erro de banco de dados.', 'error');
@@ -326,9 +327,9 @@ function bindCartEvents() {
         return;
       }
 
-      await setQtdSetar(prodId, next);
+      const cart = await setQtdSetar(prodId, next);
       showToast('Quantidade atualizada', 'success');
-      await renderCart();
+      await renderCart(cart);
       window.dispatchEvent(new CustomEvent('cart:updated'));
     } catch (err) {
       showToast('Erro de banco de dados.', 'error');
@@ -28,7 +28,12 @@ async function fetchJSON(url, opts={}) {
   const res = await fetch(url, { headers: { 'Content-Type':'application/json' }, credentials:'include', ...opts });
   let data=null;
   try { data = await res.json(); } catch (err) { console.debug('[fetchJSON] no-json-response', err); }
-  if (!res.ok) throw new Error((data && (data.message||data.error)) || `HTTP ${res.status}`);
+  if (!res.ok) {
+    const err = new Error((data && (data.message||data.error)) || `HTTP ${res.status}`);
+    err.status = res.status;
+    err.data = data;
+    throw err;
+  }
   return data;
 }
 
@@ -421,6 +426,13 @@ function bindSubmit(totalRef) {
         res = await postCheckout(payload);
         console.debug('[bindSubmit] resposta do backend', res);
       } catch (err) {
+        if (err.status === 409 && err.data?.field === 'precos_alterados') {
+          // preço mudou desde o carrinho: volta para o carrinho revisar/atualizar os valores
+          showToast(err.message, 'error');
+          if (btn) { btn.textContent = old || 'Finalizar Pedido'; btn.disabled = false; }
+          setTimeout(() => { window.location.href = '/carrinho'; }, 1500);
+          return;
+        }
         // erro de rede/resposta - gerar arquivo para download para permitir 'baixa' no sistema
         console.error('[bindSubmit] erro no postCheckout', err);
         showToast('Falha ao enviar para /api/checkout. Gerando arquivo JSON para baixar.', 'error');
@@ -111,24 +111,33 @@ async function fetchOrders() {
   throw lastErr || new Error('Falha ao buscar pedidos.');
 }
 
-/* ========= render KPIs ========= */
-function renderKPIs(orders) {
+/* ========= render KPIs (agregados no servidor: /api/admin/analytics/sales) ========= */
+const API_SALES = '/api/admin/analytics/sales';
+
+async function fetchKPIs() {
+  const p = new URLSearchParams();
+  if (STATE.status) p.set('status', STATE.status);
+  if (STATE.from)   p.set('date_from', STATE.from);
+  if (STATE.to)     p.set('date_to', STATE.to);
+  // sem período: faturamento de todo o histórico (desde 2000) + vendas dos últimos 30 dias
+  if (!STATE.from) p.set('date_from', '2000-01-01');
+  const [periodo, ult30] = await Promise.all([
+    fetchJSON(`${API_SALES}?${p}&group=month&top=1`),
+    fetchJSON(`${API_SALES}?${STATE.status ? `status=${encodeURIComponent(STATE.status)}&` : ''}top=1`),
+  ]);
+  return { periodo: periodo.totais, ult30: ult30.totais };
+}
+
+function renderKPIs(kpis) {
   const kpiCards = qsa('.kpi-card');
   if (!kpiCards.length) return;
 
-  const now = Date.now();
-  const d30 = 30 * 24 * 3600 * 1000;
+  const periodo = kpis?.periodo || {};
+  const ult30 = kpis?.ult30 || {};
 
-  const faturamento = orders.reduce((acc, o) => acc + Number(o.total || 0), 0);
-  const ult30 = orders.filter(o => {
-    const t = new Date(o.created_at || o.createdAt || o.data || Date.now()).getTime();
-    return (now - t) <= d30;
-  }).length;
-  const ticket = orders.length ? (faturamento / orders.length) : 0;
-
-  if (kpiCards[0]) kpiCards[0].querySelector('.kpi-value').textContent = fmtBRL(faturamento);
-  if (kpiCards[1]) kpiCards[1].querySelector('.kpi-value').textContent = String(ult30);
-  if (kpiCards[2]) kpiCards[2].querySelector('.kpi-value').textContent = fmtBRL(ticket);
+  if (kpiCards[0]) kpiCards[0].querySelector('.kpi-value').textContent = fmtBRL(periodo.receita);
+  if (kpiCards[1]) kpiCards[1].querySelector('.kpi-value').textContent = String(ult30.pedidos || 0);
+  if (kpiCards[2]) kpiCards[2].querySelector('.kpi-value').textContent = fmtBRL(periodo.ticket_medio);
 }
 
 /* ========= tabela ========= */
@@ -382,6 +391,10 @@ async function loadAndRender() {
   try {
     if (!STATE.status) STATE.status = 'finalizado'; // força status finalizado por padrão
 
+    fetchKPIs().then(renderKPIs).catch(err => {
+      console.error('Falha ao carregar indicadores:', err);
+      renderKPIs(null);
+    });
     const orders = await fetchOrders();
 
     // filtro extra no front (se necessário)
@@ -399,7 +412,6 @@ async function loadAndRender() {
       return statusOk && fromOk && toOk && qOk;
     });
 
-    renderKPIs(list);
     renderTable(list);
 
   } catch (err) {
@@ -408,7 +420,6 @@ async function loadAndRender() {
     if (tbody) {
       tbody.innerHTML = `<tr><td colspan="6"><div class="card" style="padding:12px;">Erro ao carregar vendas.</div></td></tr>`;
     }
-    renderKPIs([]);
   }
 }
 
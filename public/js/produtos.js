@@ -58,7 +58,8 @@ function hideManagedSectionsExcept(visibleTitles){
 
 /* ---------- ALTERAÇÃO PRINCIPAL: cardHTML agora respeita estoque ---------- */
 function cardHTML(p){
-  const img = p.imagem || '/public/img/placeholder-product.png';
+  // imagem_url já vem versionada (?v=hash); pede a variante 'card' redimensionada
+  const img = p.imagem_url ? `${p.imagem_url}&size=card` : (p.imagem || '/public/img/placeholder-product.png');
   // tenta normalizar o nome do campo de estoque (pode ser 'estoque', 'stock', etc.)
   const estoqueRaw = (p.estoque ?? p.stock ?? p.qtde ?? 0);
   const estoque = Number(estoqueRaw ?? 0);
@@ -131,6 +132,16 @@ async function loadStaticOptions(){
   }catch(e){ console.warn('Falha ao carregar categorias/especies', e); }
 }
 
+async function loadFacets(){
+  const p = new URLSearchParams(buildQueryParams()); ['page','per_page','sort','only_active'].forEach(k=>p.delete(k));
+  try{
+    const f = await fetchJSON(`${API_BASE}/produtos/facets?${p.toString()}`);
+    const fill = (sel, list, todas) => { if(!sel || !Array.isArray(list)) return; const cur = sel.value; sel.innerHTML = [`<option value="">${todas}</option>`].concat(list.map(o=>`<option value="${esc(o.key)}"${o.count?'':' disabled'}>${esc(o.value)} (${o.count})</option>`)).join(''); sel.value = cur; };
+    fill(qs('#f-categoria'), f.categorias, 'Todas as categorias');
+    fill(qs('#f-especie'), f.especies, 'Todas as espécies');
+  }catch(e){ console.warn('Falha ao carregar facetas', e); }
+}
+
 async function queryAndRender(){
   const url = `${API_BASE}/produtos?${buildQueryParams()}`;
   try{
@@ -151,6 +162,7 @@ async function queryAndRender(){
     if(prev) prev.disabled = !pagination.has_prev;
     if(next) next.disabled = !pagination.has_next;
     replaceURLFromState();
+    loadFacets();
   }catch(err){ console.error('Erro ao consultar produtos:', err); showToast('Erro ao carregar produtos.', 'error'); }
 }
 
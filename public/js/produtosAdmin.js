@@ -57,13 +57,20 @@ function inlinePlaceholder(text='Produto') {
   return `data:image/svg+xml;charset=utf-8,${svg}`;
 }
 
-function toDataURL(file) {
-  return new Promise((resolve, reject) => {
-    const fr = new FileReader();
-    fr.onload = () => resolve(fr.result); // data:image/...;base64,xxxx
-    fr.onerror = () => reject(new Error('Falha ao ler arquivo.'));
-    fr.readAsDataURL(file);
-  });
+// PUT /produtos/:id/imagem em multipart (sem base64); o navegador monta o Content-Type
+async function uploadImagem(id, file) {
+  const fd = new FormData();
+  fd.append('arquivo', file);
+  const res = await fetch(`${API_BASE}/produtos/${id}/imagem`, { method: 'PUT', body: fd });
+  let data = null;
+  try { data = await res.json(); } catch {}
+  if (!res.ok) {
+    const err = new Error((data && (data.message || data.error)) || `HTTP ${res.status}`);
+    err.status = res.status;
+    err.payload = data;
+    throw err;
+  }
+  return data;
 }
 
 /* ============== STATE ============== */
@@ -90,8 +97,8 @@ async function loadProductsList() {
 
 function productCardHTML(p) {
   const id = p.id ?? p.id_produto;
-  // usa imagem_url se existir (vem do backend), fallback p.imagem ou avatar
-  const img = p.imagem_url || p.imagem || defaultAvatar(p.nome);
+  // usa imagem_url (miniatura) se existir (vem do backend), fallback p.imagem ou avatar
+  const img = p.imagem_url ? `${p.imagem_url}&size=thumb` : (p.imagem || defaultAvatar(p.nome));
   const cat = p.categoria || '—';
   const preco = fmtBRL(p.preco);
   const estoque = Number(p.estoque ?? 0);
@@ -244,15 +251,6 @@ function wireProductEditModal() {
       especie: especieInput.value || null
     };
 
-    try {
-      if (CHANGED_FILE) {
-        payload.imagem = await toDataURL(CHANGED_FILE); // casa com _set_image_from_payload
-      }
-    } catch (err) {
-      showToast(err.message || 'Erro ao processar a imagem.', 'error');
-      return;
-    }
-
     const btn = form.querySelector('button[type="submit"]');
     const old = btn?.textContent;
     if (btn) { btn.disabled = true; btn.textContent = 'Salvando…'; }
@@ -266,6 +264,7 @@ function wireProductEditModal() {
           method: 'PATCH',
           body: JSON.stringify(payload),
         });
+        if (CHANGED_FILE) result = await uploadImagem(id, CHANGED_FILE);
         // Atualiza cache
         const idx = PRODUCTS.findIndex(x => (x.id ?? x.id_produto) === id);
         if (idx >= 0) PRODUCTS[idx] = result;
@@ -279,6 +278,7 @@ function wireProductEditModal() {
           method: 'POST',
           body: JSON.stringify(payload),
         });
+        if (CHANGED_FILE) result = await uploadImagem(result.id, CHANGED_FILE);
         // Adiciona no topo e re-renderiza
         PRODUCTS.unshift(result);
         renderGrid(PRODUCTS);
@@ -321,7 +321,8 @@ function renderPets(pets){
     return;
   }
   for(const p of pets){
-    const img = p.photo || defaultAvatar(p.breed);
+    // photo_url já vem versionada (?v=hash); 'photo' traz a mesma URL (sem data URL inline no JSON)
+    const img = p.photo_url ? `${p.photo_url}&size=card` : (p.photo || defaultAvatar(p.breed));
     const el = document.createElement('div');
     el.className = 'pet-card';
     el.innerHTML = `
@@ -7,4 +7,6 @@ cart_bp = Blueprint("cart", __name__)
 
 cart_bp.get('/api/carrinho')(CA.get_my_cart)
 cart_bp.post('/api/carrinho/items')(CA.add_item)
+cart_bp.post('/api/carrinho/ops')(CA.cart_ops)
+cart_bp.post('/api/carrinho/reprice')(CA.reprice)
 cart_bp.delete('/api/carrinho/items/<int:id_cart_item>')(CA.deleted_product_cart)
\ No newline at end of file
@@ -0,0 +1,40 @@
+from flask import Blueprint, jsonify
+from sqlalchemy.orm import load_only
+from werkzeug.exceptions import NotFound, RequestEntityTooLarge
+from app.erros import ValidationError
+from config.decorators import admin_required
+from models.companieModel import companie
+from service.companieService import companieSerive
+from service.Helpers import api_error
+from service.imagemService import read_upload, serve_image
+
+companie_api = Blueprint("companie_api", __name__, url_prefix="/api")
+
+@companie_api.get('/companie/<int:cid>/logo')
+def companie_logo(cid):
+    """GET /api/companie/<cid>/logo?size=thumb|card|full&v=<hash> (cache em disco por hash)"""
+    try:
+        c = (companie.query
+             .options(load_only(companie.id_companie, companie.imagem_hash, companie.imagem_mime))
+             .filter_by(id_companie=cid)
+             .first_or_404())
+        return serve_image(c.imagem_hash, c.get_photo_bytes, c.imagem_mime)
+    except NotFound:
+        return api_error(404, "Logo não encontrado")
+    except Exception as e:
+        return api_error(500, "Erro ao servir logo", exc=e)
+
+@companie_api.put('/companie/<int:cid>/logo')
+@admin_required
+def companie_logo_upload(cid):
+    """PUT /api/companie/<cid>/logo — multipart/form-data com o campo 'arquivo' (ou corpo cru image/*), até 10MB."""
+    try:
+        raw = read_upload()
+    except RequestEntityTooLarge as e:
+        return api_error(413, "Imagem muito grande", cause=e.description)
+    except ValidationError as e:
+        return api_error(400, "Imagem inválida", cause=str(e))
+    res = companieSerive.set_logo(cid, raw)
+    if not isinstance(res, companie):
+        return res
+    return jsonify({"id_companie": res.id_companie, "logo_url": res.logo_url}), 200
@@ -1,10 +1,10 @@
 from flask import Blueprint
 from controllers.pedidoController import pedidoController as PC
-from config.decorators import login_required,admin_required
+from config.decorators import login_required,admin_required,idempotent
 
 bp_orders = Blueprint("orders", __name__, url_prefix="/api")
 
-bp_orders.post("/checkout")(login_required(PC.checkout))
+bp_orders.post("/checkout")(login_required(idempotent("checkout")(PC.checkout)))
 
 bp_orders.get("/orders")(login_required(PC.my_orders))
 
@@ -14,7 +14,14 @@ bp_orders.patch("/orders/<int:order_id>/status")(login_required(PC.patch_order_s
 
 bp_orders.get("/admin/orders/")(admin_required(PC.admin_list_orders))
 
+bp_orders.patch("/admin/orders/status")(admin_required(PC.admin_bulk_order_status))
+
+bp_orders.get("/admin/orders/export")(admin_required(PC.admin_export_orders))
+
+bp_orders.post("/admin/orders/receipts:batch")(admin_required(PC.admin_receipts_batch))
+
 bp_orders.get("/admin/orders/<int:order_id>")(admin_required(PC.admin_get_order_detail))
 
 bp_orders.get("/admin/orders/<int:order_id>/recibo")(admin_required(PC.admin_generate_recibo))
 
+bp_orders.get("/admin/analytics/sales")(admin_required(PC.admin_sales_analytics))
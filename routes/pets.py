@@ -1,12 +1,17 @@
-import gzip
-from flask import Blueprint, Response, jsonify, request
+from flask import Blueprint, jsonify, request, session
+from sqlalchemy.orm import lazyload, load_only
+from werkzeug.exceptions import NotFound, RequestEntityTooLarge
 from config.db import db
 from controllers.petsController import PetsController
 from models.consultasModel import Consultation
 from models.petsModel import Pet
 from models.vacinaModel import Vaccine
 from service.Helpers import api_error
-from config.decorators import login_required
+from service.imagemService import read_upload, serve_image
+from service.petsService import (ValidationError as PetValidationError, parse_date, parse_within,
+                                 set_pet_photo, vaccines_due)
+from app.erros import ValidationError
+from config.decorators import login_required, staff_required
 
 pets_api = Blueprint("pets_api", __name__, url_prefix="/api")
 
@@ -26,13 +31,14 @@ def add_vaccine(pid):
         v = Vaccine(
             pet_id=pid,
             name=data["name"],
-            date=data["date"],
-            next=data.get("next"),
+            date=parse_date(data["date"], "date"),
+            next=parse_date(data.get("next"), "next"),
             notes=data.get("notes")
         )
         db.session.add(v); db.session.commit()
-        return jsonify({"id": getattr(v, "id_vacina", getattr(v, "id", None)),
-                        "name": v.name, "date": v.date, "next": v.next, "notes": v.notes}), 201
+        return jsonify(v.to_dict()), 201
+    except PetValidationError as e:
+        return api_error(400, str(e), details={"field": e.field})
     except Exception as e:
         db.session.rollback()
         return api_error(500, "Erro ao adicionar vacina", exc=e)
@@ -59,17 +65,33 @@ def add_consult(pid):
             return api_error(400, "Data é obrigatória.", details={"required": ["date"]})
         c = Consultation(
             pet_id=pid,
-            date=data["date"],
+            date=parse_date(data["date"], "date"),
             reason=data.get("reason"),
             notes=data.get("notes")
         )
         db.session.add(c); db.session.commit()
-        return jsonify({"id": getattr(c, "id_consulta", getattr(c, "id", None)),
-                        "date": c.date, "reason": c.reason, "notes": c.notes}), 201
+        return jsonify(c.to_dict()), 201
+    except PetValidationError as e:
+        return api_error(400, str(e), details={"field": e.field})
     except Exception as e:
         db.session.rollback()
         return api_error(500, "Erro ao adicionar consulta", exc=e)
 
+@pets_api.get('/vaccines/due')
+@staff_required
+def vaccines_due_list():
+    """GET /api/vaccines/due?within=14d&per_page=50&cursor=... — vacinas a vencer na clínica, com pet e contato do dono."""
+    try:
+        return jsonify(vaccines_due(
+            parse_within(request.args.get("within")),
+            per_page=request.args.get("per_page", 50, type=int),
+            cursor=request.args.get("cursor") or "",
+        ))
+    except (ValidationError, PetValidationError) as e:
+        return api_error(400, str(e), details={"field": e.field})
+    except Exception as e:
+        return api_error(500, "Erro ao listar vacinas a vencer", exc=e)
+
 @pets_api.delete('/pets/<int:pid>/consultations/<int:cid>')
 @login_required
 def del_consult(pid, cid):
@@ -85,18 +107,32 @@ def del_consult(pid, cid):
 @pets_api.get('/pets/<int:pid>/photo')
 @login_required
 def pet_photo(pid):
+    """GET /api/pets/<pid>/photo?size=thumb|card|full&v=<hash> (cache em disco por hash)"""
+    try:
+        p = (Pet.query
+             .options(load_only(Pet.id_pet, Pet.foto_hash, Pet.foto_mime), lazyload("*"))
+             .filter_by(id_pet=pid)
+             .first_or_404())
+        return serve_image(p.foto_hash, p.get_photo_bytes, p.foto_mime, private=True)
+    except NotFound:
+        return api_error(404, "Foto não encontrada")
+    except Exception as e:
+        return api_error(500, "Erro ao servir foto", exc=e)
+
+@pets_api.put('/pets/<int:pid>/photo')
+@login_required
+def pet_photo_upload(pid):
+    """PUT /api/pets/<pid>/photo — multipart/form-data com o campo 'arquivo' (ou corpo cru image/*), até 10MB."""
     try:
-        p = Pet.query.get_or_404(pid)
-        if not p.foto_bloob:
-            return api_error(404, "Foto não encontrada")
-        data = bytes(p.foto_bloob)
-        try:
-            raw = gzip.decompress(data) if data[:2] == b'\x1f\x8b' else data
-        except Exception:
-            raw = data
-        mime = getattr(p, "foto_mime", None) or "image/jpeg"
-        resp = Response(raw, mimetype=mime)
-        resp.headers['Cache-Control'] = 'public, max-age=86400'
-        return resp
+        p = set_pet_photo(pid, read_upload(), session.get("user_id"), is_admin=session.get("is_admin") is True)
+        return jsonify({"id": p.id_pet, "photo_url": p.photo_url}), 200
+    except NotFound:
+        return api_error(404, "Pet não encontrado")
+    except PermissionError as e:
+        return api_error(403, "Acesso negado", cause=str(e))
+    except RequestEntityTooLarge as e:
+        return api_error(413, "Imagem muito grande", cause=e.description)
+    except (ValidationError, PetValidationError) as e:
+        return api_error(400, "Não foi possível gravar a foto", cause=str(e))
     except Exception as e:
-        return api_error(500, "Erro ao servir foto", exc=e)
\ No newline at end of file
+        return api_error(500, "Erro ao gravar foto", exc=e)
\ No newline at end of file
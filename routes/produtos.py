@@ -6,6 +6,7 @@ from config.decorators import admin_required
 produtos_bp = Blueprint("produtos_bp", __name__, url_prefix="/api")
 
 produtos_bp.get("/produtos")(PC.get_all)
+produtos_bp.get("/produtos/facets")(PC.get_facets)
 produtos_bp.get("/produtos/<int:produto_id>")(PC.get_one)
 produtos_bp.post("/produtos")(admin_required(PC.create_one))
 produtos_bp.add_url_rule(
@@ -13,8 +14,13 @@ produtos_bp.add_url_rule(
     view_func=admin_required(PC.update_one),
     methods=["PUT", "PATCH"],
 )
+produtos_bp.patch("/produtos/estoque")(admin_required(PC.update_stock_bulk))
 produtos_bp.patch("/produtos/<int:produto_id>/estoque")(admin_required(PC.update_stock))
 produtos_bp.get("/produtos/<int:produto_id>/imagem")(PC.get_imagem)
+produtos_bp.put("/produtos/<int:produto_id>/imagem")(admin_required(PC.put_imagem))
 produtos_bp.delete("/produtos/<int:produto_id>")(admin_required(PC.deleted_product))
+produtos_bp.post("/produtos/import")(admin_required(PC.import_bulk))
+produtos_bp.get("/produtos/export")(admin_required(PC.export_bulk))
+produtos_bp.get("/produtos/cache/stats")(admin_required(PC.get_cache_stats))
 produtos_bp.get("/produtos/categorias")(PC.get_categorias)
 produtos_bp.get("/produtos/especies")(PC.get_especies)
\ No newline at end of file
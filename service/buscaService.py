@@ -0,0 +1,181 @@
+# service/buscaService.py
+"""
+Índice de busca full-text (SQLite FTS5) do catálogo de produtos.
+
+- tabela virtual 'produtos_fts' com rowid = produtos.id_produto
+- tokenizer unicode61 com remove_diacritics: "racao" encontra "Ração"
+- cada termo da busca vira prefixo ("rac" encontra "ração")
+- ranking BM25 (nome pesa mais que descrição) para sort=relevance
+
+Guarda só produtos vendáveis (ativos e não deletados), mantido incrementalmente
+pelo produtoService na mesma transação do produto.
+Em bancos que não são SQLite (ou sem FTS5), is_available() é False e o
+list_produtos volta para o ILIKE.
+"""
+import re
+from typing import Optional
+
+from sqlalchemy import column, literal_column, select, table, text
+from sqlalchemy.exc import OperationalError
+
+from app.enums.categoriasEnum import Categorias
+from app.enums.especies import Especies
+from app.enums.labels import enum_label
+from config.db import db
+
+FTS_TABLE = "produtos_fts"
+# pesos BM25 na ordem das colunas: nome, categoria, especie, descricao
+BM25_WEIGHTS = (10.0, 2.0, 2.0, 1.0)
+
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+_available: Optional[bool] = None
+
+
+def is_available() -> bool:
+    global _available
+    if _available is None:
+        _available = db.engine.dialect.name == "sqlite" and _has_table()
+    return _available
+
+
+def _has_table() -> bool:
+    with db.engine.connect() as conn:
+        row = conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type='table' AND name=:n"), {"n": FTS_TABLE}
+        ).first()
+    return row is not None
+
+
+def ensure_index() -> bool:
+    """
+    Cria a tabela FTS se não existir (e popula a partir dos produtos atuais).
+    Chamado no create_app; retorna False se o banco não suporta FTS5.
+    """
+    global _available
+    if db.engine.dialect.name != "sqlite":
+        _available = False
+        return False
+    if _has_table():
+        _available = True
+        return True
+    try:
+        with db.engine.begin() as conn:
+            conn.execute(text(
+                f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+                "nome, categoria, especie, descricao, "
+                "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+            ))
+    except OperationalError:
+        # SQLite compilado sem FTS5
+        _available = False
+        return False
+    _available = True
+    rebuild_index()
+    return True
+
+
+def _enum_text(enum_cls, key: Optional[str]) -> str:
+    """Indexa a chave gravada (ex.: 'RACAO') e o rótulo do enum (ex.: 'Ração')."""
+    if not key:
+        return ""
+    label = enum_label(enum_cls, key)
+    return key if label == key else f"{key} {label}"
+
+
+def _row(p) -> dict:
+    return {
+        "id": p.id_produto,
+        "nome": p.nome or "",
+        "categoria": _enum_text(Categorias, p.categoria),
+        "especie": _enum_text(Especies, p.especie),
+        "descricao": p.descricao or "",
+    }
+
+
+def index_produto(p):
+    """
+    (Re)indexa um produto na transação corrente da sessão; p precisa ter id (flush).
+    Inativo ou deletado: só sai do índice.
+    """
+    if not is_available():
+        return
+    db.session.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :id"), {"id": p.id_produto})
+    if p.deleted or not p.is_active:
+        return
+    db.session.execute(
+        text(f"INSERT INTO {FTS_TABLE} (rowid, nome, categoria, especie, descricao) "
+             "VALUES (:id, :nome, :categoria, :especie, :descricao)"),
+        _row(p),
+    )
+
+
+def index_rows(rows):
+    """Indexa produtos ativos recém-inseridos em lote; rows têm id_produto, nome, categoria, especie, descricao."""
+    if not is_available() or not rows:
+        return
+    db.session.execute(
+        text(f"INSERT INTO {FTS_TABLE} (rowid, nome, categoria, especie, descricao) "
+             "VALUES (:id, :nome, :categoria, :especie, :descricao)"),
+        [_row(r) for r in rows],
+    )
+
+
+def remove_produto(produto_id: int):
+    if not is_available():
+        return
+    db.session.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :id"), {"id": produto_id})
+
+
+def rebuild_index(batch_size: int = 500) -> int:
+    """Apaga e recria o índice a partir dos produtos ativos e não deletados. Retorna o total indexado."""
+    from models.produtoModel import produto
+
+    cols = (produto.id_produto, produto.nome, produto.categoria, produto.especie, produto.descricao)
+    total = 0
+    db.session.execute(text(f"DELETE FROM {FTS_TABLE}"))
+    rows = db.session.execute(
+        select(*cols).where(produto.deleted == 0, produto.is_active == True)
+    ).yield_per(batch_size)
+    for chunk in rows.partitions():
+        db.session.execute(
+            text(f"INSERT INTO {FTS_TABLE} (rowid, nome, categoria, especie, descricao) "
+                 "VALUES (:id, :nome, :categoria, :especie, :descricao)"),
+            [_row(r) for r in chunk],
+        )
+        total += len(chunk)
+    db.session.commit()
+    return total
+
+
+def build_match(q: str) -> Optional[str]:
+    """
+    Converte o texto digitado em expressão MATCH do FTS5:
+    'ração gato' -> '"ração"* "gato"*' (todos os termos, por prefixo).
+    Retorna None se não sobrar nenhum termo.
+    """
+    terms = _TERM_RE.findall(q or "")
+    if not terms:
+        return None
+    return " ".join(f'"{t}"*' for t in terms)
+
+
+def match_subquery(q: str):
+    """
+    Subquery (rid, rank) com os produtos que casam com q; rank = BM25 (menor = mais relevante).
+    Retorna None se q não tiver termos pesquisáveis (quem chama decide: q vazio = sem
+    filtro, q só com pontuação = nenhum resultado).
+    """
+    expr = build_match(q)
+    if expr is None:
+        return None
+    fts = table(FTS_TABLE, column("rowid"))
+    weights = ", ".join(str(w) for w in BM25_WEIGHTS)
+    return (
+        select(
+            fts.c.rowid.label("rid"),
+            literal_column(f"bm25({FTS_TABLE}, {weights})").label("rank"),
+        )
+        .select_from(fts)
+        .where(text(f"{FTS_TABLE} MATCH :fts_q").bindparams(fts_q=expr))
+        .subquery("busca")
+    )
@@ -1,13 +1,20 @@
+from datetime import datetime, timedelta
 from flask import jsonify
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload, with_loader_criteria
+from sqlalchemy import delete, func, insert, select, update
+from config import config
 from config.db import db
 from models.cartModel import Cart, CartItem
 from models.produtoModel import produto
 from app.enums.cartEnum import CartStatus
 from app.enums.modos import modos
+from app.erros import ValidationError
 from sqlalchemy.exc import SQLAlchemyError
 
+MAX_OPS = 100
+SWEEP_CHUNK = 1000
+# carrinhos que já saíram de uso (FECHADO é o status antigo do checkout, hoje CONVERTIDO)
+CARRINHOS_FINALIZADOS = (CartStatus.CONVERTIDO.name, CartStatus.FECHADO.name, CartStatus.ABANDONADO.name)
+
 
 def get_or_create_my_cart(uid : int) -> Cart:
     cart = (
@@ -78,24 +85,231 @@ def add_or_set_item(uid: int, id_produto: int, quantidade: int, *, modo: str = m
     db.session.commit()
     return item
 
-def get_cart(uid):
-     
-    cart = (Cart.query
-        .options(selectinload(Cart.items),
-                 with_loader_criteria(CartItem, CartItem.deleted == 0)
-                 )
-        .filter_by(id_usuario=uid, status=CartStatus.ABERTO.name, is_active=True)
-        .first())
-
-    items = [it.to_dict() for it in (cart.items if cart else [])]
-    subtotal = round(sum(i["subtotal_item"] for i in items), 2)
-
-    return jsonify({
-        "id_cart": cart.id_cart if cart else None,
-        "status": cart.status if cart else CartStatus.ABERTO.name,
+def disponivel(is_active, deleted) -> bool:
+    """Produto vendável: ativo (ou sem flag) e não apagado. Mesma regra no carrinho e no checkout."""
+    return is_active in (True, 1, None) and deleted in (0, False, None)
+
+def linhas_precificadas(id_cart: int) -> list:
+    """
+    Linhas vivas do carrinho com o estado atual do produto, numa consulta (sem blob):
+    preço/estoque/ativo de produtos + snapshot do carrinho.
+    """
+    return db.session.execute(
+        select(CartItem.id_cart_item, CartItem.id_produto, CartItem.quantidade, CartItem.preco_unitario,
+               CartItem.is_active, produto.nome, produto.preco, produto.estoque, produto.imagem_hash,
+               produto.is_active.label("produto_ativo"), produto.deleted.label("produto_deleted"))
+        .outerjoin(produto, produto.id_produto == CartItem.id_produto)
+        .where(CartItem.id_cart == id_cart, CartItem.is_active == True, CartItem.deleted == 0,
+               CartItem.quantidade > 0)
+        .order_by(CartItem.id_cart_item)
+    ).all()
+
+def avalia_linhas(rows) -> dict:
+    """
+    Confere cada linha contra o produto atual (preço, estoque somado por produto, ativo).
+    Retorna {"linhas": [(row, flags)], "precos_alterados", "indisponiveis", "sem_estoque"}
+    com os ids de produto de cada problema.
+    """
+    qtd_total: dict[int, int] = {}
+    for r in rows:
+        qtd_total[r.id_produto] = qtd_total.get(r.id_produto, 0) + int(r.quantidade)
+
+    linhas, alterados, indisponiveis, sem_estoque = [], [], [], []
+    for r in rows:
+        ok = r.nome is not None and disponivel(r.produto_ativo, r.produto_deleted)
+        flags = {
+            "disponivel": ok,
+            "estoque_ok": ok and (r.estoque or 0) >= qtd_total[r.id_produto],
+            "preco_atual": float(r.preco) if ok else None,
+            "preco_mudou": ok and abs(float(r.preco) - float(r.preco_unitario)) >= 0.005,
+        }
+        if not ok:
+            indisponiveis.append(r.id_produto)
+        elif not flags["estoque_ok"]:
+            sem_estoque.append(r.id_produto)
+        if flags["preco_mudou"]:
+            alterados.append(r.id_produto)
+        linhas.append((r, flags))
+    unicos = lambda ids: list(dict.fromkeys(ids))
+    return {"linhas": linhas, "precos_alterados": unicos(alterados),
+            "indisponiveis": unicos(indisponiveis), "sem_estoque": unicos(sem_estoque)}
+
+def _cart_payload(id_cart: int | None, status: str = CartStatus.ABERTO.name) -> dict:
+    """Itens do carrinho + resumo e situação atual de cada produto, numa consulta só de colunas."""
+    aval = avalia_linhas(linhas_precificadas(id_cart) if id_cart is not None else [])
+    items = []
+    for r, flags in aval["linhas"]:
+        items.append({
+            "id_cart_item": r.id_cart_item,
+            "id_cart": id_cart,
+            "id_produto": r.id_produto,
+            "quantidade": r.quantidade,
+            "preco_unitario": r.preco_unitario,
+            "subtotal_item": round(r.quantidade * r.preco_unitario, 2),
+            "is_active": r.is_active,
+            **flags,
+            "product": {
+                "nome": r.nome,
+                "preco": r.preco,
+                "estoque": r.estoque,
+                "imagem": produto.build_imagem_url(r.id_produto, r.imagem_hash),
+            },
+        })
+    return {
+        "id_cart": id_cart,
+        "status": status,
         "items": items,
-        "subtotal": subtotal
-    })
+        "subtotal": round(sum(i["subtotal_item"] for i in items), 2),
+        # subtotal se o carrinho for repreçado (só linhas disponíveis)
+        "subtotal_atual": round(sum(i["quantidade"] * i["preco_atual"] for i in items if i["disponivel"]), 2),
+        "validacao": {
+            "ok": not (aval["indisponiveis"] or aval["sem_estoque"] or aval["precos_alterados"]),
+            "precos_alterados": aval["precos_alterados"],
+            "indisponiveis": aval["indisponiveis"],
+            "sem_estoque": aval["sem_estoque"],
+        },
+    }
+
+def reprice_cart(uid: int) -> dict:
+    """Grava o preço atual nas linhas cujo produto mudou de preço (um UPDATE em lote) e devolve o carrinho."""
+    id_cart = _open_cart_id(uid)
+    if id_cart is None:
+        return _cart_payload(None)
+    try:
+        aval = avalia_linhas(linhas_precificadas(id_cart))
+        agora = datetime.utcnow()
+        alterar = [{"id_cart_item": r.id_cart_item, "preco_unitario": f["preco_atual"], "updated_at": agora}
+                   for r, f in aval["linhas"] if f["preco_mudou"]]
+        if alterar:
+            db.session.execute(update(CartItem), alterar)
+            db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return _cart_payload(id_cart)
+
+def _open_cart_id(uid: int) -> int | None:
+    return db.session.execute(
+        select(Cart.id_cart)
+        .where(Cart.id_usuario == uid, Cart.status == CartStatus.ABERTO.name, Cart.is_active == True)
+        .order_by(Cart.id_cart)
+        .limit(1)
+    ).scalar()
+
+def get_cart(uid):
+    return jsonify(_cart_payload(_open_cart_id(uid)))
+
+def _parse_modo(valor) -> modos:
+    """Aceita o nome (INCLUIR/SETAR/REMOVER) ou o valor (inc/set) do enum."""
+    v = str(valor or modos.INCLUIR.name).strip()
+    for m in modos:
+        if v.upper() == m.name or v.lower() == m.value.lower():
+            return m
+    if v.lower() == "remove":
+        return modos.REMOVER
+    raise ValidationError(f"Modo inválido: {valor}", field="modo")
+
+def _parse_ops(ops) -> list[tuple[int, modos, int]]:
+    if not isinstance(ops, list) or not ops:
+        raise ValidationError("Informe 'ops' como uma lista de operações.", field="ops")
+    if len(ops) > MAX_OPS:
+        raise ValidationError(f"No máximo {MAX_OPS} operações por vez.", field="ops")
+    out = []
+    for op in ops:
+        if not isinstance(op, dict):
+            raise ValidationError("Operação inválida.", field="ops")
+        modo = _parse_modo(op.get("modo") or op.get("op"))
+        try:
+            pid = int(op.get("id_produto"))
+            qtd = int(op.get("quantidade") if op.get("quantidade") is not None else 1)
+        except (TypeError, ValueError):
+            raise ValidationError("id_produto e quantidade devem ser números.", field="ops")
+        if qtd <= 0 and modo is not modos.REMOVER:
+            raise ValidationError("Quantidade deve ser maior que 0", field="quantidade")
+        out.append((pid, modo, qtd))
+    return out
+
+def apply_cart_ops(uid: int, ops) -> dict:
+    """
+    Aplica várias operações no carrinho ABERTO numa transação e devolve o carrinho.
+    ops: [{"id_produto", "modo": INCLUIR|SETAR|REMOVER (ou inc/set), "quantidade"}], em ordem;
+    mesma regra de add_or_set_item (REMOVER tira max(1, qtd) e apaga a linha ao zerar;
+    toda linha tocada fica com o preço atual do produto).
+    Consultas fixas, qualquer que seja o número de ops: carrinho, produtos (IN),
+    linhas atuais (IN), até três escritas em lote e o carrinho final.
+    """
+    parsed = _parse_ops(ops)
+    ids = {pid for pid, _, _ in parsed}
+    try:
+        id_cart = _open_cart_id(uid)
+        if id_cart is None:
+            cart = Cart(id_usuario=uid, status=CartStatus.ABERTO.name, is_active=True)
+            db.session.add(cart)
+            db.session.flush()
+            id_cart = cart.id_cart
+
+        precos = {
+            r.id_produto: float(r.preco) for r in db.session.execute(
+                select(produto.id_produto, produto.preco, produto.is_active, produto.deleted)
+                .where(produto.id_produto.in_(ids))
+            )
+            if disponivel(r.is_active, r.deleted)
+        }
+        atuais = {
+            r.id_produto: r for r in db.session.execute(
+                select(CartItem.id_cart_item, CartItem.id_produto, CartItem.quantidade)
+                .where(CartItem.id_cart == id_cart, CartItem.id_produto.in_(ids),
+                       CartItem.is_active == True, CartItem.deleted == 0)
+                .order_by(CartItem.id_cart_item.desc())  # se houver duplicada, vale a primeira
+            )
+        }
+
+        # quantidade final por produto (None = sem linha)
+        qtds = {pid: (atuais[pid].quantidade if pid in atuais else None) for pid in ids}
+        for pid, modo, qtd in parsed:
+            atual = qtds[pid]
+            if modo is modos.REMOVER:
+                if atual is not None:
+                    nova = atual - max(1, qtd)
+                    qtds[pid] = nova if nova > 0 else None
+                continue
+            if pid not in precos:
+                raise ValidationError(f"Produto {pid} indisponível", field="id_produto")
+            qtds[pid] = (atual or 0) + qtd if modo is modos.INCLUIR else qtd
+
+        agora = datetime.utcnow()
+        alterar, remover, incluir = [], [], []
+        for pid, qtd in qtds.items():
+            linha = atuais.get(pid)
+            if linha is None:
+                if qtd is not None:
+                    incluir.append({"id_cart": id_cart, "id_produto": pid, "quantidade": qtd,
+                                    "preco_unitario": precos[pid]})
+            elif qtd is None:
+                remover.append(linha.id_cart_item)
+            elif pid in precos:
+                alterar.append({"id_cart_item": linha.id_cart_item, "quantidade": qtd,
+                                "preco_unitario": precos[pid], "updated_at": agora})
+            else:
+                # produto saiu de linha: só a quantidade muda, o preço fica o do carrinho
+                alterar.append({"id_cart_item": linha.id_cart_item, "quantidade": qtd, "updated_at": agora})
+
+        if alterar:
+            db.session.execute(update(CartItem), alterar)
+        if remover:
+            db.session.execute(
+                update(CartItem)
+                .where(CartItem.id_cart_item.in_(remover))
+                .values(deleted=CartItem.id_cart_item, is_active=False, updated_at=agora),
+                execution_options={"synchronize_session": False},
+            )
+        if incluir:
+            db.session.execute(insert(CartItem), incluir)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return _cart_payload(id_cart)
 
 def deleted_produto(id_cart_item:int)-> produto:
     item = CartItem.query.get_or_404(id_cart_item)
@@ -112,3 +326,80 @@ def deleted_produto(id_cart_item:int)-> produto:
         db.session.rollback()
         raise RuntimeError("Erro inesperado ao deletar produto") from e
     return True
+
+def _em_lotes(selecionar, aplicar, lote: int) -> int:
+    """Repete selecionar(lote) -> ids / aplicar(ids) -> linhas, com um commit por lote, até acabar."""
+    total = 0
+    while True:
+        ids = db.session.execute(selecionar(lote)).scalars().all()
+        if not ids:
+            return total
+        try:
+            total += aplicar(ids)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+def sweep_carts(*, abandon_days: int | None = None, retention_days: int | None = None,
+                lote: int = SWEEP_CHUNK) -> dict:
+    """
+    Manutenção dos carrinhos (flask sweep-carrinhos), em lotes curtos para não segurar lock:
+    1. ABERTO sem mudança (nem no carrinho nem nos itens) há abandon_days -> ABANDONADO
+    2. apaga de vez as linhas soft-deleted (deleted != 0)
+    3. apaga carrinhos CONVERTIDO/FECHADO/ABANDONADO parados há retention_days, com os itens
+       (o que foi comprado está em order_items)
+    Retorna quantas linhas cada passo afetou.
+    """
+    agora = datetime.utcnow()
+    corte_abandono = agora - timedelta(days=config.CART_ABANDON_DAYS if abandon_days is None else abandon_days)
+    corte_retencao = agora - timedelta(days=config.CART_RETENTION_DAYS if retention_days is None else retention_days)
+
+    mexido = (
+        select(CartItem.id_cart_item)
+        .where(CartItem.id_cart == Cart.id_cart, CartItem.updated_at >= corte_abandono)
+        .exists()
+    )
+    abandonados = _em_lotes(
+        lambda n: select(Cart.id_cart)
+        .where(Cart.status == CartStatus.ABERTO.name, Cart.is_active == True,
+               func.coalesce(Cart.updated_at, Cart.created_at) < corte_abandono, ~mexido)
+        .limit(n),
+        lambda ids: db.session.execute(
+            update(Cart)
+            .where(Cart.id_cart.in_(ids), Cart.status == CartStatus.ABERTO.name)
+            .values(status=CartStatus.ABANDONADO.name, is_active=False, updated_at=agora),
+            execution_options={"synchronize_session": False},
+        ).rowcount,
+        lote,
+    )
+
+    linhas = _em_lotes(
+        lambda n: select(CartItem.id_cart_item).where(CartItem.deleted != 0).limit(n),
+        lambda ids: db.session.execute(
+            delete(CartItem).where(CartItem.id_cart_item.in_(ids)),
+            execution_options={"synchronize_session": False},
+        ).rowcount,
+        lote,
+    )
+
+    def _apaga_carrinhos(ids):
+        nonlocal linhas
+        linhas += db.session.execute(
+            delete(CartItem).where(CartItem.id_cart.in_(ids)),
+            execution_options={"synchronize_session": False},
+        ).rowcount
+        return db.session.execute(
+            delete(Cart).where(Cart.id_cart.in_(ids)),
+            execution_options={"synchronize_session": False},
+        ).rowcount
+
+    carrinhos = _em_lotes(
+        lambda n: select(Cart.id_cart)
+        .where(Cart.status.in_(CARRINHOS_FINALIZADOS),
+               func.coalesce(Cart.updated_at, Cart.created_at) < corte_retencao)
+        .limit(n),
+        _apaga_carrinhos,
+        lote,
+    )
+    return {"carrinhos_abandonados": abandonados, "linhas_removidas": linhas, "carrinhos_removidos": carrinhos}
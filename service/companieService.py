@@ -1,22 +1,25 @@
 import base64
 import binascii
-import gzip
 import re
-from typing import Any
+import threading
+from typing import Any, Optional
 
+from sqlalchemy import select
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError, DataError, InvalidRequestError
+from sqlalchemy.orm import undefer
 
 from config.db import db
 from config.logger import logger
 from service.Helpers import api_error
 from models.companieModel import companie
 from app.erros import ValidationError
+from utils.imagem import ingest_image
 
 DATA_URL_RE = re.compile(r'^data:(?P<mime>[\w/+.-]+);base64,(?P<b64>.+)$')
 MAX_IMG_BYTES = 10 * 1024 * 1024  # 10 MB
 
 def _set_image_from_payload(c: companie, data: dict[str, Any]):
-    """Aceita 'imagem' como dataURL base64 e compacta com gzip."""
+    """Aceita 'imagem' como dataURL base64; o pipeline (utils.imagem) valida e re-encoda fora da thread."""
     photo = data.get("imagem")
     if not photo:
         return
@@ -37,12 +40,89 @@ def _set_image_from_payload(c: companie, data: dict[str, Any]):
         raise ValidationError(f"Foto excede {MAX_IMG_BYTES // (1024 * 1024)}MB.", field="photo")
 
     try:
-        c.imagem_bloob = gzip.compress(raw, compresslevel=6)
-        if hasattr(c, "imagem_mime"):
-            c.imagem_mime = m.group('mime')[:50]
-    except Exception as e:
-        logger.exception("Falha ao comprimir a foto com gzip: %s", e)
-        raise ValidationError("Falha ao comprimir a foto.", field="photo") from e
+        c.set_imagem(ingest_image(raw))
+    except ValidationError as e:
+        logger.warning("Imagem recusada pelo pipeline: %s", e)
+        raise
+
+
+class Branding:
+    """
+    Snapshot da empresa para os recibos: dados, logo (bytes já descompactados)
+    e o ImageReader do logo, decodificado uma vez. Sem sessão do SQLAlchemy, então
+    pode ir para os workers do lote (o ImageReader é refeito lá, uma vez por processo).
+    """
+
+    def __init__(self, c: companie):
+        self.id_companie = c.id_companie
+        self.nome = c.nome
+        self.cnpj = c.cnpj
+        self.endereco = c.endereco
+        self.numero = c.numero
+        self.imagem_hash = c.imagem_hash
+        self.updated_at = c.updated_at
+        self.imagem_bloob = c.get_photo_bytes()
+        self._logo_image = None
+
+    @property
+    def versao(self) -> tuple:
+        """Entradas da empresa na chave do recibo (reciboService.key_from)."""
+        return (self.nome, self.cnpj, self.endereco, self.numero, self.imagem_hash, self.updated_at)
+
+    def get_photo_bytes(self) -> Optional[bytes]:
+        return self.imagem_bloob
+
+    @property
+    def logo_image(self):
+        if self._logo_image is None and self.imagem_bloob:
+            from utils.createRecibo import carrega_logo
+            self._logo_image = carrega_logo(self.imagem_bloob)
+        return self._logo_image
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state["_logo_image"] = None
+        return state
+
+
+# a versão do snapshot fica no banco: (updated_at, imagem_hash, deleted) da empresa, lidos
+# por PK a cada uso. Toda escrita pelo ORM move updated_at, então uma edição feita em
+# qualquer worker invalida o snapshot de todos, sem depender de um contador compartilhado.
+_branding: dict[int, tuple[Optional[tuple], Optional[Branding]]] = {}
+_branding_lock = threading.Lock()
+
+
+def _versao_db(id_companie: int) -> Optional[tuple]:
+    row = db.session.execute(
+        select(companie.updated_at, companie.imagem_hash, companie.deleted)
+        .where(companie.id_companie == id_companie)
+    ).first()
+    return tuple(row) if row is not None else None
+
+
+def get_branding(id_companie: int) -> Optional[Branding]:
+    """Branding em cache no processo, conferido contra a versão no banco (None se a empresa não existe/foi apagada)."""
+    versao = _versao_db(id_companie)
+    hit = _branding.get(id_companie)
+    if hit is not None and hit[0] == versao:
+        return hit[1]
+    with _branding_lock:
+        hit = _branding.get(id_companie)
+        if hit is not None and hit[0] == versao:
+            return hit[1]
+        c = db.session.get(companie, id_companie, options=[undefer(companie.imagem_bloob)],
+                           populate_existing=True)
+        b = Branding(c) if c is not None and not c.deleted else None
+        if b is not None:
+            b.logo_image  # decodifica já, fora do caminho do PDF
+        _branding[id_companie] = (versao, b)
+        return b
+
+
+def invalidate_branding():
+    """Descarta os snapshots deste processo (os outros percebem pela versão no banco)."""
+    with _branding_lock:
+        _branding.clear()
 
 
 class companieSerive:  # mantém o nome original para não quebrar imports
@@ -84,6 +164,7 @@ class companieSerive:  # mantém o nome original para não quebrar imports
 
             db.session.add(obj)
             db.session.commit()
+            invalidate_branding()
             return obj
 
         except (IntegrityError, DataError, InvalidRequestError) as e:
@@ -134,6 +215,7 @@ class companieSerive:  # mantém o nome original para não quebrar imports
             # imagem: remover ou atualizar somente se enviado algo relacionado
             if data.get("remove_imagem") is True:
                 obj.imagem_bloob = None
+                obj.imagem_hash = None
                 if hasattr(obj, "imagem_mime"):
                     obj.imagem_mime = None
             elif "imagem" in data:
@@ -144,6 +226,7 @@ class companieSerive:  # mantém o nome original para não quebrar imports
                     return api_error(400, "Imagem inválida", details={"photo": str(ve)})
 
             db.session.commit()
+            invalidate_branding()
             return obj
 
         except (IntegrityError, DataError, InvalidRequestError) as e:
@@ -160,6 +243,26 @@ class companieSerive:  # mantém o nome original para não quebrar imports
             logger.exception("Erro inesperado ao atualizar empresa (id=%s): %s", id_companie, e)
             return api_error(500, f"Erro ao atualizar empresa: {e}")
 
+    @staticmethod
+    def set_logo(id_companie: int, raw: bytes) -> companie | dict:
+        """Troca o logo a partir dos bytes do upload (PUT /api/companie/<id>/logo)."""
+        try:
+            obj = companie.query.get(id_companie)
+            if not obj or getattr(obj, "deleted", False):
+                return api_error(404, "Companie não encontrada")
+            try:
+                obj.set_imagem(ingest_image(raw))
+            except ValidationError as ve:
+                logger.warning("Logo recusado pelo pipeline (id=%s): %s", id_companie, ve)
+                return api_error(400, "Imagem inválida", details={"photo": str(ve)})
+            db.session.commit()
+            invalidate_branding()
+            return obj
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            logger.exception("Erro SQLAlchemy ao gravar logo da empresa (id=%s): %s", id_companie, e)
+            return api_error(500, "Falha no banco ao gravar logo", details=str(e))
+
     @staticmethod
     def get_companie(id_companie: int) -> companie | dict:
         try:
@@ -0,0 +1,157 @@
+# service/idempotenciaService.py
+"""
+Idempotency-Key para operações que não podem rodar duas vezes (ex.: checkout).
+
+Fluxo (ver config.decorators.idempotent):
+- begin(): grava a chave como PENDENTE e commita na hora; a UNIQUE
+  (user_id, endpoint, chave) garante que só uma requisição "ganha"
+- a requisição que ganhou executa e chama finish() com a resposta:
+  2xx fica gravada e é devolvida nas repetições; erros (4xx, 5xx, exceção)
+  não gravaram nada, então apagam a chave e o cliente pode tentar de novo
+  com a mesma chave (ex.: 409 precos_alterados -> reprice -> mesmo checkout)
+- repetições concorrentes esperam a primeira terminar (polling curto)
+  em vez de executar outra vez
+- as chaves expiram em IDEMPOTENCY_TTL_HOURS; purge_expired() limpa
+"""
+import hashlib
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+from flask import current_app
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from config import config
+from config.db import db
+from models.idempotenciaModel import IdempotencyKey
+
+MAX_KEY_LEN = 100
+WAIT_TIMEOUT = 10.0      # segundos esperando a requisição em andamento
+WAIT_INTERVAL = 0.1
+PENDING_STALE = 120      # PENDENTE mais velha que isso = processo morreu no meio; pode ser retomada
+PURGE_INTERVAL = 300     # purge oportunista no máximo a cada 5 min por processo
+
+_last_purge = 0.0
+_purge_lock = threading.Lock()
+
+
+def fingerprint(endpoint: str, body: bytes) -> str:
+    return hashlib.sha256(endpoint.encode("utf-8") + b"\0" + (body or b"")).hexdigest()
+
+
+def _ttl() -> timedelta:
+    return timedelta(hours=config.IDEMPOTENCY_TTL_HOURS)
+
+
+def _load(user_id: int, endpoint: str, chave: str):
+    t = IdempotencyKey
+    row = db.session.execute(
+        select(t.id, t.fingerprint, t.status, t.resp_status, t.resp_body, t.created_at, t.expires_at)
+        .where(t.user_id == user_id, t.endpoint == endpoint, t.chave == chave)
+    ).first()
+    # encerra a transação de leitura: o próximo poll enxerga o que outro worker commitou
+    db.session.rollback()
+    return row
+
+
+def _try_insert(user_id: int, endpoint: str, chave: str, fp: str) -> bool:
+    now = datetime.utcnow()
+    try:
+        db.session.execute(insert(IdempotencyKey).values(
+            user_id=user_id, endpoint=endpoint, chave=chave, fingerprint=fp,
+            status="PENDENTE", created_at=now, expires_at=now + _ttl(),
+        ))
+        db.session.commit()
+        return True
+    except IntegrityError:
+        db.session.rollback()
+        return False
+
+
+def _takeover(row, stale: bool) -> bool:
+    """Reaproveita uma linha expirada (ou PENDENTE abandonada) se ninguém a pegou antes."""
+    now = datetime.utcnow()
+    t = IdempotencyKey
+    cond = t.expires_at <= now if not stale else t.created_at == row.created_at
+    res = db.session.execute(
+        update(t).where(t.id == row.id, cond)
+        .values(status="PENDENTE", resp_status=None, resp_body=None,
+                created_at=now, expires_at=now + _ttl())
+    )
+    db.session.commit()
+    return res.rowcount == 1
+
+
+def begin(user_id: int, endpoint: str, chave: str, fp: str) -> Optional[tuple[int, str, bool]]:
+    """
+    Reserva a chave. Retorna None se esta requisição deve executar; senão
+    (status, corpo JSON, replay) a devolver sem executar:
+    - replay=True: resposta gravada da primeira execução
+    - 422: mesma chave com outro corpo; 409: a original ainda está rodando
+    """
+    _maybe_purge()
+    deadline = time.monotonic() + WAIT_TIMEOUT
+    while True:
+        if _try_insert(user_id, endpoint, chave, fp):
+            return None
+        row = _load(user_id, endpoint, chave)
+        if row is None:
+            continue  # apagada entre o INSERT e o SELECT (5xx ou purge): tenta de novo
+        now = datetime.utcnow()
+        if row.expires_at <= now:
+            if _takeover(row, stale=False):
+                return None
+            continue
+        if row.fingerprint != fp:
+            return 422, '{"error": "Idempotency-Key já usada com outro conteúdo."}', False
+        if row.status == "CONCLUIDO":
+            return row.resp_status, row.resp_body, True
+        if row.created_at <= now - timedelta(seconds=PENDING_STALE):
+            if _takeover(row, stale=True):
+                return None
+            continue
+        if time.monotonic() >= deadline:
+            return 409, '{"error": "Requisição com esta Idempotency-Key ainda em processamento."}', False
+        time.sleep(WAIT_INTERVAL)
+
+
+def finish(user_id: int, endpoint: str, chave: str, status: Optional[int], body: Optional[str]):
+    """
+    Grava a resposta de sucesso (2xx) para ser repetida; com status None ou
+    erro (>= 400) libera a chave para uma nova tentativa.
+    """
+    t = IdempotencyKey
+    where = (t.user_id == user_id, t.endpoint == endpoint, t.chave == chave, t.status == "PENDENTE")
+    try:
+        if status is None or status >= 400:
+            db.session.execute(delete(t).where(*where))
+        else:
+            db.session.execute(update(t).where(*where).values(
+                status="CONCLUIDO", resp_status=status, resp_body=body))
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        current_app.logger.exception("Falha ao gravar Idempotency-Key %s", chave)
+
+
+def purge_expired() -> int:
+    """Apaga as chaves expiradas. Retorna quantas saíram."""
+    res = db.session.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at <= datetime.utcnow()))
+    db.session.commit()
+    return res.rowcount
+
+
+def _maybe_purge():
+    global _last_purge
+    now = time.monotonic()
+    with _purge_lock:
+        if now - _last_purge < PURGE_INTERVAL:
+            return
+        _last_purge = now
+    try:
+        purge_expired()
+    except Exception:
+        db.session.rollback()
+        current_app.logger.exception("Falha ao limpar Idempotency-Keys expiradas")
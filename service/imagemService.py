@@ -0,0 +1,208 @@
+# service/imagemService.py
+"""
+Cache de imagens em disco, endereçado pelo hash (sha256) do conteúdo original.
+
+    <IMAGE_CACHE_DIR>/<hash[:2]>/<hash>/orig          -> bytes originais (já descompactados)
+    <IMAGE_CACHE_DIR>/<hash[:2]>/<hash>/thumb.webp    -> variantes redimensionadas
+    <IMAGE_CACHE_DIR>/<hash[:2]>/<hash>/card.jpeg ...
+
+Como a chave é o conteúdo, os arquivos nunca ficam velhos: imagem nova => hash novo.
+O blob do banco só é lido (e descompactado) na primeira vez que um hash é pedido.
+"""
+import os
+import tempfile
+from io import BytesIO
+from typing import Callable, Optional
+
+from flask import Response, request, send_file
+from PIL import Image, ImageOps, UnidentifiedImageError
+from sqlalchemy.orm import undefer
+from werkzeug.exceptions import NotFound, RequestEntityTooLarge, RequestedRangeNotSatisfiable
+
+from app.erros import ValidationError
+
+from config import config
+from config.db import db
+from utils.imagem import image_meta
+
+# nome -> caixa máxima (largura, altura); mantém proporção
+VARIANTS = {
+    "thumb": (200, 200),
+    "card": (480, 480),
+    "full": (1600, 1600),
+}
+FORMATS = {
+    "webp": "image/webp",
+    "jpeg": "image/jpeg",
+}
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600  # 1 ano
+MAX_UPLOAD_BYTES = 10 * 1024 * 1024  # 10 MB
+UPLOAD_FIELD = "arquivo"
+
+
+def _dir(digest: str) -> str:
+    return os.path.join(config.IMAGE_CACHE_DIR, digest[:2], digest)
+
+
+def write_atomic(path: str, data: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except Exception:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def _render(raw: bytes, size: tuple[int, int], fmt: str) -> bytes:
+    with Image.open(BytesIO(raw)) as im:
+        im = ImageOps.exif_transpose(im)
+        im.thumbnail(size, Image.LANCZOS)
+        if fmt == "jpeg" and im.mode != "RGB":
+            # JPEG não tem alpha: achata sobre fundo branco
+            im = im.convert("RGBA")
+            bg = Image.new("RGB", im.size, (255, 255, 255))
+            bg.paste(im, mask=im.getchannel("A"))
+            im = bg
+        elif fmt == "webp" and im.mode not in ("RGB", "RGBA"):
+            im = im.convert("RGBA")
+        out = BytesIO()
+        if fmt == "webp":
+            im.save(out, "WEBP", quality=80, method=4)
+        else:
+            im.save(out, "JPEG", quality=82, optimize=True, progressive=True)
+        return out.getvalue()
+
+
+def ensure_original(digest: str, load_raw: Callable[[], Optional[bytes]]) -> str:
+    """Garante o original descompactado em disco e retorna o caminho."""
+    path = os.path.join(_dir(digest), "orig")
+    if not os.path.exists(path):
+        raw = load_raw()
+        if not raw:
+            raise NotFound("Imagem não encontrada.")
+        write_atomic(path, raw)
+    return path
+
+
+def ensure_variant(digest: str, variant: str, fmt: str,
+                   load_raw: Callable[[], Optional[bytes]]) -> Optional[str]:
+    """
+    Garante a variante (variant, fmt) em disco e retorna o caminho.
+    Retorna None se o Pillow não reconhecer a imagem (o chamador serve o original).
+    """
+    path = os.path.join(_dir(digest), f"{variant}.{fmt}")
+    if os.path.exists(path):
+        return path
+    orig = ensure_original(digest, load_raw)
+    with open(orig, "rb") as f:
+        raw = f.read()
+    try:
+        data = _render(raw, VARIANTS[variant], fmt)
+    except (UnidentifiedImageError, OSError):
+        return None
+    write_atomic(path, data)
+    return path
+
+
+def _pick_format() -> str:
+    fmt = (request.args.get("fmt") or "").lower()
+    if fmt in FORMATS:
+        return fmt
+    return "webp" if request.accept_mimetypes["image/webp"] else "jpeg"
+
+
+def serve_image(digest: Optional[str], load_raw: Callable[[], Optional[bytes]],
+                mime: Optional[str] = None, *, private: bool = False):
+    """
+    Resposta HTTP para uma imagem identificada pelo hash do conteúdo.
+    - ?size=thumb|card|full  -> variante redimensionada (WebP se o navegador aceitar, senão JPEG)
+    - sem ?size              -> original, com o mime gravado
+    - ETag forte derivado do hash; If-None-Match responde 304 sem ler o blob
+    - Range / If-Range       -> 206 com o pedaço do arquivo em disco (send_file);
+                                intervalo fora do arquivo responde 416
+    - ?v=<hash> na URL       -> Cache-Control imutável de 1 ano
+    load_raw só é chamado quando o arquivo ainda não está no cache em disco.
+    """
+    if not digest:
+        # linha antiga sem hash gravado: calcula a partir do blob
+        raw = load_raw()
+        if not raw:
+            raise NotFound("Imagem não encontrada.")
+        digest = image_meta(raw)[0]
+        load_raw = lambda: raw
+
+    variant = (request.args.get("size") or "").lower()
+    if variant and variant not in VARIANTS:
+        variant = ""
+    fmt = _pick_format() if variant else None
+    etag = f"{digest[:32]}-{variant}.{fmt}" if variant else digest[:32]
+
+    if etag in request.if_none_match:
+        resp = Response(status=304)
+    else:
+        path = ensure_variant(digest, variant, fmt, load_raw) if variant else None
+        if path:
+            mimetype = FORMATS[fmt]
+        else:
+            path = ensure_original(digest, load_raw)
+            mimetype = mime or "image/jpeg"
+        try:
+            resp = send_file(path, mimetype=mimetype, etag=etag, conditional=True)
+        except RequestedRangeNotSatisfiable:
+            resp = Response(status=416)
+            resp.headers["Content-Range"] = f"bytes */{os.path.getsize(path)}"
+
+    resp.set_etag(etag)
+    scope = "private" if private else "public"
+    if request.args.get("v") and digest.startswith(request.args["v"]):
+        resp.headers["Cache-Control"] = f"{scope}, max-age={IMMUTABLE_MAX_AGE}, immutable"
+    else:
+        resp.headers["Cache-Control"] = f"{scope}, no-cache"
+    if variant:
+        resp.headers["Vary"] = "Accept"
+    return resp
+
+
+def read_upload(max_bytes: int = MAX_UPLOAD_BYTES) -> bytes:
+    """
+    Lê a imagem de um upload multipart/form-data (campo 'arquivo') ou de um
+    corpo cru com Content-Type image/*.
+    - o limite vale antes de ler: Content-Length maior já responde 413, e um
+      corpo sem Content-Length é cortado ao passar do limite
+    - no multipart o werkzeug grava o arquivo num SpooledTemporaryFile
+      (memória até 500KB, depois disco); daqui sai uma única cópia em bytes
+      para o pipeline, sem base64/data URL no caminho
+    """
+    # folga para os cabeçalhos das partes do multipart
+    request.max_content_length = max_bytes + 64 * 1024
+    if request.mimetype.startswith("image/"):
+        raw = request.stream.read(max_bytes + 1)
+    else:
+        arquivo = request.files.get(UPLOAD_FIELD)
+        if arquivo is None:
+            raise ValidationError(f"Envie a imagem no campo '{UPLOAD_FIELD}' (multipart/form-data).",
+                                  field=UPLOAD_FIELD)
+        raw = arquivo.stream.read(max_bytes + 1)
+    if not raw:
+        raise ValidationError("Arquivo vazio.", field=UPLOAD_FIELD)
+    if len(raw) > max_bytes:
+        raise RequestEntityTooLarge(f"Imagem excede {max_bytes // (1024 * 1024)}MB.")
+    return raw
+
+
+def backfill_hashes(model, blob_col, hash_col, apply_meta: Callable, batch_size: int = 100) -> int:
+    """
+    Preenche o hash (e metadados) de linhas gravadas antes da coluna existir.
+    apply_meta(obj, raw_bytes) grava os metadados no objeto. Retorna quantas linhas mudaram.
+    """
+    pk = model.__mapper__.primary_key[0]
+    ids = [i for (i,) in db.session.query(pk).filter(blob_col.isnot(None), hash_col.is_(None))]
+    for i in range(0, len(ids), batch_size):
+        for obj in model.query.options(undefer(blob_col)).filter(pk.in_(ids[i:i + batch_size])):
+            apply_meta(obj, obj.get_photo_bytes())
+        db.session.commit()
+    return len(ids)
@@ -0,0 +1,138 @@
+# service/pedidoExportService.py
+"""
+Exportação de pedidos (contabilidade) em CSV ou NDJSON, em streaming.
+
+- uma única consulta orders + order_items (LEFT JOIN) + email do usuário, só com as colunas exportadas
+- percorrida com yield_per (cursor do lado do servidor): memória constante,
+  sem COUNT e sem OFFSET, qualquer que seja o período
+- ordenada por (created_at, id_pedido), a ordem do índice ix_orders_created_id
+- CSV: uma linha por item (dados do pedido repetidos); NDJSON: um objeto por
+  pedido com a lista de itens
+"""
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+from typing import Iterator, Optional
+
+from sqlalchemy import func, select
+
+from app.erros import ValidationError
+from config.db import db
+from models.pedidoModel import Order, OrderItem
+from models.userModel import User
+
+FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+ITEM_COLUMNS = ("id_item", "produto_id", "produto_nome", "qtd", "preco_unit", "subtotal")
+CSV_COLUMNS = ("id_pedido", "created_at", "status", "total", "user_id", "user_email") + ITEM_COLUMNS
+EXPORT_CHUNK = 1000
+
+
+def detect_format(fmt: Optional[str]) -> str:
+    fmt = (fmt or "csv").lower()
+    if fmt == "jsonl":
+        fmt = "ndjson"
+    if fmt not in FORMATS:
+        raise ValidationError("Formato inválido (use csv ou ndjson).", field="format")
+    return fmt
+
+
+def _parse_data(s: Optional[str], field: str) -> Optional[datetime]:
+    if not s:
+        return None
+    try:
+        return datetime.strptime(s, "%Y-%m-%d")
+    except ValueError:
+        raise ValidationError("Data inválida (use AAAA-MM-DD).", field=field)
+
+
+def build_export_query(date_from: str = "", date_to: str = "", status: str = ""):
+    """Valida os filtros e monta o SELECT (ValidationError sai antes de começar o stream)."""
+    from service.pedidoService import _expand_status_filter
+
+    dt_from = _parse_data(date_from, "from")
+    dt_to = _parse_data(date_to, "to")
+    stmt = (
+        select(Order.id_pedido, Order.created_at, Order.status, Order.total, Order.user_id,
+               User.email.label("user_email"), OrderItem.id_item, OrderItem.produto_id,
+               OrderItem.produto_nome, OrderItem.qtd, OrderItem.preco_unit)
+        .join(User, Order.user_id == User.id_user)
+        .outerjoin(OrderItem, OrderItem.order_id == Order.id_pedido)
+    )
+    if dt_from:
+        stmt = stmt.where(Order.created_at >= dt_from)
+    if dt_to:
+        stmt = stmt.where(Order.created_at < dt_to + timedelta(days=1))  # dia inteiro
+    status_set = _expand_status_filter(status)
+    if status_set:
+        stmt = stmt.where(func.lower(Order.status).in_([s.lower() for s in status_set]))
+    return (
+        stmt.order_by(Order.created_at, Order.id_pedido, OrderItem.id_item)
+        .execution_options(yield_per=EXPORT_CHUNK)
+    )
+
+
+def _pedido(r) -> dict:
+    return {
+        "id_pedido": r.id_pedido,
+        "created_at": r.created_at.isoformat() if r.created_at else None,
+        "status": r.status,
+        "total": r.total,
+        "user_id": r.user_id,
+        "user_email": r.user_email,
+        "items": [],
+    }
+
+
+def _item(r) -> dict:
+    return {
+        "id_item": r.id_item,
+        "produto_id": r.produto_id,
+        "produto_nome": r.produto_nome,
+        "qtd": r.qtd,
+        "preco_unit": r.preco_unit,
+        "subtotal": round((r.qtd or 0) * (r.preco_unit or 0), 2),
+    }
+
+
+def export_orders(fmt: str, stmt) -> Iterator[str]:
+    """
+    Gera o arquivo em pedaços de ~EXPORT_CHUNK linhas. Algo sai antes da consulta
+    (cabeçalho CSV; no NDJSON um pedaço vazio) para a resposta começar na hora.
+    """
+    buf = io.StringIO()
+    writer = csv.writer(buf) if fmt == "csv" else None
+    if writer:
+        writer.writerow(CSV_COLUMNS)
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+    else:
+        # pedaço vazio: o servidor já manda status e headers enquanto a consulta roda
+        yield ""
+
+    atual: Optional[dict] = None
+    for chunk in db.session.execute(stmt).partitions():
+        for r in chunk:
+            if writer:
+                item = _item(r) if r.id_item is not None else {}  # pedido sem itens: colunas vazias
+                writer.writerow((r.id_pedido, r.created_at.isoformat() if r.created_at else "", r.status, r.total,
+                                 r.user_id, r.user_email, *(item.get(c) for c in ITEM_COLUMNS)))
+                continue
+            # NDJSON: linhas do mesmo pedido chegam juntas (ordenado por pedido)
+            if atual is None or atual["id_pedido"] != r.id_pedido:
+                if atual is not None:
+                    buf.write(json.dumps(atual, ensure_ascii=False))
+                    buf.write("\n")
+                atual = _pedido(r)
+            if r.id_item is not None:
+                atual["items"].append(_item(r))
+        if buf.tell():
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    if atual is not None:
+        yield json.dumps(atual, ensure_ascii=False) + "\n"
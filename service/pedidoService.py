@@ -1,24 +1,27 @@
 # service/orderService.py
 from datetime import datetime, timedelta
-from io import BytesIO
 from typing import Optional
-from flask import current_app, jsonify, send_file
-from sqlalchemy import func, or_
+from flask import current_app, jsonify
+from sqlalchemy import func, insert, or_, select, update
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import selectinload
 from config.db import db
 # utils_pedido_payload.py
 from datetime import datetime
 from typing import Optional
-from models.pedidoModel import Order, OrderItem        # ajuste o path se o arquivo tiver outro nome
+from models.pedidoModel import Order, OrderItem, OrderStatusHistory        # ajuste o path se o arquivo tiver outro nome
 from models.cartModel import Cart
-from models.produtoModel import produto
 from app.enums.cartEnum import CartStatus
 from app.erros import ValidationError
 from models.userModel import User
-from service.companieService import companieSerive
-from service.userService import get_user_by_id, get_user_public_info
-from utils.createRecibo import gerar_pdf_recibo_venda
+from service import reciboService
+from service.cartService import avalia_linhas, linhas_precificadas
+from service.produtoService import aplica_ajustes_estoque, catalog_cache
+from service.vendasService import registra_pedido, troca_status, troca_status_lote
+from utils.paginacao import cached_count, clear_counts, decode_cursor, encode_cursor, keyset_filter
+
+# ordenação do histórico admin (mais recente primeiro); id desempata para o cursor
+ADMIN_ORDER_KEYS = ((Order.created_at, True), (Order.id_pedido, True))
 
 STATUS_ALIASES = {
     "processed": {"processed", "processado", "andamento"},
@@ -26,6 +29,42 @@ STATUS_ALIASES = {
     "shipped":   {"shipped", "enviado"},
     "cancelled": {"cancelled", "cancelado"},
 }
+# transições permitidas entre os grupos de STATUS_ALIASES (cancelado é final);
+# status fora dos grupos (legado) podem ir para qualquer um
+TRANSICOES = {
+    "processed": {"shipped", "completed", "cancelled"},
+    "completed": {"shipped", "cancelled"},   # FINALIZADO = fechado no checkout
+    "shipped":   {"completed"},
+    "cancelled": set(),
+}
+MAX_BULK_STATUS = 5000
+BULK_CHUNK = 500
+
+def _status_group(status_val: str) -> Optional[str]:
+    s = (status_val or "").strip().lower()
+    for grupo, nomes in STATUS_ALIASES.items():
+        if s in {n.lower() for n in nomes}:
+            return grupo
+    return None
+
+def _status_canonico(status_val: str) -> Optional[str]:
+    """Grafia gravada no banco: o alias de STATUS_ALIASES como está escrito ('finalizado' -> 'FINALIZADO')."""
+    s = (status_val or "").strip().lower()
+    for nomes in STATUS_ALIASES.values():
+        for nome in nomes:
+            if nome.lower() == s:
+                return nome
+    return None
+
+def _transicao_invalida(atual: Optional[str], novo: str) -> Optional[str]:
+    """Motivo da recusa de atual -> novo pela regra de TRANSICOES (None = permitida)."""
+    origem, destino = _status_group(atual), _status_group(novo)
+    if (atual or "").lower() == novo.lower() or origem in (None, destino):
+        return None
+    if destino not in TRANSICOES[origem]:
+        return f"Transição não permitida: {atual} -> {novo}"
+    return None
+
 def _expand_status_filter(status_val: str):
     """Recebe 'processed' e expande para {'processed','processado','andamento'}.
        Se não estiver no mapa, usa o próprio valor."""
@@ -44,97 +83,103 @@ def _parse_date_yyyy_mm_dd(s: str):
     except Exception:
         return None
     
-def _get_open_cart(uid: int) -> Optional[Cart]:
-    return (
-        Cart.query
-        .options(selectinload(Cart.items))
-        .filter_by(id_usuario=uid, status=CartStatus.ABERTO.name, is_active=True)
-        .first()
-    )
-
-
 def create_order_from_cart(uid: int,
                            payment_method: str = "credit_card",
                            payment_data: Optional[dict] = None) -> Order:
     """
-    Converte o carrinho ABERTO do usuário em um Order + OrderItems.
-    Fecha o carrinho após sucesso.
+    Converte o carrinho ABERTO do usuário em um Order + OrderItems, numa única transação:
+    1. fecha o carrinho com UPDATE condicional (status ABERTO) — dois checkouts do mesmo
+       carrinho não geram dois pedidos
+    2. lê itens + produto atual numa consulta e valida como o carrinho (cartService.avalia_linhas):
+       produto indisponível, sem estoque ou com preço diferente do carrinho => ValidationError
+       (preço: field='precos_alterados'; o cliente faz POST /api/carrinho/reprice e confirma);
+       cobra o preço gravado no carrinho
+    3. baixa o estoque com um UPDATE condicional (estoque >= qtd) para todos os produtos;
+       se algum não casar, nada é gravado (sem venda além do estoque sob concorrência)
+    4. grava o pedido, os itens em lote, o rollup de vendas e o carrinho novo; um commit só
     Lança ValidationError para problemas de negócio e propaga SQLAlchemyError para o controller tratar como 500.
     """
-    cart = _get_open_cart(uid)
-    if not cart:
-        raise ValidationError("Carrinho vazio ou inexistente.")
-
-    # Filtra itens válidos (ativos e quantidade > 0)
-    valid_items = [
-        it for it in (cart.items or [])
-        if getattr(it, "is_active", True) and (it.quantidade or 0) > 0
-    ]
-    if not valid_items:
-        raise ValidationError("Carrinho sem itens válidos.")
-
-    order = Order(user_id=uid, total=0.0, status="FINALIZADO")
-    db.session.add(order)
-
-    total = 0.0
-
     try:
-        for it in valid_items:
-            # Tenta carregar o produto para snapshot de nome
-            prod: Optional[produto] = db.session.get(produto, it.id_produto)
-            # respeita soft-delete de produto (deleted != 0/True)
-            is_prod_ok = (
-                prod is not None and
-                getattr(prod, "is_active", True) and
-                (getattr(prod, "deleted", 0) in (0, False, None))
+        cart_id = db.session.execute(
+            select(Cart.id_cart)
+            .where(Cart.id_usuario == uid, Cart.status == CartStatus.ABERTO.name, Cart.is_active == True)
+            .order_by(Cart.id_cart)
+            .limit(1)
+        ).scalar()
+        if cart_id is None:
+            raise ValidationError("Carrinho vazio ou inexistente.")
+
+        fechado = db.session.execute(
+            update(Cart)
+            .where(Cart.id_cart == cart_id, Cart.status == CartStatus.ABERTO.name)
+            .values(status=CartStatus.CONVERTIDO.name, is_active=False, updated_at=datetime.utcnow()),
+            execution_options={"synchronize_session": False},
+        )
+        if fechado.rowcount != 1:
+            raise ValidationError("Carrinho já finalizado.")
+
+        # itens + produto atual numa consulta (mesma validação do GET /api/carrinho)
+        aval = avalia_linhas(linhas_precificadas(cart_id))
+        linhas = aval["linhas"]
+        if not linhas:
+            raise ValidationError("Carrinho sem itens válidos.")
+        nomes = {r.id_produto: r.nome or f"Produto #{r.id_produto}" for r, _ in linhas}
+        if aval["indisponiveis"]:
+            raise ValidationError("Produto indisponível: " + ", ".join(nomes[p] for p in aval["indisponiveis"]) + ".")
+        if aval["sem_estoque"]:
+            raise ValidationError("Estoque insuficiente para " + ", ".join(nomes[p] for p in aval["sem_estoque"]) + ".")
+        if aval["precos_alterados"]:
+            raise ValidationError(
+                "O preço mudou para " + ", ".join(nomes[p] for p in aval["precos_alterados"])
+                + ". Atualize o carrinho e confirme os novos valores.",
+                field="precos_alterados", details=aval["precos_alterados"],
             )
-            nome_snap = prod.nome if is_prod_ok else f"Produto #{it.id_produto}"
-
-            unit = float(it.preco_unitario)
-            qtd  = int(it.quantidade)
-
-            total += unit * qtd
-
-            db.session.add(OrderItem(
-                order        = order,
-                produto_id   = it.id_produto,
-                produto_nome = nome_snap,
-                qtd          = qtd,
-                preco_unit   = unit
-            ))
-
-            # controle de estoque — descomente se quiser abater:
-            if is_prod_ok:
-                 if prod.estoque < qtd:
-                     raise ValidationError(f"Estoque insuficiente para {prod.nome}.")
-                 prod.estoque -= qtd
-
-        order.total = round(total, 2)
 
-        # Fecha o carrinho
-        cart.status = CartStatus.FECHADO.name
-        cart.is_active = False
-
-        db.session.commit()
+        # baixa de estoque (quantidade somada por produto); o UPDATE condicional segura a concorrência
+        qtd_por_produto: dict[int, int] = {}
+        for r, _ in linhas:
+            qtd_por_produto[r.id_produto] = qtd_por_produto.get(r.id_produto, 0) + int(r.quantidade)
+        ajustes = [{"id": pid, "valor": -q, "delta": True, "esperado": None}
+                   for pid, q in qtd_por_produto.items()]
+        baixados = {r[0] for r in aplica_ajustes_estoque(ajustes)}
+        faltando = [pid for pid in qtd_por_produto if pid not in baixados]
+        if faltando:
+            raise ValidationError("Estoque insuficiente para " + ", ".join(nomes[p] for p in faltando) + ".")
+
+        # cobra o preço que o usuário viu no carrinho (igual ao atual: conferido acima)
+        total = sum(float(r.preco_unitario) * int(r.quantidade) for r, _ in linhas)
+        order = Order(user_id=uid, total=round(total, 2), status="FINALIZADO")
+        db.session.add(order)
+        db.session.flush()
+
+        itens = [
+            {
+                "order_id": order.id_pedido,
+                "produto_id": r.id_produto,
+                "produto_nome": nomes[r.id_produto],
+                "qtd": int(r.quantidade),
+                "preco_unit": float(r.preco_unitario),
+            }
+            for r, _ in linhas
+        ]
+        db.session.execute(insert(OrderItem), itens)
+        registra_pedido(order.created_at, order.status, order.total,
+                        [(i["produto_id"], i["produto_nome"], i["qtd"], i["preco_unit"]) for i in itens])
 
-        #reabrir um novo carrinho vazio:
-        new_cart = Cart(id_usuario=uid, status=CartStatus.ABERTO.name, is_active=True)
-        db.session.add(new_cart)
+        # reabre um novo carrinho vazio
+        db.session.add(Cart(id_usuario=uid, status=CartStatus.ABERTO.name, is_active=True))
         db.session.commit()
 
-        return order
-
-    except ValidationError:
-        db.session.rollback()
-        raise
-    except SQLAlchemyError:
-        db.session.rollback()
-        raise
-    except Exception as e:
+    except Exception:
         db.session.rollback()
-        # Mapeia qualquer erro inesperado como ValidationError genérica ou deixe para o controller 500
         raise
 
+    # estoque mudou: páginas do catálogo em cache ficaram velhas
+    catalog_cache.bump()
+    clear_counts("orders")
+    reciboService.schedule(order.id_pedido)
+    return order
+
 
 def list_orders_by_user(uid: int) -> list[Order]:
     return (
@@ -162,27 +207,144 @@ def update_order_status(order_id: int, new_status: str,
     """
     Regra simples:
       - Usuário (não-admin) só pode cancelar o próprio pedido quando status == 'andamento'
-      - Admin pode alterar livremente (ajuste conforme necessário)
+      - Admin segue TRANSICOES, como na troca em lote (recusa com field='transicao')
+    O status é gravado na grafia de STATUS_ALIASES (ex.: 'FINALIZADO'), a mesma dos rollups.
     """
     order = Order.query.get_or_404(order_id)
 
-    new_status = (new_status or "").strip().lower()
-    if not new_status:
-        raise ValidationError("Campo 'status' é obrigatório.")
+    if not (new_status or "").strip():
+        raise ValidationError("Campo 'status' é obrigatório.", field="status")
+    new_status = _status_canonico(new_status)
+    if new_status is None:
+        raise ValidationError("Status desconhecido.", field="status")
 
     if not is_admin:
         if order.user_id != acting_user_id:
             raise ValidationError("Acesso negado ao pedido.")
         if order.status != "andamento" or new_status != "cancelado":
             raise ValidationError("Operação não permitida.")
+    motivo = _transicao_invalida(order.status, new_status)
+    if motivo:
+        raise ValidationError(motivo, field="transicao")
 
     try:
+        troca_status(order.id_pedido, order.created_at, order.total, order.status, new_status)
+        if order.status != new_status:
+            db.session.add(OrderStatusHistory(order_id=order.id_pedido, status_de=order.status,
+                                              status_para=new_status, user_id=acting_user_id))
         order.status = new_status
         db.session.commit()
+        clear_counts("orders")
+        reciboService.invalidate(order.id_pedido)
         return order
     except SQLAlchemyError:
         db.session.rollback()
         raise
+
+def bulk_update_order_status(new_status: str, acting_user_id: int, *,
+                             ids: Optional[list] = None, filters: Optional[dict] = None) -> dict:
+    """
+    Muda o status de vários pedidos (admin) numa transação:
+    - alvo: lista de ids OU filtros do histórico (status, date_from, date_to, q — mesma
+      semântica de list_orders_admin), até MAX_BULK_STATUS pedidos
+    - cada pedido passa pela regra de TRANSICOES; os válidos mudam com UPDATEs por
+      blocos de ids (WHERE status ainda é o lido), com rollup de vendas e histórico em lote
+    Retorna contagens e o resultado por id (alterado, inalterado ou o motivo da recusa).
+    """
+    if not (new_status or "").strip():
+        raise ValidationError("Campo 'status' é obrigatório.", field="status")
+    new_status = _status_canonico(new_status)
+    if new_status is None:
+        raise ValidationError("Status desconhecido.", field="status")
+
+    colunas = select(Order.id_pedido, Order.status, Order.created_at, Order.total)
+    if ids:
+        try:
+            ids = list(dict.fromkeys(int(i) for i in ids))
+        except (TypeError, ValueError):
+            raise ValidationError("'ids' deve ser uma lista de números.", field="ids")
+        if len(ids) > MAX_BULK_STATUS:
+            raise ValidationError(f"No máximo {MAX_BULK_STATUS} pedidos por vez.", field="ids")
+    else:
+        filters = {k: (filters or {}).get(k) or "" for k in ("status", "date_from", "date_to", "q")}
+        if not any(filters.values()):
+            raise ValidationError("Informe 'ids' ou ao menos um filtro.", field="filter")
+
+    try:
+        # FOR UPDATE (PostgreSQL/MySQL): ninguém muda esses pedidos até o commit
+        if ids:
+            linhas = []
+            for i in range(0, len(ids), BULK_CHUNK):
+                linhas += db.session.execute(
+                    colunas.where(Order.id_pedido.in_(ids[i:i + BULK_CHUNK])).with_for_update()
+                ).all()
+        else:
+            linhas = db.session.execute(
+                colunas.join(User, Order.user_id == User.id_user)
+                .where(*admin_order_filters(**filters))
+                .order_by(Order.id_pedido)
+                .limit(MAX_BULK_STATUS + 1)
+                .with_for_update(of=Order)
+            ).all()
+        if not ids and len(linhas) > MAX_BULK_STATUS:
+            raise ValidationError(f"Mais de {MAX_BULK_STATUS} pedidos no filtro; estreite o período.", field="filter")
+
+        encontrados = {r.id_pedido: r for r in linhas}
+        resultados, mover = [], []
+        for oid in (ids or list(encontrados)):
+            r = encontrados.get(oid)
+            if r is None:
+                resultados.append({"id": oid, "ok": False, "error": "Pedido não encontrado"})
+            elif (r.status or "").lower() == new_status.lower():
+                resultados.append({"id": oid, "ok": True, "status": r.status, "alterado": False})
+            elif _transicao_invalida(r.status, new_status):
+                resultados.append({"id": oid, "ok": False, "status": r.status,
+                                   "error": _transicao_invalida(r.status, new_status)})
+            else:
+                mover.append(r)
+                resultados.append({"id": oid, "ok": True, "status_anterior": r.status,
+                                   "status": new_status, "alterado": True})
+
+        # um UPDATE por (status antigo, bloco de ids): só muda quem ainda está no status lido
+        por_status: dict = {}
+        for r in mover:
+            por_status.setdefault(r.status, []).append(r.id_pedido)
+        for antigo, oids in por_status.items():
+            for i in range(0, len(oids), BULK_CHUNK):
+                bloco = oids[i:i + BULK_CHUNK]
+                res = db.session.execute(
+                    update(Order)
+                    .where(Order.id_pedido.in_(bloco), Order.status == antigo)
+                    .values(status=new_status),
+                    execution_options={"synchronize_session": False},
+                )
+                if res.rowcount != len(bloco):
+                    raise ValidationError("Pedidos alterados por outra operação; tente de novo.")
+
+        troca_status_lote([(r.id_pedido, r.created_at, r.total, r.status) for r in mover], new_status)
+        if mover:
+            agora = datetime.utcnow()
+            db.session.execute(insert(OrderStatusHistory), [
+                {"order_id": r.id_pedido, "status_de": r.status, "status_para": new_status,
+                 "user_id": acting_user_id, "created_at": agora}
+                for r in mover
+            ])
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    if mover:
+        clear_counts("orders")
+        for r in mover:
+            reciboService.invalidate(r.id_pedido)
+    return {
+        "status": new_status,
+        "alterados": len(mover),
+        "falhas": sum(1 for r in resultados if not r["ok"]),
+        "resultados": resultados,
+    }
+
 def _parse_date_yyyy_mm_dd(s: str):
     if not s:
         return None
@@ -193,52 +355,83 @@ def _parse_date_yyyy_mm_dd(s: str):
     except Exception:
         return None
 
-def list_orders_admin(*, status: str = "", date_from: str = "", date_to: str = "", q: str = "",
-                      page: int = 1, per_page: int = 50):
+def admin_order_filters(*, status: str = "", date_from: str = "", date_to: str = "", q: str = "") -> list:
     """
-    Lista pedidos para o painel admin com filtros.
-    - status: aceita 'processed', 'completed', etc. (com aliases pt/en)
-    - date_from / date_to: 'YYYY-MM-DD'
-    - q: busca por id do pedido, nome do usuário ou email
-    - paginação
+    Condições WHERE dos filtros do histórico admin (status com aliases, período
+    'YYYY-MM-DD' com o dia final inteiro, busca por id/nome/email).
+    A query precisa ter o join Order -> User.
     """
+    conds = []
     status_set = _expand_status_filter(status)
-    dt_from = _parse_date_yyyy_mm_dd(date_from)
-    dt_to   = _parse_date_yyyy_mm_dd(date_to)
-    if dt_to:
-        # incluir o dia inteiro
-        dt_to = dt_to + timedelta(days=1) - timedelta(seconds=1)
-
-    # Query base com join no usuário (para poder buscar por nome/email)
-    query = db.session.query(Order, User).join(User, Order.user_id == User.id_user)
-
     if status_set:
-        query = query.filter(func.lower(Order.status).in_([s.lower() for s in status_set]))
+        conds.append(func.lower(Order.status).in_([s.lower() for s in status_set]))
 
+    dt_from = _parse_date_yyyy_mm_dd(date_from)
+    dt_to   = _parse_date_yyyy_mm_dd(date_to)
     if dt_from:
-        query = query.filter(Order.created_at >= dt_from)
+        conds.append(Order.created_at >= dt_from)
     if dt_to:
-        query = query.filter(Order.created_at <= dt_to)
+        # incluir o dia inteiro
+        conds.append(Order.created_at <= dt_to + timedelta(days=1) - timedelta(seconds=1))
 
     if q:
         q_norm = f"%{q.strip().lower()}%"
         # Se q for número, permite filtrar por id também
-        conds = [
-            func.lower(User.name).like(q_norm),
+        busca = [
+            func.lower(User.nome).like(q_norm),
             func.lower(User.email).like(q_norm),
         ]
         if q.isdigit():
-            conds.append(Order.id_pedido == int(q))
-        query = query.filter(or_(*conds))
+            busca.append(Order.id_pedido == int(q))
+        conds.append(or_(*busca))
+    return conds
 
-    # Ordena do mais recente para o mais antigo
-    query = query.order_by(Order.created_at.desc())
+def list_orders_admin(*, status: str = "", date_from: str = "", date_to: str = "", q: str = "",
+                      page: int = 1, per_page: int = 50, cursor: str = "", with_total: bool = True):
+    """
+    Lista pedidos para o painel admin com filtros.
+    - status: aceita 'processed', 'completed', etc. (com aliases pt/en)
+    - date_from / date_to: 'YYYY-MM-DD'
+    - q: busca por id do pedido, nome do usuário ou email
+    - paginação: por página (offset) ou por cursor (next_cursor da resposta anterior)
+    - with_total=False: não conta; o total é um COUNT cacheado por alguns segundos
+    """
+    # Query base com join no usuário (para poder buscar por nome/email)
+    query = (
+        db.session.query(Order, User)
+        .join(User, Order.user_id == User.id_user)
+        .filter(*admin_order_filters(status=status, date_from=date_from, date_to=date_to, q=q))
+    )
 
     # Paginação
     page = max(1, int(page or 1))
     per_page = max(1, min(int(per_page or 50), 200))
-    total = query.count()
-    rows = query.limit(per_page).offset((page - 1) * per_page).all()
+    total = None
+    if with_total:
+        key = ("orders", status, date_from, date_to, (q or "").strip().lower())
+        total = cached_count(key, lambda: query.with_entities(func.count(Order.id_pedido)).scalar())
+
+    # Ordena do mais recente para o mais antigo
+    query = query.order_by(*[c.desc() for c, _ in ADMIN_ORDER_KEYS])
+
+    if cursor:
+        created, last_id = decode_cursor(cursor, "admin-orders", len(ADMIN_ORDER_KEYS))
+        try:
+            created = datetime.fromisoformat(created)
+        except (TypeError, ValueError):
+            raise ValidationError("Cursor inválido.", field="cursor")
+        query = query.filter(keyset_filter(ADMIN_ORDER_KEYS, (created, last_id)))
+    else:
+        query = query.offset((page - 1) * per_page)
+
+    # uma linha a mais só para saber se existe próxima página
+    rows = query.limit(per_page + 1).all()
+    has_next = len(rows) > per_page
+    rows = rows[:per_page]
+    next_cursor = None
+    if has_next:
+        last = rows[-1][0]
+        next_cursor = encode_cursor("admin-orders", (last.created_at, last.id_pedido))
 
     items = []
     for order, user in rows:
@@ -249,16 +442,15 @@ def list_orders_admin(*, status: str = "", date_from: str = "", date_to: str = "
         d["user_email"] = getattr(user, "email", None)
         items.append(d)
 
-    return {
-        "items": items,
-        "pagination": {
-            "page": page,
-            "per_page": per_page,
-            "total": total,
-            "has_prev": page > 1,
-            "has_next": (page * per_page) < total
-        }
+    pagination = {
+        "per_page": per_page,
+        "total": total,
+        "has_next": has_next,
+        "next_cursor": next_cursor,
     }
+    if not cursor:
+        pagination.update({"page": page, "has_prev": page > 1})
+    return {"items": items, "pagination": pagination}
 
 def get_order_by_id(order_id: int) -> dict | None:
     """
@@ -312,7 +504,7 @@ def get_order_by_id(order_id: int) -> dict | None:
             # extras do produto (se existir relação)
             "produto": {
                 "nome": getattr(produto, "nome", None),
-                "imagem": getattr(produto, "imagem", None),
+                "imagem": getattr(produto, "imagem_url", None),
                 "preco": float(getattr(produto, "preco", 0) or 0),
             } if produto else None
         })
@@ -345,29 +537,10 @@ def _merge_user_into_venda(venda: dict, user_info: dict | None) -> dict:
     }
     return venda
 def admin_get_order_receipt(order_id: int):
-    """PDF do RECIBO (somente Admin)."""
+    """PDF do RECIBO (somente Admin), servido do cache em disco (service.reciboService)."""
 
     try:
-        venda = get_order_by_id(order_id)
-        if not venda:
-            return jsonify({"error": "Pedido não encontrado"}), 404
-
-        comp = companieSerive.get_companie(1)
-        if not comp:
-            return jsonify({"error": "Empresa não configurada"}), 400
-        
-        user = get_user_public_info(venda["user_id"])
-        if not user:
-            return jsonify({"error": "Usuário do pedido não encontrado"}), 400
-        venda = _merge_user_into_venda(venda, user)
-
-        pdf_bytes = gerar_pdf_recibo_venda(comp, venda)
-        return send_file(
-            BytesIO(pdf_bytes),
-            mimetype="application/pdf",
-            as_attachment=False,
-            download_name=f"recibo_venda_{order_id:04d}.pdf"
-        )
+        return reciboService.serve_receipt(order_id, f"recibo_venda_{order_id:04d}.pdf")
     except SQLAlchemyError:
         current_app.logger.exception("Erro de banco ao gerar recibo")
         return jsonify({"error": "Erro de banco de dados."}), 500
@@ -376,23 +549,12 @@ def admin_get_order_receipt(order_id: int):
         return jsonify({"error": "Erro inesperado."}), 500
 
 def my_order_receipt(uid:Optional[int], order_id: int, is_admin: bool = False):
-    """PDF do RECIBO para o próprio usuário (ou admin)."""
+    """PDF do RECIBO para o próprio usuário (ou admin); mesmo PDF em cache do admin."""
 
     try:
         # reutiliza regra de acesso já existente
-        order = get_order_for_user(uid, order_id, is_admin)
-        venda = order.to_dict()  # mesmo formato do get_order_by_id
-        comp = companieSerive.get_companie(1)
-        if not comp:
-            return jsonify({"error": "Empresa não configurada"}), 400
-
-        pdf_bytes = gerar_pdf_recibo_venda(comp, venda)
-        return send_file(
-            BytesIO(pdf_bytes),
-            mimetype="application/pdf",
-            as_attachment=False,
-            download_name=f"meu_recibo_{order_id:04d}.pdf"
-        )
+        get_order_for_user(uid, order_id, is_admin)
+        return reciboService.serve_receipt(order_id, f"meu_recibo_{order_id:04d}.pdf")
     except ValidationError as ve:
         return jsonify({"error": str(ve)}), 403
     except SQLAlchemyError:
@@ -400,4 +562,4 @@ def my_order_receipt(uid:Optional[int], order_id: int, is_admin: bool = False):
         return jsonify({"error": "Erro de banco de dados."}), 500
     except Exception:
         current_app.logger.exception("Erro inesperado ao gerar recibo user")
-        return jsonify({"error": "Erro inesperado."}), 500
\ No newline at end of file
+        return jsonify({"error": "Erro inesperado."}), 500
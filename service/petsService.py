@@ -3,9 +3,14 @@ from config.db import db
 from models.petsModel import Pet
 from models.vacinaModel import Vaccine
 from models.consultasModel import Consultation
+from models.userModel import User
+from sqlalchemy import select
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
+from sqlalchemy.orm import lazyload, selectinload, undefer
 from flask import current_app
-import gzip, base64, re, binascii
+import base64, re, binascii
+from utils.imagem import ingest_image
+from utils.paginacao import decode_cursor, encode_cursor, keyset_filter
 
 DATE_FMT = "%Y-%m-%d"
 # regex para dataURL (quando vier do front)
@@ -18,9 +23,12 @@ class ValidationError(ValueError):
         self.field = field
 
 def _set_photo_from_payload(p: Pet, data: Dict[str, Any]):
-    """Aceita 'photo' como dataURL base64 e compacta com gzip."""
+    """
+    Aceita 'photo' como dataURL base64; o pipeline (utils.imagem) valida e re-encoda fora da thread.
+    A própria photo_url (como vem no GET) significa foto inalterada.
+    """
     photo = data.get("photo")
-    if not photo:
+    if not photo or photo == p.photo_url:
         return
     m = DATA_URL_RE.match(photo)
     if not m:
@@ -34,23 +42,61 @@ def _set_photo_from_payload(p: Pet, data: Dict[str, Any]):
     if len(raw) > MAX_PHOTO_BYTES:
         raise ValidationError(f"Foto excede {MAX_PHOTO_BYTES//(1024*1024)}MB.", field="photo")
 
+    p.set_imagem(ingest_image(raw))
+
+
+def set_pet_photo(pet_id: int, raw: bytes, owner_id: Optional[int], *, is_admin: bool = False) -> Pet:
+    """
+    Troca a foto do pet a partir dos bytes do upload (PUT /pets/:id/photo).
+    Só o dono ou admin; para os demais lança PermissionError (403 na rota).
+    """
+    p = Pet.query.get_or_404(pet_id)
+    if not is_admin and p.dono != owner_id:
+        raise PermissionError("Acesso negado ao pet.")
+    p.set_imagem(ingest_image(raw))
     try:
-        p.foto_bloob = gzip.compress(raw, compresslevel=6)
-        if hasattr(p, "foto_mime"):
-            p.foto_mime = m.group('mime')[:50]
-    except Exception as e:
-        raise ValidationError("Falha ao comprimir a foto.", field="photo") from e
+        db.session.commit()
+        return p
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        current_app.logger.exception("Erro de banco ao gravar foto do pet")
+        raise RuntimeError("Erro de banco ao gravar foto do pet.") from e
 
 
-def list_pets(owner_id: Optional[int]) -> List[Pet]:
-    q = Pet.query
+PET_CHILDREN = ("vaccines", "consultations")
+
+
+def parse_include(raw: Optional[str]) -> Tuple[str, ...]:
+    """'?include=vaccines,consultations' -> filhos pedidos, na ordem de PET_CHILDREN."""
+    pedidos = {s.strip().lower() for s in (raw or "").split(",") if s.strip()}
+    invalidos = pedidos - set(PET_CHILDREN)
+    if invalidos:
+        raise ValidationError(f"include inválido: {', '.join(sorted(invalidos))} (use {', '.join(PET_CHILDREN)}).",
+                              field="include")
+    return tuple(c for c in PET_CHILDREN if c in pedidos)
+
+
+def pet_loader_options(include: Tuple[str, ...] = ()) -> list:
+    """
+    Perfil de carga das listas de pets: resumo = só a linha do pet (sem o JOIN do dono
+    e sem os selectin de prontuários/filhos do model); detalhe = + os filhos pedidos.
+    """
+    opts = [lazyload(Pet.owner), lazyload(Pet.prontuarios)]
+    for filho in PET_CHILDREN:
+        rel = getattr(Pet, filho)
+        opts.append(selectinload(rel) if filho in include else lazyload(rel))
+    return opts
+
+
+def list_pets(owner_id: Optional[int], include: Tuple[str, ...] = ()) -> List[Pet]:
+    q = Pet.query.options(*pet_loader_options(include))
     
     if owner_id:
         q = q.filter_by(dono=owner_id, deleted = 0)
     return q.order_by(Pet.id_pet.desc()).all()
 
 
-from datetime import datetime
+from datetime import date, datetime, timedelta
 
 def create_pet(owner_id: Optional[int], data: Dict[str, Any]) -> Pet:
     nome = (data.get("name") or data.get("nome") or "").strip()
@@ -178,6 +224,15 @@ class ValidationError(ValueError):
         super().__init__(message)
         self.field = field
 
+def parse_date(value: Optional[str], field: str) -> Optional[date]:
+    """'YYYY-MM-DD' -> date (vazio -> None); ValidationError no campo se o formato não bater."""
+    if not value:
+        return None
+    try:
+        return datetime.strptime(str(value).strip(), DATE_FMT).date()
+    except ValueError:
+        raise ValidationError("Formato de data inválido (use YYYY-MM-DD).", field=field)
+
 # ----------------- Vacinas -----------------
 def add_vaccine(pet_id: int, data: Dict[str, Any]) -> Vaccine:
     # FK obrigatória
@@ -193,24 +248,11 @@ def add_vaccine(pet_id: int, data: Dict[str, Any]) -> Vaccine:
     if not date_str:
         raise ValidationError("Data é obrigatória.", field="date")
 
-    # (Se precisar converter a coluna para date, faça aqui. Se seu modelo aceita string, pode passar direto.)
-    # Vou normalizar para 'YYYY-MM-DD'
-    try:
-        _ = datetime.strptime(date_str, DATE_FMT).date()
-    except ValueError:
-        raise ValidationError("Formato de data inválido (use YYYY-MM-DD).", field="date")
-
-    if next_str:
-        try:
-            _ = datetime.strptime(next_str, DATE_FMT).date()
-        except ValueError:
-            raise ValidationError("Formato de data inválido (use YYYY-MM-DD).", field="next")
-
     v = Vaccine(
         pet_id=pet_id,
         name=name,
-        date=date_str,
-        next=next_str,
+        date=parse_date(date_str, "date"),
+        next=parse_date(next_str, "next"),
         notes=notes
     )
     try:
@@ -243,6 +285,83 @@ def delete_vaccine(pet_id: int, vac_id: int) -> None:
         raise RuntimeError("Erro de banco ao remover vacina.") from e
 
 
+# --------- Vacinas a vencer (clínica) ---------
+DUE_DEFAULT_DAYS = 14
+DUE_MAX_DAYS = 365
+DUE_KEYS = ((Vaccine.next, False), (Vaccine.id_vacina, False))  # = ix_vaccines_next
+WITHIN_RE = re.compile(r"^(\d+)\s*([dw]?)$")
+
+
+def parse_within(raw: Optional[str]) -> int:
+    """'14d', '2w' ou '14' -> dias (padrão DUE_DEFAULT_DAYS, até DUE_MAX_DAYS)."""
+    if not raw:
+        return DUE_DEFAULT_DAYS
+    m = WITHIN_RE.match(str(raw).strip().lower())
+    if not m:
+        raise ValidationError("within inválido (use, por exemplo, 14d ou 2w).", field="within")
+    dias = int(m.group(1)) * (7 if m.group(2) == "w" else 1)
+    if not 0 < dias <= DUE_MAX_DAYS:
+        raise ValidationError(f"within deve ficar entre 1d e {DUE_MAX_DAYS}d.", field="within")
+    return dias
+
+
+def vaccines_due(within_days: int, *, per_page: int = 50, cursor: str = "",
+                 hoje: Optional[date] = None) -> Dict[str, Any]:
+    """
+    Vacinas com a próxima dose entre hoje e hoje + within_days, na clínica toda.
+    Uma consulta só: range em ix_vaccines_next (next, id_vacina) com o pet e o
+    contato do dono no mesmo SELECT; paginação por cursor nessa mesma ordem.
+    """
+    hoje = hoje or date.today()
+    per_page = max(1, min(int(per_page or 50), 200))
+    stmt = (
+        select(Vaccine.id_vacina, Vaccine.name, Vaccine.date, Vaccine.next, Vaccine.pet_id,
+               Pet.nome.label("pet_nome"), Pet.species, Pet.dono,
+               User.nome.label("dono_nome"), User.email, User.numero, User.deleted.label("dono_deleted"))
+        .join(Pet, Pet.id_pet == Vaccine.pet_id)
+        .outerjoin(User, User.id_user == Pet.dono)
+        .where(Vaccine.next >= hoje, Vaccine.next <= hoje + timedelta(days=within_days),
+               Vaccine.deleted == 0, Pet.deleted == 0)
+        .order_by(*[c for c, _ in DUE_KEYS])
+    )
+    if cursor:
+        proxima, last_id = decode_cursor(cursor, "vaccines-due", len(DUE_KEYS))
+        try:
+            proxima = date.fromisoformat(proxima)
+        except (TypeError, ValueError):
+            raise ValidationError("Cursor inválido.", field="cursor")
+        stmt = stmt.where(keyset_filter(DUE_KEYS, (proxima, last_id)))
+
+    # uma linha a mais só para saber se existe próxima página
+    rows = db.session.execute(stmt.limit(per_page + 1)).all()
+    has_next = len(rows) > per_page
+    rows = rows[:per_page]
+
+    items = []
+    for r in rows:
+        dono = None
+        if r.dono and not r.dono_deleted:
+            dono = {"id": r.dono, "name": r.dono_nome, "email": r.email, "phone": r.numero}
+        items.append({
+            "id": r.id_vacina,
+            "name": r.name,
+            "date": r.date.isoformat() if r.date else None,
+            "next": r.next.isoformat(),
+            "dias": (r.next - hoje).days,
+            "pet": {"id": r.pet_id, "name": r.pet_nome, "species": r.species},
+            "owner": dono,
+        })
+    return {
+        "within_days": within_days,
+        "items": items,
+        "pagination": {
+            "per_page": per_page,
+            "has_next": has_next,
+            "next_cursor": encode_cursor("vaccines-due", (rows[-1].next, rows[-1].id_vacina)) if has_next else None,
+        },
+    }
+
+
 # --------------- Consultas -----------------
 def add_consultation(pet_id: int, data: Dict[str, Any]) -> Consultation:
     Pet.query.get_or_404(pet_id)
@@ -253,14 +372,10 @@ def add_consultation(pet_id: int, data: Dict[str, Any]) -> Consultation:
 
     if not date_str:
         raise ValidationError("Data é obrigatória.", field="date")
-    try:
-        _ = datetime.strptime(date_str, DATE_FMT).date()
-    except ValueError:
-        raise ValidationError("Formato de data inválido (use YYYY-MM-DD).", field="date")
 
     c = Consultation(
         pet_id=pet_id,
-        date=date_str,
+        date=parse_date(date_str, "date"),
         reason=reason,
         notes=notes
     )
@@ -299,7 +414,7 @@ def get_pet_photo_bytes(pid: int) -> Tuple[bytes, str]:
     """
     import gzip as _gzip
 
-    p = Pet.query.get_or_404(pid)
+    p = Pet.query.options(undefer(Pet.foto_bloob)).filter_by(id_pet=pid).first_or_404()
     if not p.foto_bloob:
         raise FileNotFoundError("Foto não encontrada")
 
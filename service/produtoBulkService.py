@@ -0,0 +1,237 @@
+# service/produtoBulkService.py
+"""
+Importação/exportação do catálogo em lote (CSV ou JSONL).
+
+Importação:
+- lê o arquivo linha a linha (não carrega o upload inteiro em memória)
+- valida cada linha com as mesmas regras do create_produto (valida_produto)
+- grava em lotes: um INSERT executemany + indexação FTS + commit por lote
+- imagens (data URL na coluna 'imagem') passam pelo pipeline de utils.imagem
+  no pool de processos compartilhado com o upload (map_images)
+- linhas inválidas não interrompem o import: voltam no relatório de erros
+
+Exportação: gerador que percorre o catálogo com yield_per (memória constante).
+"""
+import csv
+import io
+import json
+import os
+from collections import namedtuple
+from typing import Any, Dict, Iterator, Optional
+
+from flask import current_app
+from sqlalchemy import insert, select
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.erros import ValidationError
+from config.db import db
+from models.produtoModel import produto
+from service import buscaService
+from service.produtoService import catalogo_alterado, decode_data_url, valida_produto
+from utils.imagem import map_images, process_image
+
+FORMATS = {
+    "csv": "text/csv",
+    "jsonl": "application/x-ndjson",
+}
+EXPORT_COLUMNS = ("id", "nome", "descricao", "preco", "estoque", "categoria", "especie", "is_active", "imagem_url")
+BATCH_SIZE = 500
+BATCH_IMG_BYTES = 64 * 1024 * 1024  # fecha o lote antes se as imagens somarem isso
+MAX_ERRORS = 1000                   # relatório truncado a partir daqui
+EXPORT_CHUNK = 1000
+
+_Indexavel = namedtuple("_Indexavel", "id_produto nome categoria especie descricao")
+
+
+def detect_format(fmt: Optional[str], filename: Optional[str], mimetype: Optional[str]) -> str:
+    """Formato pelo ?format=, senão pela extensão do arquivo, senão pelo Content-Type."""
+    fmt = (fmt or "").lower()
+    if not fmt and filename:
+        ext = os.path.splitext(filename)[1].lower().lstrip(".")
+        fmt = "jsonl" if ext in ("jsonl", "ndjson") else ext
+    if not fmt and mimetype:
+        fmt = next((k for k, v in FORMATS.items() if v == mimetype), "")
+        if mimetype == "application/jsonl":
+            fmt = "jsonl"
+    if fmt not in FORMATS:
+        raise ValidationError("Formato inválido (use csv ou jsonl).", field="format")
+    return fmt
+
+
+def _bool(value, default: bool = True) -> bool:
+    if value is None or value == "":
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ("1", "true", "t", "sim", "s", "yes", "y")
+
+
+def iter_rows(stream, fmt: str) -> Iterator[tuple[int, Optional[Dict[str, Any]], Optional[str]]]:
+    """Gera (número da linha, dados, erro) a partir de um stream binário."""
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    if fmt == "csv":
+        reader = csv.DictReader(text)
+        while True:
+            try:
+                row = next(reader)
+            except StopIteration:
+                return
+            except csv.Error as e:
+                # linha mal formada (ex.: campo grande demais): o reader segue na próxima;
+                # DictReader.line_num só é atualizado em leitura bem-sucedida
+                yield reader.reader.line_num, None, f"CSV inválido: {e}."
+                continue
+            yield reader.line_num, row, None
+    for n, line in enumerate(text, 1):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError:
+            yield n, None, "JSON inválido."
+            continue
+        if not isinstance(data, dict):
+            yield n, None, "Cada linha deve ser um objeto JSON."
+            continue
+        yield n, data, None
+
+
+def _erro(report: dict, linha: int, mensagem: str, field: Optional[str] = None):
+    if len(report["erros"]) >= MAX_ERRORS:
+        report["erros_omitidos"] += 1
+        return
+    item = {"linha": linha, "erro": mensagem}
+    if field:
+        item["field"] = field
+    report["erros"].append(item)
+
+
+def _processa_imagem(raw: bytes):
+    """process_image para o pool: devolve o erro em vez de levantar (um arquivo ruim não derruba o lote)."""
+    try:
+        return process_image(raw)
+    except ValidationError as e:
+        return str(e)
+
+
+def _insere(rows: list) -> list:
+    """
+    INSERT executemany com RETURNING dos ids na ordem das linhas.
+    Bancos sem INSERT ... RETURNING (MySQL): um INSERT por linha, lendo o id gerado.
+    """
+    if db.engine.dialect.insert_returning:
+        return db.session.execute(
+            insert(produto).returning(produto.id_produto, sort_by_parameter_order=True),
+            rows,
+        ).scalars().all()
+    return [db.session.execute(insert(produto).values(**row)).inserted_primary_key[0] for row in rows]
+
+
+def _grava_lote(lote: list, report: dict):
+    """lote: [(linha, colunas, (raw, mime) | None)]. Um INSERT executemany + FTS + commit."""
+    com_imagem = [(linha, row, img) for linha, row, img in lote if img]
+    recusadas = set()
+    if com_imagem:
+        raws = [raw for _, _, (raw, _) in com_imagem]
+        results = map_images(_processa_imagem, raws)
+        for (linha, row, _), img in zip(com_imagem, results):
+            if isinstance(img, str):
+                _erro(report, linha, img, "imagem")
+                recusadas.add(linha)
+                continue
+            row.update(imagem_bloob=img.blob, imagem_mime=img.mime, imagem_hash=img.hash,
+                       imagem_width=img.width, imagem_height=img.height)
+
+    lote = [item for item in lote if item[0] not in recusadas]
+    if not lote:
+        return
+    rows = [row for _, row, _ in lote]
+    try:
+        ids = _insere(rows)
+        buscaService.index_rows([
+            _Indexavel(i, r["nome"], r["categoria"], r["especie"], r["descricao"])
+            for i, r in zip(ids, rows) if r["is_active"]
+        ])
+        db.session.commit()
+        report["inseridos"] += len(ids)
+    except SQLAlchemyError:
+        db.session.rollback()
+        current_app.logger.exception("Erro de banco ao importar lote de produtos")
+        for linha, _, _ in lote:
+            _erro(report, linha, "Falha ao gravar o lote desta linha.")
+
+
+def import_produtos(stream, fmt: str, batch_size: int = BATCH_SIZE) -> Dict[str, Any]:
+    """
+    Importa produtos de um stream CSV/JSONL (colunas como no POST /produtos; 'imagem' em data URL).
+    Retorna {"linhas", "inseridos", "erros": [{"linha", "erro", "field"?}], "erros_omitidos"}.
+    """
+    report: Dict[str, Any] = {"linhas": 0, "inseridos": 0, "erros": [], "erros_omitidos": 0}
+    lote: list = []
+    lote_bytes = 0
+
+    def flush():
+        nonlocal lote, lote_bytes
+        if not lote:
+            return
+        _grava_lote(lote, report)
+        lote, lote_bytes = [], 0
+
+    try:
+        for linha, data, erro in iter_rows(stream, fmt):
+            report["linhas"] += 1
+            if erro:
+                _erro(report, linha, erro)
+                continue
+            try:
+                row = valida_produto(data)
+                row["is_active"] = _bool(data.get("is_active"))
+                img = decode_data_url(data["imagem"]) if data.get("imagem") else None
+            except ValidationError as e:
+                _erro(report, linha, str(e), e.field)
+                continue
+            row.update(imagem_bloob=None, imagem_mime=None, imagem_hash=None,
+                       imagem_width=None, imagem_height=None)
+            lote.append((linha, row, img))
+            lote_bytes += len(img[0]) if img else 0
+            if len(lote) >= batch_size or lote_bytes >= BATCH_IMG_BYTES:
+                flush()
+        flush()
+    except UnicodeDecodeError:
+        _erro(report, report["linhas"] + 1, "Arquivo não está em UTF-8.")
+    finally:
+        if report["inseridos"]:
+            catalogo_alterado()
+    return report
+
+
+def export_produtos(fmt: str) -> Iterator[str]:
+    """Gera o catálogo (não deletado) em CSV/JSONL, em pedaços de EXPORT_CHUNK linhas."""
+    cols = (produto.id_produto, produto.nome, produto.descricao, produto.preco, produto.estoque,
+            produto.categoria, produto.especie, produto.is_active, produto.imagem_hash)
+    stmt = (
+        select(*cols)
+        .where(produto.deleted == 0)
+        .order_by(produto.id_produto)
+        .execution_options(yield_per=EXPORT_CHUNK)
+    )
+    result = db.session.execute(stmt)
+
+    buf = io.StringIO()
+    writer = csv.writer(buf) if fmt == "csv" else None
+    if writer:
+        writer.writerow(EXPORT_COLUMNS)
+    for chunk in result.partitions():
+        for r in chunk:
+            values = (r.id_produto, r.nome, r.descricao, r.preco, r.estoque, r.categoria, r.especie,
+                      bool(r.is_active), produto.build_imagem_url(r.id_produto, r.imagem_hash))
+            if writer:
+                writer.writerow(values)
+            else:
+                buf.write(json.dumps(dict(zip(EXPORT_COLUMNS, values)), ensure_ascii=False))
+                buf.write("\n")
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+    if writer and buf.tell():
+        yield buf.getvalue()
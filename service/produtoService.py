@@ -1,22 +1,28 @@
-import gzip
+from datetime import datetime
 from models.produtoModel import produto
 from typing import Optional, List, Dict, Any
 from config.db import db
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 from flask import current_app
-import base64, binascii, re
+import base64, binascii, json, re
 from app.erros import ValidationError
+from app.enums.categoriasEnum import Categorias
 from app.enums.especies import Especies
-from sqlalchemy import func, or_
+from app.enums.labels import enum_label
+from service.imagemService import backfill_hashes
+from service import buscaService
+from utils.cache import VersionedCache, make_backend
+from config import config
+from utils.imagem import ingest_image
+from utils.paginacao import cached_count, clear_counts, decode_cursor, encode_cursor, keyset_filter
+from sqlalchemy import case, false, func, or_, select, update
+from sqlalchemy.orm import load_only, undefer
 
 DATA_URL_RE = re.compile(r'^data:(?P<mime>[\w/+.-]+);base64,(?P<b64>.+)$')
 MAX_IMG_BYTES = 10 * 1024 * 1024  # 10 MB
 
-def _set_image_from_payload(p: produto, data: Dict[str, Any]):
-    """Aceita 'photo' como dataURL base64 e compacta com gzip."""
-    photo = data.get("imagem")
-    if not photo:
-        return
+def decode_data_url(photo: str) -> tuple[bytes, str]:
+    """Valida o data URL base64 da imagem e retorna (bytes originais, mime)."""
     m = DATA_URL_RE.match(photo)
     if not m:
         raise ValidationError("Formato de foto inválido (esperado data URL).", field="photo")
@@ -28,16 +34,64 @@ def _set_image_from_payload(p: produto, data: Dict[str, Any]):
 
     if len(raw) > MAX_IMG_BYTES:
         raise ValidationError(f"Foto excede {MAX_IMG_BYTES//(1024*1024)}MB.", field="photo")
+    return raw, m.group('mime')[:50]
 
-    try:
-        p.imagem_bloob = gzip.compress(raw, compresslevel=6)
-        if hasattr(p, "imagem_mime"):
-            p.imagem_mime = m.group('mime')[:50]
-    except Exception as e:
-        raise ValidationError("Falha ao comprimir a foto.", field="photo") from e
+
+def _set_image_from_payload(p: produto, data: Dict[str, Any]):
+    """Aceita 'imagem' como dataURL base64; o pipeline (utils.imagem) valida e re-encoda fora da thread."""
+    photo = data.get("imagem")
+    if not photo:
+        return
+    raw, _ = decode_data_url(photo)
+    p.set_imagem(ingest_image(raw))
 
 # produtoService.py
 
+# respostas serializadas de GET /produtos e /produtos/:id (ver produtoController)
+catalog_cache = VersionedCache(
+    "catalogo",
+    lambda: make_backend(config.CATALOG_CACHE_URL, config.CATALOG_CACHE_SIZE),
+    ttl=config.CATALOG_CACHE_TTL,
+)
+
+
+def catalogo_alterado():
+    """Chamar depois de qualquer escrita em produtos: nova versão do catálogo, descarta totais e facetas."""
+    catalog_cache.bump()
+    clear_counts("produtos")
+
+
+def _filtra_busca(query, q: Optional[str]):
+    """Aplica o filtro de texto (FTS5 ou ILIKE). Retorna (query, subquery_busca|None)."""
+    busca = None
+    if q and buscaService.is_available():
+        # índice FTS5: prefixo, sem acento, ranqueado por BM25
+        busca = buscaService.match_subquery(q)
+        if busca is not None:
+            query = query.join(busca, busca.c.rid == produto.id_produto)
+        elif q.strip():
+            # só pontuação ('!!!', '-'): nenhum termo casa, como no ILIKE
+            query = query.filter(false())
+    elif q:
+        q_like = f"%{q.strip()}%"
+        # ilike para case-insensitive; se houver extensão unaccent no banco, pode aplicar func.unaccent
+        query = query.filter(or_(
+            produto.nome.ilike(q_like),
+            produto.categoria.ilike(q_like),
+            produto.especie.ilike(q_like),
+            produto.descricao.ilike(q_like),
+        ))
+    return query, busca
+
+# ordenação -> colunas do keyset [(coluna, desc)]; o id desempata e mantém o cursor estável
+SORT_KEYS = {
+    None:         ((produto.id_produto, True),),
+    'nome-asc':   ((produto.nome, False), (produto.id_produto, False)),
+    'nome-desc':  ((produto.nome, True), (produto.id_produto, True)),
+    'preco-asc':  ((produto.preco, False), (produto.id_produto, False)),
+    'preco-desc': ((produto.preco, True), (produto.id_produto, True)),
+}
+
 def list_produtos(
     categoria: Optional[str] = None,
     especie: Optional[str] = None,
@@ -47,12 +101,22 @@ def list_produtos(
     sort: Optional[str] = None,
     page: Optional[int] = None,
     per_page: Optional[int] = None,
+    with_image: bool = False,
+    cursor: Optional[str] = None,
+    with_total: bool = True,
 ):
     """
-    Retorna (items, total) aplicando filtros no banco.
-    sort: 'nome-asc'|'nome-desc'|'preco-asc'|'preco-desc'|None
+    Retorna (items, total, next_cursor) aplicando filtros no banco.
+    sort: 'nome-asc'|'nome-desc'|'preco-asc'|'preco-desc'|'relevance'|None
+          ('relevance' = ranking BM25 do índice de busca; só faz sentido com q)
+    with_image: se True, imagem_bloob vem na mesma consulta (undefer); senão fica deferido
+    cursor: continua depois do cursor (keyset, ignora page); em 'relevance' o cursor guarda o offset
+    with_total: se False, não conta (total=None); o total é um COUNT cacheado por alguns segundos
+    next_cursor: cursor da próxima página (None se acabou)
     """
     query = produto.query.filter_by(is_active=True, deleted=0)
+    if with_image:
+        query = query.options(undefer(produto.imagem_bloob))
 
     if categoria:
         query = query.filter(produto.categoria == categoria)
@@ -60,47 +124,166 @@ def list_produtos(
     if especie:
         query = query.filter(or_(produto.especie == especie, produto.especie == Especies.TODOS.name ))
 
-    if q:
-        q_like = f"%{q.strip()}%"
-        # ilike para case-insensitive; se houver extensão unaccent no banco, pode aplicar func.unaccent
-        query = query.filter(or_(
-            produto.nome.ilike(q_like),
-            produto.categoria.ilike(q_like),
-            produto.especie.ilike(q_like),
-            produto.descricao.ilike(q_like),
-        ))
+    query, busca = _filtra_busca(query, q)
 
     if preco_min is not None:
         query = query.filter(produto.preco >= float(preco_min))
     if preco_max is not None:
         query = query.filter(produto.preco <= float(preco_max))
 
+    total = None
+    if with_total:
+        # count direto na PK (query.count() embrulharia todas as colunas, inclusive o blob)
+        key = ("produtos", categoria, especie, (q or "").strip().lower(), preco_min, preco_max)
+        total = cached_count(key, lambda: query.with_entities(func.count(produto.id_produto)).scalar())
+
     # ordenação
-    if sort == 'nome-asc':
-        query = query.order_by(produto.nome.asc())
-    elif sort == 'nome-desc':
-        query = query.order_by(produto.nome.desc())
-    elif sort == 'preco-asc':
-        query = query.order_by(produto.preco.asc())
-    elif sort == 'preco-desc':
-        query = query.order_by(produto.preco.desc())
+    keys = None
+    if sort == 'relevance' and busca is not None:
+        query = query.order_by(busca.c.rank.asc(), produto.id_produto.desc())
     else:
-        query = query.order_by(produto.id_produto.desc())
+        sort = sort if sort in SORT_KEYS else None
+        keys = SORT_KEYS[sort]
+        query = query.order_by(*[c.desc() if d else c.asc() for c, d in keys])
 
-    total = query.count()
+    offset = (page - 1) * per_page if page and per_page else 0
+    if cursor and keys is None:
+        # rank BM25 não é coluna indexável: o cursor de 'relevance' é só o offset
+        try:
+            offset = max(0, int(decode_cursor(cursor, sort, 1)[0]))
+        except (TypeError, ValueError):
+            raise ValidationError("Cursor inválido.", field="cursor")
+    elif cursor:
+        offset = 0
+        query = query.filter(keyset_filter(keys, decode_cursor(cursor, sort, len(keys))))
 
-    if page and per_page:
-        items = query.offset((page - 1) * per_page).limit(per_page).all()
-    else:
-        items = query.all()
+    if not per_page:
+        return query.all(), total, None
 
-    return items, total
+    # busca uma linha a mais só para saber se existe próxima página
+    items = query.offset(offset or None).limit(per_page + 1).all()
+    next_cursor = None
+    if len(items) > per_page:
+        items = items[:per_page]
+        if keys is None:
+            next_cursor = encode_cursor(sort, [offset + per_page])
+        else:
+            last = items[-1]
+            next_cursor = encode_cursor(sort, [getattr(last, c.key) for c, _ in keys])
+    return items, total, next_cursor
 
 
-def get_produto(produto_id: int) -> produto:
-    return produto.query.get_or_404(produto_id)
+# faixas de preço das facetas: [min, max) ; max None = sem teto
+PRICE_BUCKETS = ((0, 25), (25, 50), (50, 100), (100, 200), (200, None))
 
-def create_produto(data: Dict[str, Any]) -> produto:
+
+def _facet_rows(q: Optional[str], preco_min: Optional[float], preco_max: Optional[float]) -> list:
+    """
+    Uma única consulta agrupada por (categoria, especie, faixa de preço) com os filtros
+    que não são facetas (texto e faixa de preço). Cacheada no catalog_cache sob
+    ("facets", filtro normalizado): LRU+TTL, e o bump() de qualquer escrita no
+    catálogo invalida em todos os workers.
+    """
+    key = ("facets", " ".join((q or "").lower().split()), preco_min, preco_max)
+    raw, _ = catalog_cache.get_or_set(key, lambda: json.dumps(_consulta_facetas(q, preco_min, preco_max)).encode())
+    return json.loads(raw)
+
+
+def _consulta_facetas(q: Optional[str], preco_min: Optional[float], preco_max: Optional[float]) -> list:
+    bucket = case(
+        *[((produto.preco >= lo) if hi is None else (produto.preco < hi), i)
+          for i, (lo, hi) in enumerate(PRICE_BUCKETS)],
+        else_=None,
+    )
+    query = db.session.query(
+        produto.categoria, produto.especie, bucket.label("faixa"), func.count(produto.id_produto)
+    ).filter(produto.is_active == True, produto.deleted == 0)
+    query, _ = _filtra_busca(query, q)
+    if preco_min is not None:
+        query = query.filter(produto.preco >= float(preco_min))
+    if preco_max is not None:
+        query = query.filter(produto.preco <= float(preco_max))
+    return [list(r) for r in query.group_by(produto.categoria, produto.especie, "faixa").all()]
+
+
+def list_facets(
+    categoria: Optional[str] = None,
+    especie: Optional[str] = None,
+    q: Optional[str] = None,
+    preco_min: Optional[float] = None,
+    preco_max: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    Contagens por categoria, espécie e faixa de preço para a busca atual.
+    Cada faceta é contada com os filtros das *outras* facetas, então o número
+    ao lado de uma opção é o total que aparece ao escolhê-la. Espécie segue o
+    fallback do list_produtos: escolher GATO também traz os produtos TODOS.
+    """
+    rows = _facet_rows(q, preco_min, preco_max)
+
+    def esp_ok(esp_row, esp_filtro):
+        return not esp_filtro or esp_row in (esp_filtro, Especies.TODOS.name)
+
+    cat_counts: Dict[str, int] = {c.name: 0 for c in Categorias}
+    esp_raw: Dict[str, int] = {e.name: 0 for e in Especies}
+    faixa_counts = [0] * len(PRICE_BUCKETS)
+    total = 0
+    for cat, esp, faixa, n in rows:
+        cat_ok = not categoria or cat == categoria
+        if esp_ok(esp, especie):
+            if cat:
+                cat_counts[cat] = cat_counts.get(cat, 0) + n
+            if cat_ok:
+                total += n
+                if faixa is not None:
+                    faixa_counts[faixa] += n
+        if cat_ok and esp:
+            esp_raw[esp] = esp_raw.get(esp, 0) + n
+
+    todos = esp_raw.get(Especies.TODOS.name, 0)
+    return {
+        "total": total,
+        "categorias": [
+            {"key": k, "value": enum_label(Categorias, k), "count": n} for k, n in cat_counts.items()
+        ],
+        "especies": [
+            {"key": k, "value": enum_label(Especies, k),
+             "count": n if k == Especies.TODOS.name else n + todos}
+            for k, n in esp_raw.items()
+        ],
+        "precos": [
+            {"min": lo, "max": hi, "count": faixa_counts[i]} for i, (lo, hi) in enumerate(PRICE_BUCKETS)
+        ],
+    }
+
+
+def backfill_image_meta() -> int:
+    """
+    Preenche imagem_hash/largura/altura dos produtos antigos (gravados antes dessas colunas).
+    Retorna quantos produtos foram atualizados.
+    """
+    return backfill_hashes(produto, produto.imagem_bloob, produto.imagem_hash,
+                           lambda p, raw: p.set_image_meta(raw))
+
+
+def get_produto(produto_id: int, with_image: bool = False) -> produto:
+    """Produto por id; with_image=True já traz o blob (para devolver a data URL)."""
+    query = produto.query
+    if with_image:
+        query = query.options(undefer(produto.imagem_bloob))
+    return query.filter_by(id_produto=produto_id).first_or_404()
+
+def get_produto_imagem_ref(produto_id: int) -> produto:
+    """Carrega só id/hash/mime da imagem; imagem_bloob é buscado sob demanda se for acessado."""
+    return (
+        produto.query
+        .options(load_only(produto.id_produto, produto.imagem_hash, produto.imagem_mime))
+        .filter_by(id_produto=produto_id)
+        .first_or_404()
+    )
+
+def valida_produto(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Regras de criação de produto; retorna as colunas já convertidas (sem imagem)."""
     nome = (data.get("nome") or "").strip()
     if not nome:
         raise ValidationError("Nome é obrigatório.", field="nome")
@@ -115,19 +298,42 @@ def create_produto(data: Dict[str, Any]) -> produto:
     except (TypeError, ValueError):
         raise ValidationError("Estoque inválido.", field="estoque")
 
-    p = produto(
-        nome=nome,
-        descricao=data.get("descricao"),
-        preco=preco,
-        estoque=estoque,
-        categoria=(data.get("categoria") or None),
-        especie = data.get("especie")
-    )
+    especie = (data.get("especie") or "").strip()
+    if not especie:
+        raise ValidationError("Espécie é obrigatória.", field="especie")
+
+    return {
+        "nome": nome,
+        "descricao": data.get("descricao"),
+        "preco": preco,
+        "estoque": estoque,
+        "categoria": (data.get("categoria") or None),
+        "especie": especie,
+    }
+
+def set_produto_imagem(produto_id: int, raw: bytes) -> produto:
+    """Troca a imagem do produto a partir dos bytes do upload (PUT /produtos/:id/imagem)."""
+    p = produto.query.filter_by(id_produto=produto_id).first_or_404()
+    p.set_imagem(ingest_image(raw))
+    try:
+        db.session.commit()
+        catalogo_alterado()
+        return p
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        current_app.logger.exception("Erro de banco ao gravar imagem do produto")
+        raise RuntimeError("Erro de banco ao gravar imagem do produto.") from e
+
+def create_produto(data: Dict[str, Any]) -> produto:
+    p = produto(**valida_produto(data))
     _set_image_from_payload(p, data)
 
     try:
         db.session.add(p)
+        db.session.flush()
+        buscaService.index_produto(p)
         db.session.commit()
+        catalogo_alterado()
         return p
     except IntegrityError as e:
         db.session.rollback()
@@ -172,7 +378,10 @@ def update_produto(produto_id: int, data: Dict[str, Any]) -> produto:
         _set_image_from_payload(p, data)
 
     try:
+        if {"nome", "descricao", "categoria", "is_active"} & data.keys():
+            buscaService.index_produto(p)
         db.session.commit()
+        catalogo_alterado()
         return p
     except IntegrityError as e:
         db.session.rollback()
@@ -190,17 +399,157 @@ def set_estoque(produto_id: int, novo_estoque: int) -> produto:
     p.estoque = novo_estoque
     try:
         db.session.commit()
+        catalog_cache.bump()
         return p
     except SQLAlchemyError as e:
         db.session.rollback()
         current_app.logger.exception("Erro ao ajustar estoque")
         raise RuntimeError("Erro ao ajustar estoque.") from e
 
+MAX_AJUSTES_ESTOQUE = 1000
+
+
+def _parse_ajustes(itens: Any) -> List[Dict[str, Any]]:
+    """Normaliza [{id, estoque|delta, esperado?}] em [{id, valor, delta, esperado}]."""
+    if not isinstance(itens, list) or not itens:
+        raise ValidationError("Informe a lista 'itens'.", field="itens")
+    if len(itens) > MAX_AJUSTES_ESTOQUE:
+        raise ValidationError(f"Máximo de {MAX_AJUSTES_ESTOQUE} itens por ajuste.", field="itens")
+
+    ajustes, vistos = [], set()
+    for n, it in enumerate(itens):
+        campo = f"itens[{n}]"
+        if not isinstance(it, dict):
+            raise ValidationError("Item inválido.", field=campo)
+        try:
+            pid = int(it.get("id"))
+        except (TypeError, ValueError):
+            raise ValidationError("id inválido.", field=f"{campo}.id")
+        if pid in vistos:
+            raise ValidationError(f"Produto {pid} repetido.", field=f"{campo}.id")
+        vistos.add(pid)
+
+        if ("estoque" in it) == ("delta" in it):
+            raise ValidationError("Informe 'estoque' (absoluto) ou 'delta' (relativo).", field=campo)
+        chave = "delta" if "delta" in it else "estoque"
+        try:
+            valor = int(it[chave])
+            esperado = None if it.get("esperado") is None else int(it["esperado"])
+        except (TypeError, ValueError):
+            raise ValidationError("Valor inválido.", field=f"{campo}.{chave}")
+        if chave == "estoque" and valor < 0:
+            raise ValidationError("Estoque não pode ser negativo.", field=f"{campo}.estoque")
+        ajustes.append({"id": pid, "valor": valor, "delta": chave == "delta", "esperado": esperado})
+    return ajustes
+
+
+def _conflitos_estoque(ajustes: List[Dict[str, Any]], aplicados: set) -> List[Dict[str, Any]]:
+    """Explica por que cada ajuste não aplicado falhou (lido depois do rollback)."""
+    pendentes = [a for a in ajustes if a["id"] not in aplicados]
+    atuais = dict(db.session.execute(
+        select(produto.id_produto, produto.estoque)
+        .where(produto.id_produto.in_([a["id"] for a in pendentes]), produto.deleted == 0)
+    ).all())
+    conflitos = []
+    for a in pendentes:
+        atual = atuais.get(a["id"])
+        if atual is None:
+            motivo = "Produto não encontrado."
+        elif a["esperado"] is not None and atual != a["esperado"]:
+            motivo = "Estoque atual diferente do esperado."
+        else:
+            motivo = "Estoque ficaria negativo."
+        conflitos.append({"id": a["id"], "estoque_atual": atual, "esperado": a["esperado"], "erro": motivo})
+    return conflitos
+
+
+def ajustar_estoque(itens: Any) -> tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Ajuste de estoque em lote, tudo ou nada.
+    itens: [{"id": 1, "estoque": 10}, {"id": 2, "delta": -3, "esperado": 7}, ...]
+    - 'estoque' grava o valor absoluto; 'delta' soma ao valor atual
+    - 'esperado' (opcional): só aplica se o estoque atual for esse (concorrência otimista)
+    Um único UPDATE ... CASE com as condições no WHERE (não deixa ficar negativo);
+    se alguma linha não casar, desfaz tudo.
+    Retorna (atualizados [{id, estoque}], conflitos []) ou ([], conflitos) em caso de falha.
+    """
+    ajustes = _parse_ajustes(itens)
+    try:
+        rows = aplica_ajustes_estoque(ajustes)
+        if len(rows) != len(ajustes):
+            db.session.rollback()
+            return [], _conflitos_estoque(ajustes, {r[0] for r in rows})
+        db.session.commit()
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        current_app.logger.exception("Erro ao ajustar estoque em lote")
+        raise RuntimeError("Erro ao ajustar estoque.") from e
+
+    catalog_cache.bump()
+    return [{"id": pid, "estoque": est} for pid, est in rows], []
+
+
+def aplica_ajustes_estoque(ajustes: List[Dict[str, Any]]) -> list:
+    """
+    Executa o UPDATE condicional na transação corrente, sem commit.
+    ajustes: [{id, valor, delta, esperado}] (formato de _parse_ajustes).
+    Retorna as linhas (id, estoque) que casaram; quem chama compara com len(ajustes)
+    e faz rollback se faltar alguma (não encontrado, ficaria negativo, esperado diferente).
+    A condição fica no WHERE, então duas transações concorrentes nunca vendem além do estoque.
+    Bancos sem UPDATE ... RETURNING (MySQL): um UPDATE condicional por item, conferindo
+    o rowcount, e um SELECT do estoque final dos que casaram.
+    """
+    if not db.engine.dialect.update_returning:
+        return _aplica_ajustes_sem_returning(ajustes)
+    novo = case(
+        *[(produto.id_produto == a["id"],
+           produto.estoque + a["valor"] if a["delta"] else a["valor"]) for a in ajustes],
+        else_=produto.estoque,
+    )
+    filtros = [produto.id_produto.in_([a["id"] for a in ajustes]), produto.deleted == 0, novo >= 0]
+    com_esperado = [a for a in ajustes if a["esperado"] is not None]
+    if com_esperado:
+        filtros.append(case(
+            *[(produto.id_produto == a["id"], produto.estoque == a["esperado"]) for a in com_esperado],
+            else_=True,
+        ))
+    stmt = (
+        update(produto)
+        .where(*filtros)
+        .values(estoque=novo, updated_at=datetime.utcnow())
+        .returning(produto.id_produto, produto.estoque)
+    )
+    return db.session.execute(stmt, execution_options={"synchronize_session": False}).all()
+
+
+def _aplica_ajustes_sem_returning(ajustes: List[Dict[str, Any]]) -> list:
+    aplicados = []
+    agora = datetime.utcnow()
+    for a in ajustes:
+        novo = produto.estoque + a["valor"] if a["delta"] else a["valor"]
+        filtros = [produto.id_produto == a["id"], produto.deleted == 0, novo >= 0]
+        if a["esperado"] is not None:
+            filtros.append(produto.estoque == a["esperado"])
+        res = db.session.execute(
+            update(produto).where(*filtros).values(estoque=novo, updated_at=agora),
+            execution_options={"synchronize_session": False},
+        )
+        if res.rowcount == 1:
+            aplicados.append(a["id"])
+    if not aplicados:
+        return []
+    # as linhas já estão travadas pelo UPDATE nesta transação: o valor lido é o gravado
+    return db.session.execute(
+        select(produto.id_produto, produto.estoque).where(produto.id_produto.in_(aplicados))
+    ).all()
+
 def toggle_ativo(produto_id: int, ativo: bool) -> produto:
     p = produto.query.get_or_404(produto_id)
     p.is_active = bool(ativo)
     try:
+        buscaService.index_produto(p)  # inativo sai da busca; reativado volta
         db.session.commit()
+        catalogo_alterado()
         return p
     except SQLAlchemyError as e:
         db.session.rollback()
@@ -212,7 +561,9 @@ def deleted_produto(produto_id:int)-> produto:
     Produto = produto.query.get_or_404(produto_id)
     Produto.deleted = Produto.id_produto  # marca como deletado
     try:
+        buscaService.remove_produto(Produto.id_produto)
         db.session.commit()
+        catalogo_alterado()
     except SQLAlchemyError as e:
         db.session.rollback()
         raise RuntimeError("Falha ao deletar usuário") from e
@@ -0,0 +1,216 @@
+# service/reciboBatchService.py
+"""
+Recibos em lote (fechamento do mês): um ZIP com o PDF de cada pedido filtrado.
+
+- os filtros são os do histórico admin (pedidoService.admin_order_filters)
+- tudo que o recibo usa é carregado antes, em poucas consultas por conjunto:
+  pedidos + usuário (1), itens (IN por blocos), endereços (IN por blocos);
+  a empresa vem do cache de branding (companieService.get_branding)
+- PDFs que já estão no cache em disco (reciboService) com a chave atual são
+  reaproveitados; os demais são renderizados em paralelo num pool de processos
+  (gerar_pdf_recibo_venda) e gravados no cache
+- o ZIP sai em streaming: cada PDF entra no arquivo assim que fica pronto
+"""
+import os
+import zipfile
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional
+
+from flask import current_app
+from sqlalchemy import func, select
+
+from app.erros import ValidationError
+from config.db import db
+from models.enderecoModel import Address
+from models.pedidoModel import Order, OrderItem
+from models.userModel import User
+from service import reciboService
+from service.companieService import Branding, get_branding
+from service.pedidoService import admin_order_filters
+from utils.createRecibo import gerar_pdf_recibo_venda
+
+MAX_ORDERS = 5000   # acima disso o admin precisa estreitar o período
+IN_CHUNK = 500
+INFLIGHT_PER_WORKER = 4
+
+
+_empresa: Optional[Branding] = None
+
+
+def _init_worker(empresa: Branding):
+    # o logo vai uma vez por processo, não uma vez por pedido
+    global _empresa
+    _empresa = empresa
+
+
+def _render(venda: dict) -> bytes:
+    return gerar_pdf_recibo_venda(_empresa, venda)
+
+
+class _ZipStream:
+    """Destino não-seekable do ZipFile: acumula o que foi escrito até o próximo drain()."""
+
+    def __init__(self):
+        self._chunks: list = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _chunks(seq: list, size: int = IN_CHUNK):
+    for i in range(0, len(seq), size):
+        yield seq[i:i + size]
+
+
+def _enderecos(user_ids: list) -> Dict[int, dict]:
+    """Endereço principal de cada usuário (mesma regra de User.primary_address)."""
+    cols = (Address.user_id, Address.logradouro, Address.numero, Address.bairro, Address.cidade,
+            Address.estado, Address.full_address, Address.is_primary, Address.created_at)
+    por_user: Dict[int, list] = defaultdict(list)
+    for bloco in _chunks(user_ids):
+        for a in db.session.execute(select(*cols).where(Address.user_id.in_(bloco))):
+            por_user[a.user_id].append(a)
+    out = {}
+    for uid, lista in por_user.items():
+        prim = next((a for a in lista if a.is_primary), None)
+        a = prim or max(lista, key=lambda a: a.created_at or datetime.min)
+        out[uid] = {k: getattr(a, k) for k in ("logradouro", "numero", "bairro", "cidade", "estado", "full_address")}
+    return out
+
+
+def prepare_batch(filters: Dict[str, Any]) -> dict:
+    """
+    Valida os filtros e carrega tudo que os recibos precisam.
+    Retorna {"empresa", "jobs": [(order_id, chave, venda)]}.
+    """
+    conds = admin_order_filters(
+        status=filters.get("status") or "",
+        date_from=filters.get("date_from") or "",
+        date_to=filters.get("date_to") or "",
+        q=filters.get("q") or "",
+    )
+    empresa = get_branding(reciboService.COMPANIE_ID)
+    if empresa is None:
+        raise ValidationError("Empresa não configurada.")
+
+    total = db.session.execute(
+        select(func.count(Order.id_pedido)).join(User, Order.user_id == User.id_user).where(*conds)
+    ).scalar()
+    if not total:
+        raise ValidationError("Nenhum pedido para os filtros informados.")
+    if total > MAX_ORDERS:
+        raise ValidationError(f"{total} pedidos no filtro; o limite por lote é {MAX_ORDERS}.")
+
+    pedidos = db.session.execute(
+        select(Order.id_pedido, Order.user_id, Order.status, Order.total, Order.created_at,
+               User.username, User.nome, User.email, User.cpf, User.numero, User.deleted)
+        .join(User, Order.user_id == User.id_user)
+        .where(*conds)
+        .order_by(Order.created_at, Order.id_pedido)
+    ).all()
+
+    itens: Dict[int, list] = defaultdict(list)
+    ids = [p.id_pedido for p in pedidos]
+    for bloco in _chunks(ids):
+        for it in db.session.execute(
+            select(OrderItem.order_id, OrderItem.id_item, OrderItem.produto_id, OrderItem.produto_nome,
+                   OrderItem.qtd, OrderItem.preco_unit)
+            .where(OrderItem.order_id.in_(bloco))
+            .order_by(OrderItem.id_item)
+        ):
+            itens[it.order_id].append(it)
+    enderecos = _enderecos(sorted({p.user_id for p in pedidos}))
+
+    jobs = []
+    for p in pedidos:
+        linhas = itens.get(p.id_pedido, [])
+        chave = reciboService.key_from(
+            (p.id_pedido, p.user_id, p.status, p.total, p.created_at), empresa.versao,
+            [(i.id_item, i.produto_id, i.produto_nome, i.qtd, i.preco_unit) for i in linhas],
+        )
+        # mesmo formato de get_order_by_id + _merge_user_into_venda
+        total_pedido = float(p.total or 0.0)
+        if total_pedido <= 0:
+            total_pedido = sum((i.qtd or 0) * float(i.preco_unit or 0) for i in linhas)
+        venda = {
+            "id": p.id_pedido,
+            "user_id": p.user_id,
+            "user_name": p.username,
+            "user_email": p.email,
+            "status": p.status,
+            "total": round(total_pedido, 2),
+            "created_at": p.created_at.isoformat() if p.created_at else None,
+            "items": [{"produto_nome": i.produto_nome, "qtd": i.qtd, "preco_unit": float(i.preco_unit or 0)}
+                      for i in linhas],
+        }
+        if not p.deleted:
+            venda["user"] = {"id": p.user_id, "name": p.nome, "email": p.email, "cpf": p.cpf,
+                             "phone": p.numero, "address": enderecos.get(p.user_id), "role": None}
+        jobs.append((p.id_pedido, chave, venda))
+    return {"empresa": empresa, "jobs": jobs}
+
+
+def _nome(order_id: int) -> str:
+    return f"recibo_venda_{order_id:04d}.pdf"
+
+
+def stream_zip(batch: dict, workers: Optional[int] = None) -> Iterator[bytes]:
+    """Gera o ZIP em pedaços; cada PDF é escrito assim que fica pronto (ordem de conclusão)."""
+    out = _ZipStream()
+    zf = zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED)
+    erros = []
+
+    pendentes = []
+    for order_id, chave, venda in batch["jobs"]:
+        path = reciboService.cached_path(order_id, chave)
+        if path:
+            zf.write(path, _nome(order_id))
+            yield out.drain()
+        else:
+            pendentes.append((order_id, chave, venda))
+
+    if pendentes:
+        workers = workers or min(4, os.cpu_count() or 1)
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(batch["empresa"],))
+        try:
+            fila = iter(pendentes)
+            rodando: dict = {}
+            while True:
+                # janela limitada: não acumula PDFs prontos se o cliente baixa devagar
+                while len(rodando) < workers * INFLIGHT_PER_WORKER:
+                    job = next(fila, None)
+                    if job is None:
+                        break
+                    rodando[pool.submit(_render, job[2])] = job
+                if not rodando:
+                    break
+                feitos, _ = wait(rodando, return_when=FIRST_COMPLETED)
+                for fut in feitos:
+                    order_id, chave, _ = rodando.pop(fut)
+                    try:
+                        pdf = fut.result()
+                    except Exception as e:
+                        current_app.logger.exception("Falha ao gerar recibo %s no lote", order_id)
+                        erros.append(f"{order_id}: {e}")
+                        continue
+                    reciboService.store(order_id, chave, pdf)
+                    zf.writestr(_nome(order_id), pdf)
+                    yield out.drain()
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    if erros:
+        zf.writestr("ERROS.txt", "\n".join(erros) + "\n")
+    zf.close()
+    yield out.drain()
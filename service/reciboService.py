@@ -0,0 +1,170 @@
+# service/reciboService.py
+"""
+Cache em disco dos recibos em PDF.
+
+    <RECEIPT_CACHE_DIR>/<id_pedido % 256>/<id_pedido>/<chave>.pdf
+
+A chave é o sha256 (32 hex) das entradas do recibo: pedido (status, total,
+data), itens e a versão da empresa (dados + hash do logo + updated_at).
+Calculá-la custa três SELECTs só de colunas (pedido, itens e a versão da
+empresa por PK; os dados e o logo vêm do cache de branding,
+companieService.get_branding), então:
+- If-None-Match com a chave atual -> 304 sem abrir arquivo
+- arquivo da chave atual existe  -> send_file direto do disco
+- senão gera o PDF (fluxo completo), grava e apaga as versões antigas
+Mudou o status ou a empresa/logo => chave nova => PDF novo (invalidate()
+também apaga na hora os do pedido).
+
+Os recibos são pré-gerados em segundo plano logo depois do checkout (schedule).
+"""
+import glob
+import hashlib
+import json
+import os
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from flask import current_app, jsonify, request, send_file
+from sqlalchemy import select
+
+from config import config
+from config.db import db
+from models.pedidoModel import Order, OrderItem
+from service.companieService import get_branding
+from service.imagemService import write_atomic
+
+COMPANIE_ID = 1  # o recibo usa sempre a empresa 1
+PREGEN_WORKERS = 1
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _dir(order_id: int) -> str:
+    return os.path.join(config.RECEIPT_CACHE_DIR, f"{order_id % 256:02x}", str(order_id))
+
+
+def receipt_key(order_id: int) -> Optional[str]:
+    """Hash das entradas do recibo; None se o pedido ou a empresa não existem."""
+    pedido = db.session.execute(
+        select(Order.id_pedido, Order.user_id, Order.status, Order.total, Order.created_at)
+        .where(Order.id_pedido == order_id)
+    ).first()
+    if pedido is None:
+        return None
+    emp = get_branding(COMPANIE_ID)
+    if emp is None:
+        return None
+    itens = db.session.execute(
+        select(OrderItem.id_item, OrderItem.produto_id, OrderItem.produto_nome,
+               OrderItem.qtd, OrderItem.preco_unit)
+        .where(OrderItem.order_id == order_id)
+        .order_by(OrderItem.id_item)
+    ).all()
+    return key_from(pedido, emp.versao, itens)
+
+
+def key_from(pedido, emp, itens) -> str:
+    """
+    Chave a partir das linhas já carregadas (mesmas colunas/ordem de receipt_key):
+    pedido (id_pedido, user_id, status, total, created_at),
+    emp (nome, cnpj, endereco, numero, imagem_hash, updated_at) = Branding.versao,
+    itens [(id_item, produto_id, produto_nome, qtd, preco_unit)] por id_item.
+    """
+    entradas = [list(pedido), list(emp), [list(i) for i in itens]]
+    raw = json.dumps(entradas, default=str, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()[:32]
+
+
+def cached_path(order_id: int, key: str) -> Optional[str]:
+    path = os.path.join(_dir(order_id), f"{key}.pdf")
+    return path if os.path.exists(path) else None
+
+
+def store(order_id: int, key: str, pdf: bytes) -> str:
+    """Grava o PDF da chave e apaga as versões antigas do pedido."""
+    path = os.path.join(_dir(order_id), f"{key}.pdf")
+    write_atomic(path, pdf)
+    for antigo in glob.glob(os.path.join(_dir(order_id), "*.pdf")):
+        if antigo != path:
+            try:
+                os.remove(antigo)
+            except OSError:
+                pass
+    return path
+
+
+def _render(order_id: int) -> Optional[bytes]:
+    """Fluxo completo: pedido + itens e comprador; empresa e logo vêm do cache de branding."""
+    from service.pedidoService import _merge_user_into_venda, get_order_by_id
+    from service.userService import get_user_public_info
+    from utils.createRecibo import gerar_pdf_recibo_venda
+
+    venda = get_order_by_id(order_id)
+    comp = get_branding(COMPANIE_ID)
+    if not venda or comp is None:
+        return None
+    venda = _merge_user_into_venda(venda, get_user_public_info(venda["user_id"]))
+    return gerar_pdf_recibo_venda(comp, venda)
+
+
+def ensure_receipt(order_id: int, key: Optional[str] = None) -> Optional[str]:
+    """Garante o PDF da chave atual em disco e retorna o caminho (None se não há como gerar)."""
+    key = key or receipt_key(order_id)
+    if key is None:
+        return None
+    path = cached_path(order_id, key)
+    if path:
+        return path
+    pdf = _render(order_id)
+    if pdf is None:
+        return None
+    return store(order_id, key, pdf)
+
+
+def invalidate(order_id: int):
+    """Apaga os PDFs do pedido (a chave já muda sozinha; isto só libera o disco)."""
+    shutil.rmtree(_dir(order_id), ignore_errors=True)
+
+
+def _sem_recibo(order_id: int):
+    if db.session.get(Order, order_id) is None:
+        return jsonify({"error": "Pedido não encontrado"}), 404
+    return jsonify({"error": "Empresa não configurada"}), 400
+
+
+def serve_receipt(order_id: int, download_name: str):
+    """Resposta HTTP do recibo: ETag = chave, 304 com If-None-Match, PDF do cache em disco."""
+    key = receipt_key(order_id)
+    if key is None:
+        return _sem_recibo(order_id)
+    if key in request.if_none_match:
+        resp = current_app.response_class(status=304)
+    else:
+        path = ensure_receipt(order_id, key)
+        if path is None:
+            return _sem_recibo(order_id)
+        resp = send_file(path, mimetype="application/pdf", as_attachment=False,
+                         download_name=download_name, etag=key, conditional=True)
+    resp.set_etag(key)
+    resp.headers["Cache-Control"] = "private, no-cache"
+    return resp
+
+
+def _pregenerate(app, order_id: int):
+    with app.app_context():
+        try:
+            ensure_receipt(order_id)
+        except Exception:
+            current_app.logger.exception("Falha ao pré-gerar recibo do pedido %s", order_id)
+
+
+def schedule(order_id: int):
+    """Gera o recibo em segundo plano (chamar depois do commit do pedido)."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=PREGEN_WORKERS, thread_name_prefix="recibo")
+    _executor.submit(_pregenerate, current_app._get_current_object(), order_id)
@@ -0,0 +1,286 @@
+# service/vendasService.py
+"""
+Analytics de vendas a partir de rollups diários.
+
+- sales_daily: (dia, status) -> pedidos, receita
+- sales_daily_produtos: (dia, status, produto) -> qtd, receita
+Os rollups são mantidos pelo pedidoService na MESMA transação que cria o pedido
+ou muda o status (registra_pedido / troca_status); quem chama faz o commit.
+rebuild_rollups() recalcula tudo a partir de orders/order_items (histórico ou
+correção), via `flask backfill-vendas`; no startup, upgrade_schema faz isso uma
+vez, quando a tabela sales_daily acaba de ser criada num banco com pedidos.
+
+O dia é a data UTC de orders.created_at (o mesmo relógio do resto do sistema);
+pedidos sem created_at (legado) ficam fora dos rollups.
+"""
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Iterable, Optional
+
+from sqlalchemy import delete, func, insert, select, update
+
+from app.erros import ValidationError
+from config.db import db
+from models.pedidoModel import Order, OrderItem
+from models.vendasModel import SalesDaily, SalesDailyProduto
+
+GROUPS = ("day", "week", "month")
+DEFAULT_DAYS = 30
+MAX_TOP = 50
+BACKFILL_CHUNK = 1000
+
+
+def _dia(dt: Optional[datetime]) -> Optional[date]:
+    """Dia do rollup; None (pedido sem data) = o pedido não entra nos rollups."""
+    return dt.date() if dt else None
+
+
+def _upsert(model, keys: tuple[str, ...], rows: list[dict], somas: tuple[str, ...], sobrescreve: tuple[str, ...] = ()):
+    """
+    Soma `somas` nas linhas existentes (chave = keys) ou insere as que faltam.
+    SQLite/PostgreSQL: INSERT ... ON CONFLICT DO UPDATE num executemany;
+    outros bancos: UPDATE e, se não casar, INSERT.
+    """
+    if not rows:
+        return
+    dialect = db.engine.dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        stmt = dialect_insert(model)
+        valores = {c: getattr(model, c) + getattr(stmt.excluded, c) for c in somas}
+        valores.update({c: getattr(stmt.excluded, c) for c in sobrescreve})
+        db.session.execute(stmt.on_conflict_do_update(index_elements=list(keys), set_=valores), rows)
+        return
+    for row in rows:
+        res = db.session.execute(
+            update(model)
+            .where(*[getattr(model, k) == row[k] for k in keys])
+            .values({c: getattr(model, c) + row[c] for c in somas} | {c: row[c] for c in sobrescreve})
+        )
+        if res.rowcount == 0:
+            db.session.execute(insert(model).values(row))
+
+
+def _acumula(pedidos: dict, produtos: dict, dia: date, status: str, total: float, itens: Iterable, sinal: int):
+    """Soma (sinal=+1) ou retira (-1) um pedido nos acumuladores de _grava."""
+    acc = pedidos.setdefault((dia, status), {"dia": dia, "status": status, "pedidos": 0, "receita": 0.0})
+    acc["pedidos"] += sinal
+    acc["receita"] += sinal * float(total or 0)
+    for pid, nome, qtd, preco in itens:
+        pid = pid or 0
+        row = produtos.setdefault((dia, status, pid), {"dia": dia, "status": status, "produto_id": pid,
+                                                       "produto_nome": nome or f"Produto #{pid}", "qtd": 0, "receita": 0.0})
+        row["qtd"] += sinal * int(qtd or 0)
+        row["receita"] += sinal * float(preco or 0) * int(qtd or 0)
+
+
+def _grava(pedidos: dict, produtos: dict):
+    _upsert(SalesDaily, ("dia", "status"), list(pedidos.values()), ("pedidos", "receita"))
+    _upsert(SalesDailyProduto, ("dia", "status", "produto_id"), list(produtos.values()),
+            ("qtd", "receita"), ("produto_nome",))
+
+
+def registra_pedido(created_at: Optional[datetime], status: str, total: float, itens: Iterable):
+    """Soma um pedido novo nos rollups (na transação corrente, sem commit). itens: (produto_id, produto_nome, qtd, preco_unit)."""
+    dia = _dia(created_at)
+    if dia is None:
+        return
+    pedidos, produtos = {}, {}
+    _acumula(pedidos, produtos, dia, status, total, itens, +1)
+    _grava(pedidos, produtos)
+
+
+def troca_status(order_id: int, created_at: Optional[datetime], total: float, antigo: str, novo: str):
+    """Move um pedido de status nos rollups (na transação corrente, sem commit)."""
+    troca_status_lote([(order_id, created_at, total, antigo)], novo)
+
+
+def troca_status_lote(pedidos_lote: list, novo: str):
+    """
+    Move vários pedidos para `novo` nos rollups: itens lidos com IN por blocos e
+    um upsert em lote por tabela (na transação corrente, sem commit).
+    pedidos_lote: [(order_id, created_at, total, status_antigo)]
+    """
+    pedidos_lote = [p for p in pedidos_lote if p[3] != novo and p[1] is not None]
+    if not pedidos_lote:
+        return
+    itens: dict[int, list] = defaultdict(list)
+    ids = [p[0] for p in pedidos_lote]
+    for i in range(0, len(ids), BACKFILL_CHUNK):
+        for r in db.session.execute(
+            select(OrderItem.order_id, OrderItem.produto_id, OrderItem.produto_nome, OrderItem.qtd, OrderItem.preco_unit)
+            .where(OrderItem.order_id.in_(ids[i:i + BACKFILL_CHUNK]))
+        ):
+            itens[r.order_id].append(r[1:])
+
+    pedidos, produtos = {}, {}
+    for order_id, created_at, total, antigo in pedidos_lote:
+        dia = _dia(created_at)
+        _acumula(pedidos, produtos, dia, antigo, total, itens[order_id], -1)
+        _acumula(pedidos, produtos, dia, novo, total, itens[order_id], +1)
+    _grava(pedidos, produtos)
+
+
+def rebuild_rollups() -> int:
+    """Recalcula os rollups a partir de orders/order_items numa transação. Retorna o número de pedidos."""
+    pedidos: dict = defaultdict(lambda: [0, 0.0])
+    for chunk in db.session.execute(
+        select(Order.created_at, Order.status, Order.total).execution_options(yield_per=BACKFILL_CHUNK)
+    ).partitions():
+        for r in chunk:
+            if r.created_at is None:
+                continue
+            acc = pedidos[(_dia(r.created_at), r.status)]
+            acc[0] += 1
+            acc[1] += float(r.total or 0)
+
+    produtos: dict = {}
+    for chunk in db.session.execute(
+        select(Order.created_at, Order.status, OrderItem.produto_id, OrderItem.produto_nome,
+               OrderItem.qtd, OrderItem.preco_unit)
+        .join(Order, OrderItem.order_id == Order.id_pedido)
+        .order_by(OrderItem.id_item)
+        .execution_options(yield_per=BACKFILL_CHUNK)
+    ).partitions():
+        for r in chunk:
+            if r.created_at is None:
+                continue
+            pid = r.produto_id or 0
+            acc = produtos.setdefault((_dia(r.created_at), r.status, pid), [r.produto_nome, 0, 0.0])
+            acc[0] = r.produto_nome or acc[0]
+            acc[1] += int(r.qtd or 0)
+            acc[2] += float(r.preco_unit or 0) * int(r.qtd or 0)
+
+    try:
+        db.session.execute(delete(SalesDailyProduto))
+        db.session.execute(delete(SalesDaily))
+        if pedidos:
+            db.session.execute(insert(SalesDaily), [
+                {"dia": d, "status": s, "pedidos": n, "receita": round(v, 2)}
+                for (d, s), (n, v) in pedidos.items()
+            ])
+        if produtos:
+            db.session.execute(insert(SalesDailyProduto), [
+                {"dia": d, "status": s, "produto_id": pid, "produto_nome": nome or f"Produto #{pid}",
+                 "qtd": q, "receita": round(v, 2)}
+                for (d, s, pid), (nome, q, v) in produtos.items()
+            ])
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return sum(n for n, _ in pedidos.values())
+
+
+def _parse_dia(s: str, field: str) -> Optional[date]:
+    if not s:
+        return None
+    try:
+        return datetime.strptime(s, "%Y-%m-%d").date()
+    except ValueError:
+        raise ValidationError("Data inválida (use AAAA-MM-DD).", field=field)
+
+
+def _periodo(d: date, group: str) -> str:
+    if group == "week":
+        return (d - timedelta(days=d.weekday())).isoformat()  # segunda-feira da semana
+    if group == "month":
+        return d.strftime("%Y-%m")
+    return d.isoformat()
+
+
+def _resumo(pedidos: int, receita: float) -> dict:
+    return {
+        "pedidos": pedidos,
+        "receita": round(receita, 2),
+        "ticket_medio": round(receita / pedidos, 2) if pedidos else 0.0,
+    }
+
+
+def sales_summary(*, date_from: str = "", date_to: str = "", group: str = "day",
+                  status: str = "", top: int = 10) -> dict:
+    """
+    Faturamento, nº de pedidos, ticket médio e top produtos no período.
+    - date_from/date_to: 'YYYY-MM-DD' (padrão: últimos 30 dias)
+    - group: day | week | month (semana começa na segunda; períodos sem venda vêm zerados)
+    - status: filtra (aceita os aliases do histórico: completed, cancelled...);
+      sem filtro, pedidos cancelados ficam de fora dos totais/série/top
+    - por_status sempre traz todos os status do período
+    """
+    from service.pedidoService import STATUS_ALIASES, _expand_status_filter
+
+    group = (group or "day").lower()
+    if group not in GROUPS:
+        raise ValidationError("group inválido (use day, week ou month).", field="group")
+    top = max(1, min(int(top or 10), MAX_TOP))
+    dt_to = _parse_dia(date_to, "date_to") or datetime.utcnow().date()
+    dt_from = _parse_dia(date_from, "date_from") or dt_to - timedelta(days=DEFAULT_DAYS - 1)
+    if dt_from > dt_to:
+        raise ValidationError("date_from maior que date_to.", field="date_from")
+
+    status_set = _expand_status_filter(status)
+    if status_set:
+        incluir = lambda s: (s or "").lower() in {x.lower() for x in status_set}
+    else:
+        cancelados = {x.lower() for x in STATUS_ALIASES["cancelled"]}
+        incluir = lambda s: (s or "").lower() not in cancelados
+
+    rows = db.session.execute(
+        select(SalesDaily.dia, SalesDaily.status, SalesDaily.pedidos, SalesDaily.receita)
+        .where(SalesDaily.dia >= dt_from, SalesDaily.dia <= dt_to)
+    ).all()
+
+    # série com todos os períodos do intervalo (gráfico sem buracos)
+    series: dict[str, list] = {}
+    d = dt_from
+    while d <= dt_to:
+        series.setdefault(_periodo(d, group), [0, 0.0])
+        d += timedelta(days=1)
+
+    por_status: dict[str, list] = defaultdict(lambda: [0, 0.0])
+    statuses = set()
+    total = [0, 0.0]
+    for r in rows:
+        acc = por_status[r.status]
+        acc[0] += r.pedidos
+        acc[1] += r.receita
+        if not incluir(r.status):
+            continue
+        statuses.add(r.status)
+        acc = series[_periodo(r.dia, group)]
+        acc[0] += r.pedidos
+        acc[1] += r.receita
+        total[0] += r.pedidos
+        total[1] += r.receita
+
+    top_rows = []
+    if statuses:
+        receita = func.sum(SalesDailyProduto.receita)
+        top_rows = db.session.execute(
+            select(SalesDailyProduto.produto_id, func.max(SalesDailyProduto.produto_nome).label("produto_nome"),
+                   func.sum(SalesDailyProduto.qtd).label("qtd"), receita.label("receita"))
+            .where(SalesDailyProduto.dia >= dt_from, SalesDailyProduto.dia <= dt_to,
+                   SalesDailyProduto.status.in_(statuses))
+            .group_by(SalesDailyProduto.produto_id)
+            .having(func.sum(SalesDailyProduto.qtd) > 0)
+            .order_by(receita.desc(), SalesDailyProduto.produto_id)
+            .limit(top)
+        ).all()
+
+    return {
+        "date_from": dt_from.isoformat(),
+        "date_to": dt_to.isoformat(),
+        "group": group,
+        "totais": _resumo(*total),
+        "series": [{"periodo": p, **_resumo(n, v)} for p, (n, v) in series.items()],
+        "por_status": [{"status": s, **_resumo(n, v)} for s, (n, v) in sorted(por_status.items())
+                       if n > 0],
+        "top_produtos": [
+            {"produto_id": r.produto_id or None, "produto_nome": r.produto_nome,
+             "qtd": int(r.qtd), "receita": round(r.receita, 2)}
+            for r in top_rows
+        ],
+    }
@@ -0,0 +1,23 @@
+# tests/conftest.py
+import pytest
+
+from app import create_app  # antes dos models: mesma ordem de import do main.py
+from config import config
+from config.db import db
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """App com banco SQLite em arquivo e caches em disco num diretório temporário."""
+    monkeypatch.setattr(config, "SQLALCHEMY_DATABASE_URI", f"sqlite:///{tmp_path / 'petgo.db'}")
+    monkeypatch.setattr(config, "SECRET_KEY", "teste")
+    monkeypatch.setattr(config, "IMAGE_CACHE_DIR", str(tmp_path / "imagens"))
+    monkeypatch.setattr(config, "RECEIPT_CACHE_DIR", str(tmp_path / "recibos"))
+    monkeypatch.setattr(config, "SEED_ON_STARTUP", False)
+
+    app = create_app()
+    app.config["TESTING"] = True
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
@@ -0,0 +1,54 @@
+# tests/test_ajuste_estoque.py
+"""Ajuste de estoque em lote nos dois caminhos: UPDATE ... RETURNING e o fallback sem RETURNING."""
+import pytest
+
+from config.db import db
+from models import produto
+from service.produtoService import ajustar_estoque
+
+
+@pytest.fixture(params=[True, False], ids=["returning", "sem_returning"])
+def produtos(request, app, monkeypatch):
+    """Três produtos (estoque 10, 5, 0); o parâmetro liga/desliga o UPDATE ... RETURNING do dialeto."""
+    with app.app_context():
+        monkeypatch.setattr(db.engine.dialect, "update_returning", request.param)
+        ps = [produto(nome=f"Produto {e}", categoria="racao", especie="GATO", preco=10.0, estoque=e, descricao="teste")
+              for e in (10, 5, 0)]
+        db.session.add_all(ps)
+        db.session.commit()
+        yield [p.id_produto for p in ps]
+
+
+def _estoques(ids):
+    return [db.session.get(produto, i).estoque for i in ids]
+
+
+def test_aplica_delta_absoluto_e_esperado(app, produtos):
+    a, b, c = produtos
+    atualizados, conflitos = ajustar_estoque([
+        {"id": a, "delta": -3},
+        {"id": b, "estoque": 8, "esperado": 5},
+        {"id": c, "delta": 2},
+    ])
+    assert conflitos == []
+    assert sorted((r["id"], r["estoque"]) for r in atualizados) == [(a, 7), (b, 8), (c, 2)]
+    db.session.expire_all()
+    assert _estoques(produtos) == [7, 8, 2]
+
+
+def test_conflito_parcial_desfaz_todas_as_linhas(app, produtos):
+    a, b, c = produtos
+    atualizados, conflitos = ajustar_estoque([
+        {"id": a, "delta": -3},                   # válido sozinho
+        {"id": b, "delta": -1, "esperado": 4},    # estoque atual é 5
+        {"id": c, "delta": -1},                   # ficaria negativo
+        {"id": 9999, "estoque": 1},               # não existe
+    ])
+    assert atualizados == []
+    assert {x["id"]: x["erro"] for x in conflitos} == {
+        b: "Estoque atual diferente do esperado.",
+        c: "Estoque ficaria negativo.",
+        9999: "Produto não encontrado.",
+    }
+    db.session.expire_all()
+    assert _estoques(produtos) == [10, 5, 0]
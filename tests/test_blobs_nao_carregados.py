@@ -0,0 +1,93 @@
+# tests/test_blobs_nao_carregados.py
+"""Listagens de pedidos, carrinho e usuário/pets não podem ler as colunas de imagem (blobs deferidos)."""
+import io
+from datetime import date
+
+import pytest
+from PIL import Image
+from sqlalchemy import event
+
+from config.db import db
+from models import Cart, CartItem, Consultation, Order, OrderItem, Pet, User, Vaccine, produto
+from utils.imagem import process_image
+
+BLOBS = ("imagem_bloob", "foto_bloob")
+ENDPOINTS = (
+    "/api/orders",
+    "/api/orders/{order_id}",
+    "/api/me/orders",
+    "/api/admin/orders/",
+    "/api/carrinho",
+    "/api/me",
+    "/api/me/pets",
+    "/api/pets",
+    "/api/pets?include=vaccines,consultations",
+)
+
+
+def _imagem() -> bytes:
+    buf = io.BytesIO()
+    Image.effect_noise((64, 64), 60).convert("RGB").save(buf, "JPEG")
+    return buf.getvalue()
+
+
+@pytest.fixture
+def dados(app):
+    """Usuário admin com pet (foto, vacina, consulta), produto com imagem no carrinho e um pedido."""
+    img = process_image(_imagem())
+    with app.app_context():
+        u = User(username="ana", email="ana@petgo.com", password="x", nome="Ana", is_admin=True)
+        db.session.add(u)
+        db.session.flush()
+        p = produto(nome="Ração", categoria="racao", especie="GATO", preco=10.0, estoque=5, descricao="teste")
+        p.set_imagem(img)
+        pet = Pet(nome="Rex", raca="SRD", peso=3, dob=date(2020, 1, 1), dono=u.id_user, adotado=True)
+        pet.set_imagem(img)
+        db.session.add_all([p, pet])
+        db.session.flush()
+        db.session.add_all([
+            Vaccine(pet_id=pet.id_pet, name="V8", date=date(2024, 1, 5), next=date(2025, 1, 5)),
+            Consultation(pet_id=pet.id_pet, date=date(2024, 3, 4), reason="rotina"),
+        ])
+        cart = Cart(id_usuario=u.id_user)
+        db.session.add(cart)
+        db.session.flush()
+        db.session.add(CartItem(id_cart=cart.id_cart, id_produto=p.id_produto, quantidade=1, preco_unitario=10.0))
+        order = Order(user_id=u.id_user, total=10.0, status="FINALIZADO")
+        db.session.add(order)
+        db.session.flush()
+        db.session.add(OrderItem(order_id=order.id_pedido, produto_id=p.id_produto, produto_nome="Ração",
+                                 qtd=1, preco_unit=10.0))
+        db.session.commit()
+        return {"user_id": u.id_user, "order_id": order.id_pedido}
+
+
+@pytest.fixture
+def sql(app):
+    """Lista com todos os SQLs executados enquanto o teste roda."""
+    stmts = []
+    with app.app_context():
+        engine = db.engine
+
+    def captura(conn, cursor, statement, params, context, executemany):
+        stmts.append(statement)
+
+    event.listen(engine, "before_cursor_execute", captura)
+    yield stmts
+    event.remove(engine, "before_cursor_execute", captura)
+
+
+@pytest.mark.parametrize("url", ENDPOINTS)
+def test_endpoint_nao_le_blobs(app, dados, sql, url):
+    client = app.test_client()
+    with client.session_transaction() as s:
+        s["user_id"] = dados["user_id"]
+        s["is_admin"] = True
+
+    sql.clear()
+    resp = client.get(url.format(**dados))
+
+    assert resp.status_code == 200, resp.get_data(as_text=True)
+    assert sql, "nenhum SQL capturado"
+    lidos = [s for s in sql if any(b in s for b in BLOBS)]
+    assert lidos == []
@@ -0,0 +1,90 @@
+# tests/test_carrinho_ops.py
+"""POST /api/carrinho/ops: várias operações em ordem, com número fixo de SQLs."""
+import pytest
+from sqlalchemy import event
+
+from config.db import db
+from models import Cart, CartItem, User, produto
+
+# carrinho, produtos (IN), linhas atuais (IN), UPDATE em lote, remoção, INSERT em lote, carrinho final
+SQLS_POR_CHAMADA = 7
+
+
+@pytest.fixture
+def loja(app):
+    """Usuário com carrinho (produto 0: 2 un., produto 1: 3 un., produto 2: 1 un.) e 40 produtos à venda."""
+    with app.app_context():
+        u = User(username="ana", email="ana@petgo.com", password="x", nome="Ana")
+        ps = [produto(nome=f"Produto {i}", categoria="racao", especie="GATO", preco=10.0 + i, estoque=100,
+                      descricao="teste") for i in range(40)]
+        db.session.add_all([u, *ps])
+        db.session.flush()
+        cart = Cart(id_usuario=u.id_user)
+        db.session.add(cart)
+        db.session.flush()
+        for p, qtd in zip(ps, (2, 3, 1)):
+            db.session.add(CartItem(id_cart=cart.id_cart, id_produto=p.id_produto, quantidade=qtd, preco_unitario=1.0))
+        db.session.commit()
+        return u.id_user, [p.id_produto for p in ps]
+
+
+@pytest.fixture
+def contador(app):
+    """Conta os SQLs executados no banco (after_cursor_execute)."""
+    n = [0]
+    with app.app_context():
+        engine = db.engine
+
+    def conta(conn, cursor, statement, params, context, executemany):
+        n[0] += 1
+
+    event.listen(engine, "after_cursor_execute", conta)
+    yield n
+    event.remove(engine, "after_cursor_execute", conta)
+
+
+def _cliente(app, uid):
+    client = app.test_client()
+    with client.session_transaction() as s:
+        s["user_id"] = uid
+    return client
+
+
+def test_ops_mistas_em_ordem(app, loja, contador):
+    uid, pids = loja
+    a, b, c, d, e = pids[:5]
+    client = _cliente(app, uid)
+
+    contador[0] = 0
+    resp = client.post("/api/carrinho/ops", json={"ops": [
+        {"id_produto": a, "modo": "inc", "quantidade": 2},      # 2 -> 4
+        {"id_produto": a, "modo": "REMOVER", "quantidade": 1},  # 4 -> 3
+        {"id_produto": b, "modo": "set", "quantidade": 7},      # 3 -> 7
+        {"id_produto": c, "modo": "REMOVER"},                   # 1 -> apaga a linha
+        {"id_produto": d, "modo": "inc", "quantidade": 1},      # nova linha
+        {"id_produto": d, "modo": "inc", "quantidade": 2},      # 1 -> 3
+        {"id_produto": e, "modo": "set", "quantidade": 5},      # nova linha
+        {"id_produto": e, "modo": "REMOVER", "quantidade": 9},  # zera antes de existir
+    ]})
+    assert resp.status_code == 200, resp.get_data(as_text=True)
+    assert contador[0] == SQLS_POR_CHAMADA
+
+    itens = {i["id_produto"]: i for i in resp.get_json()["items"]}
+    assert {pid: i["quantidade"] for pid, i in itens.items()} == {a: 3, b: 7, d: 3}
+    # toda linha tocada fica com o preço atual do produto
+    assert all(i["preco_unitario"] == i["product"]["preco"] for i in itens.values())
+
+
+def test_numero_de_sqls_nao_cresce_com_as_ops(app, loja, contador):
+    uid, pids = loja
+    client = _cliente(app, uid)
+
+    contador[0] = 0
+    resp = client.post("/api/carrinho/ops", json={"ops": (
+        [{"id_produto": pid, "modo": "inc", "quantidade": 1} for pid in pids[3:]]          # 37 linhas novas
+        + [{"id_produto": pid, "modo": "set", "quantidade": 4} for pid in pids[:2]]        # 2 alteradas
+        + [{"id_produto": pid, "modo": "REMOVER", "quantidade": 99} for pid in pids[2:8]]  # 1 apagada, 5 desfeitas
+    )})
+    assert resp.status_code == 200, resp.get_data(as_text=True)
+    assert contador[0] == SQLS_POR_CHAMADA
+    assert len(resp.get_json()["items"]) == len(pids) - 6
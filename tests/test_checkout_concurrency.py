@@ -0,0 +1,71 @@
+# tests/test_checkout_concurrency.py
+"""Checkout concorrente: N unidades em estoque e mais de N compradores ao mesmo tempo."""
+import threading
+
+from app.erros import ValidationError
+from config.db import db
+from models import Cart, CartItem, Order, User, produto
+from service import pedidoService, reciboService
+
+ESTOQUE = 5
+COMPRADORES = 12
+
+
+def _prepara(app) -> tuple[int, list[int]]:
+    """Um produto com ESTOQUE unidades e COMPRADORES usuários, cada um com 1 unidade no carrinho."""
+    with app.app_context():
+        p = produto(nome="Ração", categoria="racao", especie="GATO", preco=10.0,
+                    estoque=ESTOQUE, descricao="teste")
+        db.session.add(p)
+        db.session.flush()
+        uids = []
+        for i in range(COMPRADORES):
+            u = User(username=f"comprador{i}", email=f"comprador{i}@petgo.com", password="x", nome=f"Comprador {i}")
+            db.session.add(u)
+            db.session.flush()
+            cart = Cart(id_usuario=u.id_user)
+            db.session.add(cart)
+            db.session.flush()
+            db.session.add(CartItem(id_cart=cart.id_cart, id_produto=p.id_produto, quantidade=1, preco_unitario=10.0))
+            uids.append(u.id_user)
+        db.session.commit()
+        return p.id_produto, uids
+
+
+def test_checkout_paralelo_nao_vende_alem_do_estoque(app, monkeypatch):
+    monkeypatch.setattr(reciboService, "schedule", lambda order_id: None)  # sem PDF em segundo plano
+    pid, uids = _prepara(app)
+
+    largada = threading.Barrier(len(uids))
+    pedidos, recusas, inesperados = [], [], []
+    lock = threading.Lock()
+
+    def compra(uid: int):
+        with app.app_context():
+            largada.wait()
+            try:
+                order_id = pedidoService.create_order_from_cart(uid).id_pedido
+                with lock:
+                    pedidos.append(order_id)
+            except ValidationError as e:
+                with lock:
+                    recusas.append(str(e))
+            except Exception as e:  # banco travado etc.: falha o teste
+                with lock:
+                    inesperados.append(repr(e))
+            finally:
+                db.session.remove()
+
+    threads = [threading.Thread(target=compra, args=(uid,)) for uid in uids]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=60)
+
+    assert inesperados == []
+    assert len(pedidos) == ESTOQUE
+    assert len(recusas) == COMPRADORES - ESTOQUE
+    assert all(r.startswith("Estoque insuficiente") for r in recusas), recusas
+    with app.app_context():
+        assert db.session.get(produto, pid).estoque == 0
+        assert Order.query.count() == ESTOQUE
@@ -0,0 +1,51 @@
+# tests/test_idempotencia.py
+"""Idempotency-Key no checkout: erro libera a chave, sucesso é repetido sem executar de novo."""
+from config.db import db
+from models import Cart, CartItem, IdempotencyKey, Order, User, produto
+from service import reciboService
+
+
+def _prepara(app) -> tuple[int, int]:
+    """Usuário com 1 unidade no carrinho gravada a 10,00 e o produto já custando 12,00."""
+    with app.app_context():
+        u = User(username="ana", email="ana@petgo.com", password="x", nome="Ana")
+        p = produto(nome="Ração", categoria="racao", especie="GATO", preco=12.0, estoque=5, descricao="teste")
+        db.session.add_all([u, p])
+        db.session.flush()
+        cart = Cart(id_usuario=u.id_user)
+        db.session.add(cart)
+        db.session.flush()
+        db.session.add(CartItem(id_cart=cart.id_cart, id_produto=p.id_produto, quantidade=1, preco_unitario=10.0))
+        db.session.commit()
+        return u.id_user, p.id_produto
+
+
+def test_checkout_repete_mesma_chave_depois_do_reprice(app, monkeypatch):
+    monkeypatch.setattr(reciboService, "schedule", lambda order_id: None)
+    uid, pid = _prepara(app)
+    client = app.test_client()
+    with client.session_transaction() as s:
+        s["user_id"] = uid
+    headers = {"Idempotency-Key": "checkout-1"}
+    body = {"payment_method": "pix"}
+
+    resp = client.post("/api/checkout", json=body, headers=headers)
+    assert resp.status_code == 409
+    assert resp.get_json()["precos_alterados"] == [pid]
+    with app.app_context():
+        assert IdempotencyKey.query.count() == 0  # o 409 não fica gravado
+
+    assert client.post("/api/carrinho/reprice").status_code == 200
+
+    resp = client.post("/api/checkout", json=body, headers=headers)
+    assert resp.status_code == 201, resp.get_data(as_text=True)
+    assert resp.get_json()["total"] == 12.0
+    pedido = resp.get_json()["id_pedido"]
+
+    # a repetição devolve o mesmo pedido sem criar outro
+    resp = client.post("/api/checkout", json=body, headers=headers)
+    assert resp.status_code == 201
+    assert resp.headers["Idempotent-Replayed"] == "true"
+    assert resp.get_json()["id_pedido"] == pedido
+    with app.app_context():
+        assert Order.query.count() == 1
@@ -0,0 +1,48 @@
+# tests/test_pedido_status.py
+"""Troca de status de um pedido pelo admin: regra de TRANSICOES e grafia gravada."""
+from config.db import db
+from models import Cart, CartItem, Order, SalesDaily, User, produto
+from service import pedidoService, reciboService
+
+
+def _pedido(app, monkeypatch) -> tuple[int, int]:
+    """Admin com um pedido FINALIZADO feito pelo checkout (já contado no rollup de vendas)."""
+    monkeypatch.setattr(reciboService, "schedule", lambda order_id: None)
+    with app.app_context():
+        u = User(username="ana", email="ana@petgo.com", password="x", nome="Ana", is_admin=True)
+        p = produto(nome="Ração", categoria="racao", especie="GATO", preco=10.0, estoque=5, descricao="teste")
+        db.session.add_all([u, p])
+        db.session.flush()
+        cart = Cart(id_usuario=u.id_user)
+        db.session.add(cart)
+        db.session.flush()
+        db.session.add(CartItem(id_cart=cart.id_cart, id_produto=p.id_produto, quantidade=1, preco_unitario=10.0))
+        db.session.commit()
+        return u.id_user, pedidoService.create_order_from_cart(u.id_user).id_pedido
+
+
+def test_transicoes_do_pedido(app, monkeypatch):
+    uid, oid = _pedido(app, monkeypatch)
+    client = app.test_client()
+    with client.session_transaction() as s:
+        s["user_id"] = uid
+        s["is_admin"] = True
+    url = f"/api/orders/{oid}/status"
+
+    # completed -> shipped: permitida
+    resp = client.patch(url, json={"status": "Enviado"})
+    assert resp.status_code == 200, resp.get_data(as_text=True)
+
+    # shipped -> cancelled: fora de TRANSICOES
+    resp = client.patch(url, json={"status": "cancelado"})
+    assert resp.status_code == 409
+    assert resp.get_json()["field"] == "transicao"
+
+    # shipped -> completed: volta com a grafia do checkout, no mesmo balde do rollup
+    resp = client.patch(url, json={"status": "finalizado"})
+    assert resp.status_code == 200, resp.get_data(as_text=True)
+
+    with app.app_context():
+        assert db.session.get(Order, oid).status == "FINALIZADO"
+        rollup = {r.status: r.pedidos for r in SalesDaily.query if r.pedidos}
+        assert rollup == {"FINALIZADO": 1}
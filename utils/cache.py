@@ -0,0 +1,132 @@
+# utils/cache.py
+"""
+Cache read-through versionado.
+
+Cada entrada é gravada sob "<namespace>:<versão>:<chave>". Qualquer escrita no
+domínio chama bump(), que incrementa a versão: as entradas antigas deixam de
+ser encontradas (e saem por LRU/TTL), então nunca se serve conteúdo velho.
+
+Backends:
+- LocalBackend: LRU + TTL em memória do processo (padrão)
+- RedisBackend: compartilhado entre workers (CATALOG_CACHE_URL=redis://...);
+  precisa do pacote 'redis', que é opcional
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+class LocalBackend:
+    def __init__(self, maxsize: int = 512):
+        self.maxsize = maxsize
+        self._data: OrderedDict = OrderedDict()
+        self._counters: dict = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        now = time.monotonic()
+        with self._lock:
+            hit = self._data.get(key)
+            if hit is None:
+                return None
+            if hit[0] <= now:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return hit[1]
+
+    def set(self, key: str, value: bytes, ttl: int):
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_counter(self, key: str) -> int:
+        return self._counters.get(key, 0)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            # versão nova: o que estava guardado não será mais lido
+            self._data.clear()
+            return self._counters[key]
+
+
+class RedisBackend:
+    def __init__(self, url: str):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("CATALOG_CACHE_URL usa redis, mas o pacote 'redis' não está instalado.") from e
+        self._r = redis.Redis.from_url(url)
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._r.get(key)
+
+    def set(self, key: str, value: bytes, ttl: int):
+        self._r.set(key, value, ex=ttl)
+
+    def get_counter(self, key: str) -> int:
+        return int(self._r.get(key) or 0)
+
+    def incr(self, key: str) -> int:
+        return int(self._r.incr(key))
+
+
+def make_backend(url: Optional[str], maxsize: int):
+    if url and url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisBackend(url)
+    return LocalBackend(maxsize)
+
+
+class VersionedCache:
+    def __init__(self, namespace: str, backend_factory: Callable[[], Any], ttl: int = 60):
+        self.namespace = namespace
+        self.ttl = ttl
+        self._factory = backend_factory
+        self._backend = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def backend(self):
+        # criado no primeiro uso, depois que a configuração foi carregada
+        if self._backend is None:
+            with self._lock:
+                if self._backend is None:
+                    self._backend = self._factory()
+        return self._backend
+
+    def version(self) -> int:
+        return self.backend.get_counter(f"{self.namespace}:v")
+
+    def bump(self) -> int:
+        """Invalida tudo do namespace (chamar depois de cada escrita)."""
+        return self.backend.incr(f"{self.namespace}:v")
+
+    def get_or_set(self, key: Hashable, fn: Callable[[], bytes]) -> tuple[bytes, bool]:
+        """Retorna (valor, hit). fn() só roda em miss e deve retornar bytes."""
+        full_key = f"{self.namespace}:{self.version()}:{key!r}"
+        value = self.backend.get(full_key)
+        if value is not None:
+            self.hits += 1
+            return value, True
+        self.misses += 1
+        value = fn()
+        self.backend.set(full_key, value, self.ttl)
+        return value, False
+
+    def stats(self) -> dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "namespace": self.namespace,
+            "backend": type(self.backend).__name__,
+            "version": self.version(),
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else None,
+        }
@@ -9,7 +9,7 @@ from reportlab.lib.utils import ImageReader
 from io import BytesIO
 from decimal import Decimal
 from datetime import datetime
-import gzip
+from functools import lru_cache
 
 def _fmt_money(v) -> str:
     if isinstance(v, Decimal):
@@ -19,16 +19,56 @@ def _fmt_money(v) -> str:
     s = f"{v:,.2f}"
     return s.replace(",", "X").replace(".", ",").replace("X", ".")
 
-def _get_logo_image(companie_obj):
-    raw_gz = getattr(companie_obj, "imagem_bloob", None)
-    if not raw_gz:
+def carrega_logo(raw: bytes | None):
+    """ImageReader pronto para drawImage (já decodificado), ou None se não houver/for inválido."""
+    if not raw:
         return None
     try:
-        raw = gzip.decompress(raw_gz)
-        return ImageReader(BytesIO(raw))
+        img = ImageReader(BytesIO(raw))
+        # decodifica agora: quem reaproveita o objeto (cache de branding) só lê
+        img.getSize(); img.getRGBData(); img.getTransparent()
+        return img
     except Exception:
         return None
 
+def _get_logo_image(companie_obj):
+    # branding em cache (service.companieService.Branding) já traz o logo decodificado
+    if hasattr(companie_obj, "logo_image"):
+        return companie_obj.logo_image
+    if not getattr(companie_obj, "imagem_bloob", None):
+        return None
+    # blob com ou sem gzip (logos antigos foram gravados compactados)
+    return carrega_logo(companie_obj.get_photo_bytes())
+
+@lru_cache(maxsize=None)
+def _estilos() -> dict:
+    """Estilos de parágrafo e de tabela do recibo, montados uma vez por processo."""
+    normal = ParagraphStyle(name="Normal", fontName="Helvetica", fontSize=9, leading=12, alignment=TA_LEFT, textColor=colors.black)
+    return {
+        "normal": normal,
+        "section_title": ParagraphStyle(name="SectionTitle", parent=normal, fontName="Helvetica-Bold", fontSize=10, leading=12, textColor=colors.HexColor("#2563eb")),
+        "right": ParagraphStyle(name="Right", parent=normal, alignment=TA_RIGHT),
+        "total_value": ParagraphStyle(name="TotalValue", parent=normal, alignment=TA_RIGHT, textColor=colors.HexColor("#2563eb"), fontName="Helvetica-Bold", fontSize=11),
+        "itens_tbl": TableStyle([
+            ('FONT', (0,0), (-1,0), 'Helvetica-Bold', 9),
+            ('BACKGROUND', (0,0), (-1,0), colors.HexColor("#f9fafb")),
+            ('ALIGN', (1,1), (-1,-1), 'RIGHT'),
+            ('ALIGN', (0,1), (0,-1), 'LEFT'),
+            ('VALIGN', (0,0), (-1,-1), 'TOP'),
+            ('INNERGRID', (0,0), (-1,-1), 0.25, colors.HexColor("#d1d5db")),
+            ('BOX', (0,0), (-1,-1), 0.5, colors.HexColor("#d1d5db")),
+        ]),
+        "totais_tbl": TableStyle([
+            ('ALIGN', (0,0), (-1,-1), 'RIGHT'),
+            ('BOTTOMPADDING', (0,0), (-1,-1), 4),
+            ('TOPPADDING', (0,0), (-1,-1), 4),
+            ('BOX', (0,0), (-1,-1), 0, colors.white),
+            ('INNERGRID', (0,0), (-1,-1), 0, colors.white),
+            ('FONT', (0,-1), (-1,-1), 'Helvetica-Bold', 10),
+            ('TEXTCOLOR', (0,-1), (-1,-1), colors.HexColor("#2563eb")),
+        ]),
+    }
+
 def _as_str(x, default=""):
     return str(x) if x is not None else default
 
@@ -101,11 +141,9 @@ def gerar_pdf_recibo_venda(
     cursor_y  = altura - 20 * mm
     right_x   = largura - margin_right
 
-    # Estilos
-    style_normal = ParagraphStyle(name="Normal", fontName="Helvetica", fontSize=9, leading=12, alignment=TA_LEFT, textColor=colors.black)
-    style_section_title = ParagraphStyle(name="SectionTitle", parent=style_normal, fontName="Helvetica-Bold", fontSize=10, leading=12, textColor=colors.HexColor("#2563eb"))
-    style_right  = ParagraphStyle(name="Right", parent=style_normal, alignment=TA_RIGHT)
-    style_total_value = ParagraphStyle(name="TotalValue", parent=style_normal, alignment=TA_RIGHT, textColor=colors.HexColor("#2563eb"), fontName="Helvetica-Bold", fontSize=11)
+    st = _estilos()
+    style_normal, style_section_title = st["normal"], st["section_title"]
+    style_right, style_total_value = st["right"], st["total_value"]
 
     # -------- Cabeçalho
     logo_img = _get_logo_image(companie_obj)
@@ -179,15 +217,7 @@ def gerar_pdf_recibo_venda(
     table_data = [["Produto/Serviço", "Qtd", "Unitário (R$)", "Subtotal (R$)"]] + linhas_itens
     col_widths = [max_width * 0.50, max_width * 0.10, max_width * 0.15, max_width * 0.25]
     tbl = Table(table_data, colWidths=col_widths, repeatRows=1)
-    tbl.setStyle(TableStyle([
-        ('FONT', (0,0), (-1,0), 'Helvetica-Bold', 9),
-        ('BACKGROUND', (0,0), (-1,0), colors.HexColor("#f9fafb")),
-        ('ALIGN', (1,1), (-1,-1), 'RIGHT'),
-        ('ALIGN', (0,1), (0,-1), 'LEFT'),
-        ('VALIGN', (0,0), (-1,-1), 'TOP'),
-        ('INNERGRID', (0,0), (-1,-1), 0.25, colors.HexColor("#d1d5db")),
-        ('BOX', (0,0), (-1,-1), 0.5, colors.HexColor("#d1d5db")),
-    ]))
+    tbl.setStyle(st["itens_tbl"])
     tw, th = tbl.wrapOn(c, max_width, cursor_y - 30 * mm)
     if cursor_y - th < 60 * mm:
         c.showPage(); cursor_y = altura - 20 * mm
@@ -202,15 +232,7 @@ def gerar_pdf_recibo_venda(
         [Paragraph("<b>Total (registrado):</b>", style_normal), Paragraph(f"<b>R$ {_fmt_money(total_final)}</b>", style_total_value)],
     ]
     totais_tbl = Table(totais_rows, colWidths=[max_width * 0.35, max_width * 0.20], hAlign='RIGHT')
-    totais_tbl.setStyle(TableStyle([
-        ('ALIGN', (0,0), (-1,-1), 'RIGHT'),
-        ('BOTTOMPADDING', (0,0), (-1,-1), 4),
-        ('TOPPADDING', (0,0), (-1,-1), 4),
-        ('BOX', (0,0), (-1,-1), 0, colors.white),
-        ('INNERGRID', (0,0), (-1,-1), 0, colors.white),
-        ('FONT', (0,-1), (-1,-1), 'Helvetica-Bold', 10),
-        ('TEXTCOLOR', (0,-1), (-1,-1), colors.HexColor("#2563eb")),
-    ]))
+    totais_tbl.setStyle(st["totais_tbl"])
     tw_tot, th_tot = totais_tbl.wrapOn(c, max_width, 9999)
     totais_x = margin_left + max_width - tw_tot
     totais_tbl.drawOn(c, totais_x, cursor_y - th_tot)
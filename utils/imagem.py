@@ -0,0 +1,140 @@
+import hashlib
+import threading
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from app.erros import ValidationError
+from config import config
+
+# formatos aceitos no upload (detectados pelo conteúdo, não pelo mime do data URL)
+INGEST_FORMATS = {
+    "JPEG": "image/jpeg",
+    "PNG": "image/png",
+    "WEBP": "image/webp",
+    "GIF": "image/gif",
+}
+MAX_DIM = 2048                 # maior lado gravado; fotos de câmera são reduzidas
+MAX_PIXELS = 50_000_000        # recusa antes de decodificar (bomba de descompressão)
+WEBP_QUALITY = 82
+INGEST_TIMEOUT = 30            # segundos
+
+# resultado do pipeline: blob é gravado como está (sem gzip) e hash/width/height
+# descrevem esse mesmo conteúdo
+ImagemProcessada = namedtuple("ImagemProcessada", "blob mime hash width height")
+
+# chaves de info do Pillow com metadados que não devem ir para o banco
+_META_KEYS = ("exif", "xmp", "XML:com.adobe.xmp", "comment")
+
+
+def image_meta(raw: bytes) -> tuple[str, int | None, int | None]:
+    """
+    Retorna (hash, largura, altura) dos bytes originais da imagem.
+    - hash: sha256 hex do conteúdo (usado como versão na URL)
+    - largura/altura: lidas só do cabeçalho; None se o Pillow não reconhecer o formato
+    """
+    digest = hashlib.sha256(raw).hexdigest()
+    try:
+        with Image.open(BytesIO(raw)) as im:
+            width, height = im.size
+    except (UnidentifiedImageError, OSError):
+        width = height = None
+    return digest, width, height
+
+
+def _result(data: bytes, mime: str, size: tuple[int, int]) -> ImagemProcessada:
+    return ImagemProcessada(data, mime, hashlib.sha256(data).hexdigest(), size[0], size[1])
+
+
+def process_image(raw: bytes, max_dim: int = MAX_DIM) -> ImagemProcessada:
+    """
+    Pipeline de ingestão de imagem:
+    - detecta o formato real pelo conteúdo (JPEG/PNG/WebP/GIF)
+    - aplica a orientação do EXIF e descarta EXIF/XMP
+    - limita o maior lado a max_dim
+    - re-encoda em WebP; se o original já era menor, sem metadados e sem
+      redimensionar, guarda o original
+    - GIF animado é mantido como veio
+    O resultado não é comprimido com gzip: esses formatos já são comprimidos.
+    Função de módulo para poder rodar num ProcessPoolExecutor.
+    """
+    try:
+        im = Image.open(BytesIO(raw))
+        fmt = im.format
+        if fmt not in INGEST_FORMATS:
+            raise ValidationError("Formato de imagem não suportado (use JPEG, PNG, WebP ou GIF).", field="photo")
+        if im.width * im.height > MAX_PIXELS:
+            raise ValidationError("Imagem com resolução grande demais.", field="photo")
+        if fmt == "GIF" and getattr(im, "is_animated", False):
+            return _result(raw, INGEST_FORMATS[fmt], im.size)
+        im.load()
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError) as e:
+        raise ValidationError("Arquivo de imagem inválido ou corrompido.", field="photo") from e
+
+    has_meta = any(k in im.info for k in _META_KEYS)
+    im = ImageOps.exif_transpose(im)
+    resized = max(im.size) > max_dim
+    if resized:
+        im.thumbnail((max_dim, max_dim), Image.LANCZOS)
+
+    if im.mode not in ("RGB", "RGBA"):
+        alpha = "A" in im.getbands() or "transparency" in im.info
+        im = im.convert("RGBA" if alpha else "RGB")
+    out = BytesIO()
+    im.save(out, "WEBP", quality=WEBP_QUALITY, method=4)  # sem exif=: metadados ficam de fora
+    data = out.getvalue()
+
+    if not resized and not has_meta and fmt != "GIF" and len(raw) <= len(data):
+        return _result(raw, INGEST_FORMATS[fmt], im.size)
+    return _result(data, "image/webp", im.size)
+
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=config.IMAGE_INGEST_WORKERS)
+        return _pool
+
+
+def _descarta_pool(pool: ProcessPoolExecutor):
+    """Esquece o pool quebrado; o próximo _get_pool() sobe outro."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+
+
+def ingest_image(raw: bytes) -> ImagemProcessada:
+    """
+    Roda process_image num pool de processos (decode/resize/encode não seguram
+    o GIL do worker web). Se o pool quebrar, processa aqui mesmo; se passar de
+    INGEST_TIMEOUT, a imagem é recusada (ValidationError).
+    """
+    pool = _get_pool()
+    try:
+        future = pool.submit(process_image, raw)
+        return future.result(timeout=INGEST_TIMEOUT)
+    except FutureTimeout:
+        future.cancel()  # se ainda estiver na fila, nem chega a rodar
+        raise ValidationError("Imagem muito pesada para processar.")
+    except BrokenProcessPool:
+        _descarta_pool(pool)
+        return process_image(raw)
+
+
+def map_images(fn, items: list, chunksize: int = 4) -> list:
+    """fn(item) para cada item no mesmo pool do ingest_image (import em lote); se o pool quebrar, processa aqui mesmo."""
+    pool = _get_pool()
+    try:
+        return list(pool.map(fn, items, chunksize=chunksize))
+    except BrokenProcessPool:
+        _descarta_pool(pool)
+        return [fn(item) for item in items]
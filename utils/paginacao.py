@@ -0,0 +1,86 @@
+# utils/paginacao.py
+"""
+Paginação por cursor (keyset): em vez de OFFSET, a próxima página começa
+depois da última linha vista, usando as colunas da ordenação ativa + id.
+
+O cursor é opaco para o front (base64 de um JSON com a ordenação e os
+valores da última linha) e só vale para a mesma ordenação.
+"""
+import base64
+import binascii
+import json
+import threading
+import time
+from datetime import date
+from typing import Any, Callable, Sequence
+
+from sqlalchemy import and_, or_
+
+from app.erros import ValidationError
+
+COUNT_TTL = 30  # segundos
+
+
+def encode_cursor(sort: str | None, values: Sequence[Any]) -> str:
+    vals = [v.isoformat() if isinstance(v, date) else v for v in values]
+    raw = json.dumps({"s": sort or "", "k": vals}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str | None, size: int) -> list:
+    """Retorna os valores do cursor; ValidationError se estiver corrompido ou for de outra ordenação."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        values = data["k"]
+        ok = data["s"] == (sort or "") and isinstance(values, list) and len(values) == size
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        ok = False
+    if not ok:
+        raise ValidationError("Cursor inválido.", field="cursor")
+    return values
+
+
+def keyset_filter(keys: Sequence[tuple], values: Sequence[Any]):
+    """
+    keys: [(coluna, desc), ...] na ordem do ORDER BY (todas na mesma direção).
+    Gera "linhas depois de values" num formato que o planner usa como range no índice:
+        a <= x AND (a < x OR (b < y ...))      (desc)
+    """
+    (col, desc), *rest = keys
+    val, *rest_vals = values
+    if not rest:
+        return col < val if desc else col > val
+    after = keyset_filter(rest, rest_vals)
+    if desc:
+        return and_(col <= val, or_(col < val, after))
+    return and_(col >= val, or_(col > val, after))
+
+
+_counts: dict = {}
+_counts_lock = threading.Lock()
+
+
+def cached_count(key: tuple, fn: Callable[[], int], ttl: int = COUNT_TTL) -> int:
+    """
+    Total estimado: reaproveita o COUNT(*) do mesmo filtro por até `ttl` segundos.
+    key[0] é o escopo (ex.: 'produtos'), usado por clear_counts nas escritas.
+    """
+    now = time.monotonic()
+    with _counts_lock:
+        hit = _counts.get(key)
+        if hit and hit[0] > now:
+            return hit[1]
+    total = fn()
+    with _counts_lock:
+        if len(_counts) > 1024:
+            _counts.clear()
+        _counts[key] = (now + ttl, total)
+    return total
+
+
+def clear_counts(scope: str):
+    """Descarta os totais cacheados de um escopo (chamar depois de escrever nele)."""
+    with _counts_lock:
+        for key in [k for k in _counts if k[0] == scope]:
+            del _counts[key]